@@ -1,21 +1,46 @@
+import os
+
 from flask import Flask, jsonify, request, Blueprint
 
 from controllers.graph_controller import graph_controller
 from controllers.artist_controller import artist_controller
 from controllers.artwork_controller import artwork_controller
 from controllers.document_controller import document_controller
+from controllers.metrics_controller import metrics_controller
+from controllers.relation_controller import relation_controller
+from config import migrations
+from services import graph_dump, graph_overview, graph_snapshot
 from utils.function import send_error
 from flask_cors import CORS
 
 app = Flask(__name__)
-CORS(app)
-
-CORS(app)
+# Les en-têtes de version du graphe doivent être lisibles par le front (voir /graphs/changes)
+CORS(app, expose_headers=['X-Graph-Version', 'X-Graph-Epoch'])
 
 app.register_blueprint(artist_controller)
 app.register_blueprint(artwork_controller)
 app.register_blueprint(document_controller)
 app.register_blueprint(graph_controller)
+app.register_blueprint(metrics_controller)
+app.register_blueprint(relation_controller)
+
+# Commandes `flask schema migrate` et `flask schema check`
+app.cli.add_command(migrations.schema_cli)
+# Commandes `flask graph export` et `flask graph restore`
+app.cli.add_command(graph_dump.graph_cli)
+
+# Application des migrations du schéma au démarrage si demandé
+if os.getenv("SCHEMA_AUTO_MIGRATE", "false").lower() == "true":
+    try:
+        migrations.migrate()
+    except Exception as e:
+        print(f"Erreur lors de l'application des migrations du schéma : {e}")
+
+# Démarrage à chaud : structures en mémoire remplies depuis le fichier de snapshot
+snapshot_file = graph_dump.usable_snapshot_file() if graph_snapshot.is_enabled() else None
+if snapshot_file:
+    graph_snapshot.seed_from_file(snapshot_file)
+    graph_overview.seed_from_file(snapshot_file)
 
 
 @app.errorhandler(500)
@@ -1,13 +1,58 @@
 import os
-from neo4j import GraphDatabase
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from neo4j import GraphDatabase, READ_ACCESS, WRITE_ACCESS
 from dotenv import load_dotenv
 
 load_dotenv()
 
 URI = os.getenv("NEO4J_URL")
 AUTH = (os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
+# Base de données ciblée (vide = base par défaut du serveur)
+DATABASE = os.getenv("NEO4J_DATABASE") or None
+# Nombre d'enregistrements récupérés par lot lors de la lecture en flux d'un résultat
+FETCH_SIZE = int(os.getenv("NEO4J_FETCH_SIZE", "1000"))
+# Taille du pool de connexions et attente maximale (secondes) pour en obtenir une
+MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
+# Durée maximale (secondes) des nouvelles tentatives d'une transaction après une erreur transitoire
+MAX_RETRY_TIME = float(os.getenv("NEO4J_MAX_RETRY_TIME", "5"))
+# Nombre maximal de requêtes lancées en parallèle par execute_reads
+FANOUT_WORKERS = int(os.getenv("NEO4J_FANOUT_WORKERS", "8"))
+# Nombre de nœuds :DataVersion entre lesquels sont réparties les écritures (voir execute_data_write)
+DATA_VERSION_STRIPES = int(os.getenv("NEO4J_DATA_VERSION_STRIPES", "16"))
 
-driver = GraphDatabase.driver(URI, auth=AUTH)
+# Version des données commune à tous les workers : somme des compteurs :DataVersion.
+# Chaque écriture de données incrémente l'un d'eux, tiré au hasard, dans la transaction
+# de l'écriture : les écritures simultanées ne se disputent pas un seul nœud. La
+# contrainte d'unicité de la migration 4 empêche deux MERGE de créer le même nœud.
+BUMP_DATA_VERSION_QUERY = """
+MERGE (v:DataVersion {stripe: $stripe})
+ON CREATE SET v.count = 0
+SET v.count = v.count + 1
+"""
+
+READ_DATA_VERSION_QUERY = "MATCH (v:DataVersion) RETURN sum(v.count) AS version"
+
+driver = GraphDatabase.driver(
+    URI,
+    auth=AUTH,
+    max_connection_pool_size=MAX_POOL_SIZE,
+    connection_acquisition_timeout=ACQUISITION_TIMEOUT,
+    max_transaction_retry_time=MAX_RETRY_TIME
+)
+
+# Signets partagés par toutes les sessions : une lecture envoyée à une réplique voit
+# les écritures déjà validées par ce processus
+bookmark_manager = GraphDatabase.bookmark_manager()
+
+# Écritures de données validées par ce processus (une par transaction)
+_local_data_writes = 0
+_local_data_writes_lock = threading.Lock()
+
+_fanout_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="neo4j-fanout")
 
 try:
     driver.verify_connectivity()
@@ -16,28 +61,137 @@ except Exception as e:
     print(f"Erreur de connexion Neo4j : {e}")
 
 
-def execute_query(query: str, parameters: dict = None):
+def _run(tx, query: str, parameters: dict = None) -> List[dict]:
+    return [record.data() for record in tx.run(query, parameters or {})]
+
+
+def _run_all(tx, statements: List[Tuple[str, dict]]) -> List[List[dict]]:
+    return [_run(tx, query, parameters) for query, parameters in statements]
+
+
+def _run_data(tx, statements: List[Tuple[str, dict]]) -> List[List[dict]]:
+    results = _run_all(tx, statements)
+    tx.run(BUMP_DATA_VERSION_QUERY, {'stripe': random.randrange(DATA_VERSION_STRIPES)}).consume()
+    return results
+
+
+def execute_read(query: str, parameters: dict = None) -> Optional[List[dict]]:
+    """
+    Exécute une requête en lecture seule dans une transaction gérée par le driver.
+    En cluster (URL neo4j://), elle est envoyée à un serveur en lecture (réplique
+    ou suiveur). Les erreurs transitoires sont retentées avec un délai croissant
+    pendant au plus NEO4J_MAX_RETRY_TIME secondes ; en cas d'échec, renvoie None.
+    """
+    try:
+        with driver.session(database=DATABASE, bookmark_manager=bookmark_manager, default_access_mode=READ_ACCESS) as session:
+            return session.execute_read(_run, query, parameters)
+    except Exception as e:
+        print(f"Erreur lors de l'exécution de la requête en lecture : {e}")
+        return None
+
+
+def execute_reads(statements: List[Tuple[str, Optional[dict]]]) -> List[Optional[List[dict]]]:
+    """
+    Exécute des requêtes en lecture indépendantes en parallèle, chacune avec
+    execute_read dans sa propre session du pool : la durée totale est celle de la
+    plus lente. Renvoie les résultats dans l'ordre des requêtes ; une requête en
+    échec donne None sans empêcher les autres.
+    Ne pas appeler depuis une requête déjà lancée par execute_reads.
+    """
+    if len(statements) < 2:
+        return [execute_read(query, parameters) for query, parameters in statements]
+    futures = [_fanout_executor.submit(execute_read, query, parameters) for query, parameters in statements]
+    return [future.result() for future in futures]
+
+
+def execute_write(query: str, parameters: dict = None) -> Optional[List[dict]]:
+    """
+    Exécute une requête d'écriture dans une transaction gérée par le driver, envoyée
+    au serveur leader. Mêmes nouvelles tentatives que execute_read ; en cas d'échec,
+    renvoie None.
+    """
+    try:
+        with driver.session(database=DATABASE, bookmark_manager=bookmark_manager, default_access_mode=WRITE_ACCESS) as session:
+            return session.execute_write(_run, query, parameters)
+    except Exception as e:
+        print(f"Erreur lors de l'exécution de la requête en écriture : {e}")
+        return None
+
+
+def execute_transaction(statements: List[Tuple[str, dict]]) -> Optional[List[List[dict]]]:
+    """
+    Exécute plusieurs requêtes d'écriture dans une seule transaction : toutes sont
+    validées ensemble, ou aucune. Renvoie les résultats de chaque requête, ou None
+    en cas d'échec.
+    """
+    try:
+        with driver.session(database=DATABASE, bookmark_manager=bookmark_manager, default_access_mode=WRITE_ACCESS) as session:
+            return session.execute_write(_run_all, statements)
+    except Exception as e:
+        print(f"Erreur lors de l'exécution de la transaction : {e}")
+        return None
+
+
+def execute_data_transaction(statements: List[Tuple[str, dict]]) -> Optional[List[List[dict]]]:
+    """
+    Comme execute_transaction, pour les écritures qui modifient les données du graphe :
+    la version des données (voir read_data_version) est incrémentée dans la même
+    transaction, et donc seulement si elle est validée.
+    """
+    global _local_data_writes
+    try:
+        with driver.session(database=DATABASE, bookmark_manager=bookmark_manager, default_access_mode=WRITE_ACCESS) as session:
+            results = session.execute_write(_run_data, statements)
+    except Exception as e:
+        print(f"Erreur lors de l'exécution de la transaction : {e}")
+        return None
+    with _local_data_writes_lock:
+        _local_data_writes += 1
+    return results
+
+
+def execute_data_write(query: str, parameters: dict = None) -> Optional[List[dict]]:
+    """
+    Comme execute_write, pour une requête qui modifie les données du graphe (voir
+    execute_data_transaction)
+    """
+    results = execute_data_transaction([(query, parameters)])
+    return None if results is None else results[0]
+
+
+def read_data_version() -> Optional[int]:
     """
-    Exécute une requête Neo4j avec gestion robuste des erreurs
+    Nombre d'écritures de données validées par tous les workers depuis la création
+    de la base, ou None si elle ne répond pas
     """
-    max_retries = 3
-    retry_count = 0
+    results = execute_read(READ_DATA_VERSION_QUERY)
+    return None if not results else results[0]['version']
+
 
-    while retry_count < max_retries:
-        try:
-            with driver.session() as session:
-                result = session.run(query, parameters or {})
-                return [record.data() for record in result]
-        except Exception as e:
-            retry_count += 1
-            print(f"Erreur lors de l'exécution de la requête (tentative {retry_count}/{max_retries}) : {e}")
+def local_data_writes() -> int:
+    """
+    Nombre d'écritures de données validées par ce processus : la différence avec
+    read_data_version compte celles des autres workers
+    """
+    return _local_data_writes
 
-            if retry_count < max_retries and "connection" in str(e).lower():
-                try:
-                    driver.verify_connectivity()
-                except:
-                    pass
-            else:
-                return None
 
-    return None
+def execute_query(query: str, parameters: dict = None) -> Optional[List[dict]]:
+    """
+    Exécute une requête dont on ne sait pas si elle écrit : elle est envoyée au
+    leader comme une écriture. Préférer execute_read ou execute_write.
+    """
+    return execute_write(query, parameters)
+
+
+def stream_query(query: str, parameters: dict = None, fetch_size: int = None):
+    """
+    Exécute une requête Neo4j et renvoie les enregistrements au fur et à mesure
+    qu'ils arrivent du curseur, par lots de fetch_size, sans les accumuler.
+    La requête doit être en lecture seule (envoyée à un serveur en lecture).
+    Les erreurs sont propagées à l'appelant.
+    """
+    with driver.session(database=DATABASE, bookmark_manager=bookmark_manager, default_access_mode=READ_ACCESS, fetch_size=fetch_size or FETCH_SIZE) as session:
+        result = session.run(query, parameters or {})
+        for record in result:
+            yield record.data()
@@ -0,0 +1,85 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+from config.db_connection import execute_write
+
+# Nombre d'identifiants réservés à chaque écriture d'un compteur
+ID_BLOCK_SIZE = int(os.getenv("ID_BLOCK_SIZE", "50"))
+
+# Le compteur garde le plus grand identifiant réservé : le bloc réservé va
+# de count - size + 1 à count
+RESERVE_QUERY = """
+MERGE (c:Counter {name: $name})
+ON CREATE SET c.count = 0
+SET c.count = c.count + $size
+RETURN c.count AS high
+"""
+
+
+class IdAllocator:
+    """
+    Distribue les identifiants d'un compteur (:Counter) par blocs (hi/lo) : un bloc
+    de block_size identifiants est réservé en une transaction, puis les identifiants
+    sont donnés depuis la mémoire du processus. Les créations ne prennent donc plus
+    le verrou du compteur à chaque fois.
+    Les identifiants non utilisés d'un bloc sont perdus à l'arrêt du processus : il
+    peut y avoir des trous, jamais de doublons (chaque bloc n'est réservé qu'une fois).
+    """
+
+    def __init__(self, name: str, block_size: int = ID_BLOCK_SIZE):
+        self.name = name
+        self.block_size = max(1, block_size)
+        # Prochain identifiant à donner et dernier identifiant du bloc en cours
+        self._next = 1
+        self._high = 0
+        self._lock = threading.Lock()
+
+    def next_ids(self, count: int) -> Optional[List[int]]:
+        """
+        Renvoie count nouveaux identifiants, ou None si un bloc n'a pas pu être réservé
+        """
+        with self._lock:
+            ids: List[int] = []
+            while len(ids) < count:
+                if self._next > self._high:
+                    size = max(self.block_size, count - len(ids))
+                    results = execute_write(RESERVE_QUERY, {'name': self.name, 'size': size})
+                    if not results:
+                        # Les identifiants déjà pris restent réservés : ils sont perdus
+                        return None
+                    self._high = results[0]['high']
+                    self._next = self._high - size + 1
+                taken = min(count - len(ids), self._high - self._next + 1)
+                ids.extend(range(self._next, self._next + taken))
+                self._next += taken
+            return ids
+
+    def next_id(self) -> Optional[int]:
+        ids = self.next_ids(1)
+        return ids[0] if ids else None
+
+
+_allocators: Dict[str, IdAllocator] = {}
+_allocators_lock = threading.Lock()
+
+
+def get_allocator(name: str) -> IdAllocator:
+    with _allocators_lock:
+        if name not in _allocators:
+            _allocators[name] = IdAllocator(name)
+        return _allocators[name]
+
+
+def next_id(name: str) -> Optional[int]:
+    """
+    Nouvel identifiant du compteur name (par exemple 'Ar_ArtistID'), ou None en cas d'échec
+    """
+    return get_allocator(name).next_id()
+
+
+def next_ids(name: str, count: int) -> Optional[List[int]]:
+    """
+    count nouveaux identifiants du compteur name, ou None en cas d'échec
+    """
+    return get_allocator(name).next_ids(count)
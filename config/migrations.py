@@ -0,0 +1,182 @@
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import click
+from flask.cli import AppGroup
+
+from config.db_connection import execute_read, execute_write
+
+# Migrations du schéma, appliquées dans l'ordre des versions et jamais modifiées une fois
+# publiées : pour changer le schéma, ajouter une nouvelle version.
+# Chaque élément de 'schema' associe le nom d'un index ou d'une contrainte à sa création ;
+# 'drop' (facultatif) associe ceux à supprimer avant, par exemple pour recréer un index.
+MIGRATIONS: List[Dict[str, Any]] = [
+    {
+        'version': 1,
+        'description': "Contraintes d'unicité des identifiants et des compteurs",
+        'schema': {
+            'artist_id_unique':
+                "CREATE CONSTRAINT artist_id_unique IF NOT EXISTS "
+                "FOR (a:Artist) REQUIRE a.Ar_ArtistID IS UNIQUE",
+            'artwork_id_unique':
+                "CREATE CONSTRAINT artwork_id_unique IF NOT EXISTS "
+                "FOR (aw:Artwork) REQUIRE aw.Art_ArtworkID IS UNIQUE",
+            'counter_name_unique':
+                "CREATE CONSTRAINT counter_name_unique IF NOT EXISTS "
+                "FOR (c:Counter) REQUIRE c.name IS UNIQUE",
+            'schema_migration_version_unique':
+                "CREATE CONSTRAINT schema_migration_version_unique IF NOT EXISTS "
+                "FOR (m:SchemaMigration) REQUIRE m.version IS UNIQUE"
+        }
+    },
+    {
+        'version': 2,
+        'description': "Index des propriétés filtrées par le graphe",
+        'schema': {
+            'artist_nationality':
+                "CREATE RANGE INDEX artist_nationality IF NOT EXISTS FOR (a:Artist) ON (a.Ar_Nationality)",
+            'artist_birthday':
+                "CREATE RANGE INDEX artist_birthday IF NOT EXISTS FOR (a:Artist) ON (a.Ar_BirthDay)",
+            'artwork_medium':
+                "CREATE RANGE INDEX artwork_medium IF NOT EXISTS FOR (aw:Artwork) ON (aw.Art_Medium)",
+            'artwork_year':
+                "CREATE RANGE INDEX artwork_year IF NOT EXISTS FOR (aw:Artwork) ON (aw.Art_Year)"
+        }
+    },
+    {
+        'version': 3,
+        'description': "Index full-text de la recherche (sans accents ni casse)",
+        'schema': {
+            'artist_search':
+                "CREATE FULLTEXT INDEX artist_search IF NOT EXISTS FOR (a:Artist) "
+                "ON EACH [a.Ar_FirstName, a.Ar_LastName, a.Ar_Nationality, a.Ar_Movement, a.Ar_BirthDay, a.Ar_DeathDay] "
+                "OPTIONS {indexConfig: {`fulltext.analyzer`: 'standard-folding'}}",
+            'artwork_search':
+                "CREATE FULLTEXT INDEX artwork_search IF NOT EXISTS FOR (aw:Artwork) "
+                "ON EACH [aw.Art_Title, aw.artist] "
+                "OPTIONS {indexConfig: {`fulltext.analyzer`: 'standard-folding'}}"
+        }
+    },
+    {
+        'version': 4,
+        'description': "Contrainte d'unicité des compteurs de la version des données",
+        'schema': {
+            'data_version_stripe_unique':
+                "CREATE CONSTRAINT data_version_stripe_unique IF NOT EXISTS "
+                "FOR (v:DataVersion) REQUIRE v.stripe IS UNIQUE"
+        }
+    },
+    {
+        'version': 5,
+        'description': "Index full-text des artistes sur l'année de décès (Ar_DeathYear), comme la recherche d'origine",
+        'drop': {
+            'artist_search': "DROP INDEX artist_search IF EXISTS"
+        },
+        'schema': {
+            'artist_search':
+                "CREATE FULLTEXT INDEX artist_search IF NOT EXISTS FOR (a:Artist) "
+                "ON EACH [a.Ar_FirstName, a.Ar_LastName, a.Ar_Nationality, a.Ar_Movement, a.Ar_BirthDay, a.Ar_DeathYear] "
+                "OPTIONS {indexConfig: {`fulltext.analyzer`: 'standard-folding'}}"
+        }
+    }
+]
+
+APPLIED_QUERY = """
+MATCH (m:SchemaMigration)
+RETURN m.version AS version
+"""
+
+RECORD_QUERY = """
+MERGE (m:SchemaMigration {version: $version})
+SET m.description = $description, m.applied_at = $applied_at
+"""
+
+EXISTING_SCHEMA_QUERIES = (
+    "SHOW INDEXES YIELD name RETURN name",
+    "SHOW CONSTRAINTS YIELD name RETURN name"
+)
+
+
+def applied_versions() -> List[int]:
+    results = execute_read(APPLIED_QUERY)
+    if results is None:
+        raise RuntimeError("Impossible de lire les migrations appliquées")
+    return sorted(record['version'] for record in results)
+
+
+def migrate() -> List[int]:
+    """
+    Applique les migrations qui ne l'ont pas encore été, dans l'ordre.
+    Une migration n'est enregistrée (nœud :SchemaMigration) qu'une fois toutes ses
+    instructions exécutées ; elles sont idempotentes (IF NOT EXISTS), une migration
+    interrompue peut donc être relancée.
+
+    Returns:
+        Les versions appliquées
+    """
+    done = set(applied_versions())
+    applied = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m['version']):
+        if migration['version'] in done:
+            continue
+        # Une instruction de schéma par transaction : Neo4j ne les mélange pas avec des écritures
+        statements = list(migration.get('drop', {}).items()) + list(migration['schema'].items())
+        for name, statement in statements:
+            if execute_write(statement) is None:
+                raise RuntimeError(f"Échec de la migration {migration['version']} ({name})")
+        recorded = execute_write(RECORD_QUERY, {
+            'version': migration['version'],
+            'description': migration['description'],
+            'applied_at': datetime.now(timezone.utc).isoformat()
+        })
+        if recorded is None:
+            raise RuntimeError(f"Impossible d'enregistrer la migration {migration['version']}")
+        print(f"Migration {migration['version']} appliquée : {migration['description']}")
+        applied.append(migration['version'])
+    return applied
+
+
+def check() -> Dict[str, List]:
+    """
+    Compare le schéma attendu à celui de la base, sans rien modifier
+
+    Returns:
+        pending: versions des migrations non appliquées
+        missing: noms des index et contraintes attendus absents de la base
+    """
+    existing = set()
+    for query in EXISTING_SCHEMA_QUERIES:
+        results = execute_read(query)
+        if results is None:
+            raise RuntimeError("Impossible de lire le schéma de la base")
+        existing.update(record['name'] for record in results)
+
+    done = set(applied_versions())
+    return {
+        'pending': [m['version'] for m in MIGRATIONS if m['version'] not in done],
+        'missing': [name for m in MIGRATIONS for name in m['schema'] if name not in existing]
+    }
+
+
+schema_cli = AppGroup('schema', help="Migrations du schéma Neo4j (index et contraintes)")
+
+
+@schema_cli.command('migrate')
+def migrate_command() -> None:
+    """Applique les migrations en attente."""
+    applied = migrate()
+    click.echo(f"{len(applied)} migration(s) appliquée(s)." if applied else "Schéma à jour.")
+
+
+@schema_cli.command('check')
+def check_command() -> None:
+    """Liste les migrations en attente et les index manquants (code de sortie 1 s'il y en a)."""
+    report = check()
+    for version in report['pending']:
+        click.echo(f"Migration en attente : {version}")
+    for name in report['missing']:
+        click.echo(f"Index ou contrainte manquant : {name}")
+    if report['pending'] or report['missing']:
+        sys.exit(1)
+    click.echo("Schéma à jour.")
@@ -0,0 +1,51 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Tuple, Union
+
+# Texte des requêtes par (nom, forme) : une même forme donne toujours exactement
+# le même texte, que Neo4j retrouve dans son cache de plans
+_templates: Dict[Tuple[str, Hashable], str] = {}
+_calls: Dict[str, int] = defaultdict(int)
+_reuses: Dict[str, int] = defaultdict(int)
+_lock = threading.Lock()
+
+
+def template(name: str, shape: Hashable, build: Union[str, Callable[[], str]]) -> str:
+    """
+    Renvoie le texte de la requête name pour la forme shape (par exemple l'ensemble
+    des filtres présents), construit par build au premier appel puis réutilisé.
+    build peut aussi être directement le texte, pour une requête fixe.
+    Les valeurs (filtres, SKIP, LIMIT...) doivent toutes passer par des paramètres.
+    """
+    key = (name, shape)
+    with _lock:
+        _calls[name] += 1
+        query = _templates.get(key)
+        if query is None:
+            query = _templates[key] = build() if callable(build) else build
+        else:
+            _reuses[name] += 1
+    return query
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Pour chaque requête, côté application : nombre d'appels, d'appels ayant réutilisé
+    un texte déjà construit (text_reuses), de formes distinctes (donc de textes différents
+    envoyés à Neo4j, au plus autant de plans) et taux de réutilisation du texte.
+    Ce ne sont pas les statistiques du cache de plans de Neo4j, qui peut évincer ou
+    recompiler un plan même pour un texte réutilisé.
+    """
+    with _lock:
+        shapes: Dict[str, int] = defaultdict(int)
+        for name, _ in _templates:
+            shapes[name] += 1
+        return {
+            name: {
+                'calls': calls,
+                'text_reuses': _reuses[name],
+                'shapes': shapes[name],
+                'text_reuse_ratio': _reuses[name] / calls
+            }
+            for name, calls in _calls.items()
+        }
@@ -1,16 +1,25 @@
 from flask import Blueprint, request, Response
 import services.artist_service as artist_service
-from utils.function import send_response, send_error, check_date
+import services.bulk_service as bulk_service
+import services.graph_changes as graph_changes
+from utils.bulk import read_rows
+from utils.function import send_response, send_error, check_date, conditional_get, encode_cursor, decode_cursor
+from utils.validators import validate_artist
+
+# Taille maximale d'une page de la pagination par curseur
+MAX_PAGE_SIZE = 100
 
 artist_controller = Blueprint('artists', __name__, url_prefix='/artists')
 
 
 @artist_controller.route('', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artists() -> tuple[Response, int]:
     artists = artist_service.get_artists()
     return send_response(data=artists)
 
 @artist_controller.route('/<int:artist_id>', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artist_by_id(artist_id: int) -> tuple[Response, int]:
     artist = artist_service.get_artist_by_id(artist_id)
     if artist:
@@ -25,10 +34,9 @@ def post_artist() -> tuple[Response, int]:
 
     data = request.get_json()
 
-    required_fields = ['Ar_FirstName', 'Ar_LastName', 'Ar_BirthDay', 'Ar_Nationality', 'Ar_Biography', 'Ar_ImageURL']
-    for field in required_fields:
-        if not data or field not in data:
-            return send_error(status=400, message=f"{field} is required")
+    error = validate_artist(data)
+    if error:
+        return send_error(status=400, message=error)
 
     # Récupération des champs
     Ar_FirstName = data['Ar_FirstName']
@@ -43,13 +51,6 @@ def post_artist() -> tuple[Response, int]:
     Ar_CountryDeath = data.get('Ar_CountryDeath', "")
     Ar_Movement = data.get('Ar_Movement', [])
 
-    # Vérification des dates
-    if not check_date(Ar_BirthDay):
-        return send_error(status=400, message="Ar_BirthDay must be a valid date")
-
-    if Ar_DeathDay and not check_date(Ar_DeathDay):
-        return send_error(status=400, message="Ar_DeathDay must be a valid date")
-
     try:
         new_artist = artist_service.post_artist(
             Ar_FirstName, Ar_LastName, Ar_BirthDay, Ar_Nationality, Ar_Biography,
@@ -65,7 +66,64 @@ def post_artist() -> tuple[Response, int]:
         return send_error(status=500, message="An unexpected error occurred. Please try again later.")
 
 
+@artist_controller.route('/bulk', methods=['POST'])
+def post_artists_bulk() -> tuple[Response, int]:
+    """
+    Import en masse : tableau JSON, NDJSON ou CSV (voir utils.bulk.read_rows).
+    Les lignes invalides sont listées dans 'errors' sans empêcher l'import des autres.
+    """
+    try:
+        report = bulk_service.import_artists(read_rows())
+    except ValueError as e:
+        return send_error(status=400, message=str(e))
+
+    created = report['counts']['created']
+    return send_response(
+        status=201 if created else 200,
+        messages=f"{created} artists created, {report['counts']['errors']} rejected",
+        data=report
+    )
+
+
+@artist_controller.route('/page', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
+def get_artist_page_after() -> tuple[Response, int]:
+    """
+    Pagination par curseur : ?after=<next_cursor de la page précédente>&limit=<n>&recherche=<texte>,
+    et total=true pour ajouter le nombre total de résultats (gardé en cache)
+    """
+    cursor = None
+    after = request.args.get("after")
+    if after:
+        cursor = decode_cursor(after)
+        if cursor is None:
+            return send_error(status=400, message="after must be a next_cursor returned by a previous page")
+
+    limit = request.args.get("limit", "16")
+    if not limit.isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+        return send_error(status=400, message=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    limit = int(limit)
+
+    recherche = request.args.get("recherche", "").strip()
+
+    artists, next_position = artist_service.get_artist_page_after(cursor, limit, recherche)
+    if artists is None:
+        return send_error(status=500, message="Failed to fetch artists. Please try again later.")
+
+    page = {
+        'artists': artists,
+        'limit': limit,
+        'next_cursor': encode_cursor(next_position) if next_position else None,
+        'has_next': next_position is not None
+    }
+    if request.args.get("total") == "true":
+        page['total_count'] = artist_service.get_cached_total_artist_count(recherche)
+
+    return send_response(data=page)
+
+
 @artist_controller.route('/page/<int:page_number>', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artist_by_page(page_number: int) -> tuple[Response, int]:
     if page_number < 1:
         return send_error(status=400, message="page_number is already superior or egal to 1")
@@ -73,13 +131,16 @@ def get_artist_by_page(page_number: int) -> tuple[Response, int]:
     recherche = request.args.get("recherche", "").strip()
 
     info_artists = artist_service.get_artist_pagination_info(page_number, 16, recherche)
+    if info_artists is None:
+        return send_error(status=500, message="Failed to fetch artists. Please try again later.")
 
-    if info_artists and info_artists['artists']:
+    if info_artists['artists']:
         return send_response(data=info_artists)
     else:
         return send_error(status=404, message="Artists not found")
 
 @artist_controller.route('/<int:artist_id>/artworks', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artist_with_artworks(artist_id: int) -> tuple[Response, int]:
     artist_with_artworks = artist_service.get_artist_with_artworks(artist_id)
     if artist_with_artworks:
@@ -103,8 +164,10 @@ def post_create_relation(artist_id: int) -> tuple[Response, int]:
     try:
         relation = artist_service.post_create_relation(artist_id, Art_ArtworkID)
 
-        if relation:
+        if relation and relation['created']:
             return send_response(status=201, messages="Relation created", data=relation)
+        elif relation:
+            return send_response(status=200, messages="Relation already exists", data=relation)
         else:
             return send_error(status=500, message="Failed to create created relation. Please try again later.")
     except Exception as e:
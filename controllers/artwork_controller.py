@@ -1,17 +1,26 @@
 from flask import Blueprint, Response, request
 import services.artwork_service as artwork_service
-from utils.function import send_response, send_error, check_date
+import services.bulk_service as bulk_service
+import services.graph_changes as graph_changes
+from utils.bulk import read_rows
+from utils.function import send_response, send_error, conditional_get, encode_cursor, decode_cursor
+from utils.validators import validate_artwork
+
+# Taille maximale d'une page de la pagination par curseur
+MAX_PAGE_SIZE = 100
 
 artwork_controller = Blueprint('artworks', __name__, url_prefix='/artworks')
 
 
 @artwork_controller.route('', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artwork() -> tuple[Response, int]:
     artwork = artwork_service.get_artwork()
     return send_response(data=artwork)
 
 
 @artwork_controller.route('/<int:artwork_id>', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artwork_by_id(artwork_id: int) -> tuple[Response, int]:
     artwork = artwork_service.get_artwork_by_id(artwork_id)
     if artwork:
@@ -27,23 +36,9 @@ def post_artwork() -> tuple[Response, int]:
 
     data = request.get_json()
 
-    if not data or 'Art_Title' not in data:
-        return send_error(status=400, message="Art_Title is required")
-    
-    if not data or 'Art_Year' not in data:
-        return send_error(status=400, message="Art_Year is required")
-    
-    if not data or 'Art_Description' not in data:
-        return send_error(status=400, message="Art_Description is required")
-    
-    if not data or 'Art_ImageURL' not in data:
-        return send_error(status=400, message="Art_ImageURL is required")
-    
-    if not data or 'Art_Medium' not in data:
-        return send_error(status=400, message="Art_Medium is required")
-    
-    if not data or 'Art_Dimensions' not in data:
-        return send_error(status=400, message="Art_Dimensions is required")
+    error = validate_artwork(data)
+    if error:
+        return send_error(status=400, message=error)
 
     Art_Title: str = data['Art_Title']
     Art_Year: str = data['Art_Year']
@@ -54,9 +49,6 @@ def post_artwork() -> tuple[Response, int]:
 
     Ar_ArtistID: int = data.get('Ar_ArtistID', "")
 
-    if not check_date(Art_Year):
-        return send_error(status=400, message="Art_Year must be a valid date")
-
     try:
         new_artwork = artwork_service.post_artwork(
             Art_Title, Art_Year, Art_Description, Art_ImageURL, Art_Medium,
@@ -66,8 +58,64 @@ def post_artwork() -> tuple[Response, int]:
     except Exception as e:
         return send_error(status=500, message="An unexpected error occurred. Please try again later.")
 
+@artwork_controller.route('/bulk', methods=['POST'])
+def post_artworks_bulk() -> tuple[Response, int]:
+    """
+    Import en masse : tableau JSON, NDJSON ou CSV (voir utils.bulk.read_rows).
+    Les lignes invalides sont listées dans 'errors' sans empêcher l'import des autres.
+    """
+    try:
+        report = bulk_service.import_artworks(read_rows())
+    except ValueError as e:
+        return send_error(status=400, message=str(e))
+
+    created = report['counts']['created']
+    return send_response(
+        status=201 if created else 200,
+        messages=f"{created} artworks created, {report['counts']['errors']} rejected",
+        data=report
+    )
+
+
+@artwork_controller.route('/page', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
+def get_artwork_page_after() -> tuple[Response, int]:
+    """
+    Pagination par curseur : ?after=<next_cursor de la page précédente>&limit=<n>&recherche=<texte>,
+    et total=true pour ajouter le nombre total de résultats (gardé en cache)
+    """
+    cursor = None
+    after = request.args.get("after")
+    if after:
+        cursor = decode_cursor(after)
+        if cursor is None:
+            return send_error(status=400, message="after must be a next_cursor returned by a previous page")
+
+    limit = request.args.get("limit", "16")
+    if not limit.isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+        return send_error(status=400, message=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    limit = int(limit)
+
+    recherche = request.args.get("recherche", "").strip()
+
+    artworks, next_position = artwork_service.get_artwork_page_after(cursor, limit, recherche)
+    if artworks is None:
+        return send_error(status=500, message="Failed to fetch artworks. Please try again later.")
+
+    page = {
+        'artworks': artworks,
+        'limit': limit,
+        'next_cursor': encode_cursor(next_position) if next_position else None,
+        'has_next': next_position is not None
+    }
+    if request.args.get("total") == "true":
+        page['total_count'] = artwork_service.get_cached_total_artwork_count(recherche)
+
+    return send_response(data=page)
+
 
 @artwork_controller.route('/page/<int:page_number>', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artwork_by_page(page_number: int) -> tuple[Response, int]:
     if page_number < 1:
         return send_error(status=400, message="page_number must be >= 1")
@@ -75,8 +123,10 @@ def get_artwork_by_page(page_number: int) -> tuple[Response, int]:
     recherche = request.args.get("recherche", "").strip()
 
     info_artworks = artwork_service.get_artwork_pagination_info(page_number, 16, recherche)
+    if info_artworks is None:
+        return send_error(status=500, message="Failed to fetch artworks. Please try again later.")
 
-    if info_artworks and info_artworks['artworks']:
+    if info_artworks['artworks']:
         return send_response(data=info_artworks)
     else:
         return send_error(status=404, message="Artworks not found")
@@ -85,6 +135,7 @@ def get_artwork_by_page(page_number: int) -> tuple[Response, int]:
 
 
 @artwork_controller.route('/<int:artwork_id>/inspires', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artworks_inspired_by(artwork_id: int) -> tuple[Response, int]:
     artworks = artwork_service.get_artworks_inspired_by(artwork_id)
     if artworks:
@@ -94,6 +145,7 @@ def get_artworks_inspired_by(artwork_id: int) -> tuple[Response, int]:
 
 
 @artwork_controller.route('/<int:artwork_id>/inspired', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artworks_that_inspired(artwork_id: int) -> tuple[Response, int]:
     artworks = artwork_service.get_artworks_that_inspired(artwork_id)
     if artworks:
@@ -103,6 +155,7 @@ def get_artworks_that_inspired(artwork_id: int) -> tuple[Response, int]:
 
 
 @artwork_controller.route('/<int:artwork_id>/inspirations', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artwork_with_inspirations(artwork_id: int) -> tuple[Response, int]:
     artwork_with_inspirations = artwork_service.get_artwork_with_inspirations(artwork_id)
     if artwork_with_inspirations:
@@ -112,6 +165,7 @@ def get_artwork_with_inspirations(artwork_id: int) -> tuple[Response, int]:
 
 
 @artwork_controller.route('/<int:artwork_id>/artist', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_artist_of_artwork(artwork_id: int) -> tuple[Response, int]:
     artist = artwork_service.get_artist_of_artwork(artwork_id)
     if artist:
@@ -135,8 +189,10 @@ def post_inspire_relation(artwork_id: int) -> tuple[Response, int]:
     try:
         relation = artwork_service.post_inspire_relation(artwork_id, Art_InspiredArtworkID)
 
-        if relation:
+        if relation and relation['created']:
             return send_response(status=201, messages="Inspiration relation created", data=relation)
+        elif relation:
+            return send_response(status=200, messages="Inspiration relation already exists", data=relation)
         else:
             return send_error(status=500, message="Failed to create inspiration relation. Please try again later.")
     except Exception as e:
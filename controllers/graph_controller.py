@@ -1,13 +1,111 @@
 from flask import Blueprint, Response, request
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from services import graph_service
-from utils.function import send_response
+from services import graph_service, graph_traversal, graph_layout, graph_overview, graph_analytics, graph_changes
+from utils.function import send_response, send_stream, conditional_get
+from utils.graph_encoding import COLUMNAR_MIMETYPE, to_msgpack
 
 graph_controller = Blueprint('graphs', __name__, url_prefix='/graphs')
 
 
+def send_graph(graph_data, version: int, epoch: str) -> tuple[Response, int]:
+    """
+    Envoie le graphe en JSON, ou encodé en colonnes MessagePack si le client
+    le demande avec Accept: application/x-msgpack.
+
+    Les en-têtes X-Graph-Version et X-Graph-Epoch indiquent la version des données
+    lue avant la requête, à passer ensuite à /graphs/changes.
+    Si la lecture a échoué (graph_data vaut None), renvoie une erreur 500.
+    """
+    if graph_data is None:
+        return send_response(500, "Erreur interne lors de la lecture du graphe.")
+    if request.accept_mimetypes.best_match(['application/json', COLUMNAR_MIMETYPE]) == COLUMNAR_MIMETYPE:
+        response, status = Response(to_msgpack(graph_data), mimetype=COLUMNAR_MIMETYPE), 200
+    else:
+        response, status = send_response(data=graph_data)
+    response.vary.add('Accept')
+    response.headers['X-Graph-Version'] = str(version)
+    response.headers['X-Graph-Epoch'] = epoch
+    return response, status
+
+
+def parse_graph_filters() -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Lit les filtres communs aux endpoints du graphe dans les paramètres de requête:
+    - nationalities: Liste de nationalités séparées par des virgules
+    - mediums: Liste de médiums séparés par des virgules
+    - movements: Liste de mouvements séparés par des virgules
+    - yearMin: Année minimale (entier)
+    - yearMax: Année maximale (entier)
+    - excludeArtists: 'true' pour exclure les artistes
+    - excludeArtworks: 'true' pour exclure les œuvres
+
+    Returns:
+        Les arguments à passer à graph_service, et un message d'erreur si un paramètre est invalide
+    """
+    nationalities_param = request.args.get('nationalities')
+    mediums_param = request.args.get('mediums')
+    movements_param = request.args.get('movements')
+    year_min_param = request.args.get('yearMin')
+    year_max_param = request.args.get('yearMax')
+    exclude_artists_param = request.args.get('excludeArtists')
+    exclude_artworks_param = request.args.get('excludeArtworks')
+
+    nationalities: Optional[List[str]] = None
+    if nationalities_param:
+        nationalities = [nat.strip() for nat in nationalities_param.split(',') if nat.strip()]
+
+    mediums: Optional[List[str]] = None
+    if mediums_param:
+        mediums = [med.strip() for med in mediums_param.split(',') if med.strip()]
+
+    movements: Optional[List[str]] = None
+    if movements_param:
+        movements = [mov.strip() for mov in movements_param.split(',') if mov.strip()]
+
+    year_min: Optional[str] = year_min_param or None
+    year_max: Optional[str] = year_max_param or None
+
+    exclude_artists: bool = exclude_artists_param == 'true'
+    exclude_artworks: bool = exclude_artworks_param == 'true'
+
+    filters = {
+        'nationalities': nationalities,
+        'mediums': mediums,
+        'movements': movements,
+        'year_min': year_min,
+        'year_max': year_max,
+        'exclude_artists': exclude_artists,
+        'exclude_artworks': exclude_artworks
+    }
+
+    if exclude_artists and exclude_artworks:
+        return filters, "Impossible d'exclure à la fois les artistes et les œuvres."
+
+    if year_min is not None and year_max is not None and year_min > year_max:
+        return filters, "L'année minimale ne peut pas être supérieure à l'année maximale."
+
+    return filters, None
+
+
+def parse_positive_int(name: str) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Lit un paramètre de requête entier optionnel, qui doit être supérieur ou égal à 1
+    """
+    param = request.args.get(name)
+    if not param:
+        return None, None
+    try:
+        value = int(param)
+    except ValueError:
+        return None, f"Paramètre {name} invalide. Doit être un entier."
+    if value < 1:
+        return None, f"Paramètre {name} invalide. Doit être supérieur ou égal à 1."
+    return value, None
+
+
 @graph_controller.route('', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_graph() -> tuple[Response, int]:
     """
     Endpoint pour récupérer le graphe avec filtres optionnels
@@ -20,68 +118,58 @@ def get_graph() -> tuple[Response, int]:
     - yearMax: Année maximale (entier)
     - excludeArtists: 'true' pour exclure les artistes
     - excludeArtworks: 'true' pour exclure les œuvres
+    - byCreator: 'true' pour ne garder que les œuvres dont un artiste correspond à
+      nationalities et movements (filtre des vues détaillées de overview)
+    - yearBefore: Année exclue (entier) : seulement les dates antérieures au 1er janvier de
+      cette année (filtre des vues détaillées par décennie de overview)
+    - stream: 'true' pour recevoir le graphe en flux NDJSON (aussi avec Accept: application/x-ndjson)
+    - fetchSize: Taille des lots lus depuis Neo4j en mode flux (entier)
+    - overview: 'movement', 'nationality' ou 'decade' pour une vue d'ensemble regroupée
+      (les autres filtres sont alors ignorés ; chaque groupe indique les filtres pour l'afficher en détail)
+
+    Avec Accept: application/x-msgpack, le graphe est encodé en colonnes (voir utils.graph_encoding)
     """
     try:
-        nationalities_param = request.args.get('nationalities')
-        mediums_param = request.args.get('mediums')
-        movements_param = request.args.get('movements')
-        year_min_param = request.args.get('yearMin')
-        year_max_param = request.args.get('yearMax')
-        exclude_artists_param = request.args.get('excludeArtists')
-        exclude_artworks_param = request.args.get('excludeArtworks')
-
-        nationalities: Optional[List[str]] = None
-        if nationalities_param:
-            nationalities = [nat.strip() for nat in nationalities_param.split(',') if nat.strip()]
-
-        mediums: Optional[List[str]] = None
-        if mediums_param:
-            mediums = [med.strip() for med in mediums_param.split(',') if med.strip()]
-
-        movements: Optional[List[str]] = None
-        if movements_param:
-            movements = [mov.strip() for mov in movements_param.split(',') if mov.strip()]
-
-        year_min: Optional[str] = None
-        if year_min_param:
-            try:
-                year_min = year_min_param
-            except ValueError:
-                return send_response(400,"Paramètre yearMin invalide. Doit être un entier.")
-
-        year_max: Optional[str] = None
-        if year_max_param:
-            try:
-                year_max = year_max_param
-            except ValueError:
-                return send_response(400,"Paramètre yearMax invalide. Doit être un entier.")
-
-        exclude_artists: bool = exclude_artists_param == 'true'
-        exclude_artworks: bool = exclude_artworks_param == 'true'
-
-        if exclude_artists and exclude_artworks:
-            return send_response(400,"Impossible d'exclure à la fois les artistes et les œuvres.")
-
-        if year_min is not None and year_max is not None and year_min > year_max:
-            return send_response(400,"L'année minimale ne peut pas être supérieure à l'année maximale.")
-
-        graph_data = graph_service.get_graph(
-            nationalities=nationalities,
-            mediums=mediums,
-            movements=movements,
-            year_min=year_min,
-            year_max=year_max,
-            exclude_artists=exclude_artists,
-            exclude_artworks=exclude_artworks
+        overview = request.args.get('overview')
+        if overview:
+            if overview not in graph_overview.DIMENSIONS:
+                return send_response(400, "Paramètre overview invalide. Valeurs possibles : movement, nationality, decade.")
+
+            overview_data = graph_overview.get_overview(overview)
+            if overview_data is None:
+                return send_response(500, "Erreur interne lors du calcul de la vue d'ensemble du graphe.")
+            return send_response(data=overview_data)
+
+        filters, error = parse_graph_filters()
+        if error:
+            return send_response(400, error)
+        filters['by_creator'] = request.args.get('byCreator') == 'true'
+        filters['year_before'] = request.args.get('yearBefore') or None
+
+        stream: bool = (
+            request.args.get('stream') == 'true'
+            or request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
         )
 
-        return send_response(data=graph_data)
+        if stream:
+            fetch_size, error = parse_positive_int('fetchSize')
+            if error:
+                return send_response(400, error)
+
+            # Les nœuds puis les relations sont envoyés dès leur lecture depuis Neo4j
+            return send_stream(graph_service.stream_graph(**filters, fetch_size=fetch_size))
+
+        version, epoch = graph_changes.current_position()
+        graph_data = graph_service.get_graph(**filters)
+
+        return send_graph(graph_data, version, epoch)
 
     except Exception as e:
         print(f"Erreur lors de la récupération du graphe filtré: {e}")
         return send_response(500,"Erreur interne lors de la récupération du graphe.")
 
 @graph_controller.route('/subgraph/<int:central_node_id>', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_subgraph(central_node_id: int) -> tuple[Response, int]:
     """
     Endpoint pour récupérer un sous-graphe centré sur un nœud spécifique avec filtres optionnels
@@ -94,71 +182,189 @@ def get_subgraph(central_node_id: int) -> tuple[Response, int]:
     - yearMax: Année maximale (entier)
     - excludeArtists: 'true' pour exclure les artistes
     - excludeArtworks: 'true' pour exclure les œuvres
+    - depth: Profondeur maximale du parcours (entier >= 1, au plus SUBGRAPH_MAX_DEPTH)
+    - maxNodes: Nombre maximal de nœuds parcourus (entier >= 1, au plus SUBGRAPH_MAX_NODES)
+    - direction: 'out', 'in' ou 'both' (par défaut)
+
+    Avec Accept: application/x-msgpack, le graphe est encodé en colonnes (voir utils.graph_encoding)
     """
     try:
         # Récupération des paramètres de requête (même logique que get_graph)
-        nationalities_param = request.args.get('nationalities')
-        mediums_param = request.args.get('mediums')
-        movements_param = request.args.get('movements')
-        year_min_param = request.args.get('yearMin')
-        year_max_param = request.args.get('yearMax')
-        exclude_artists_param = request.args.get('excludeArtists')
-        exclude_artworks_param = request.args.get('excludeArtworks')
-
-        nationalities: Optional[List[str]] = None
-        if nationalities_param:
-            nationalities = [nat.strip() for nat in nationalities_param.split(',') if nat.strip()]
-
-        mediums: Optional[List[str]] = None
-        if mediums_param:
-            mediums = [med.strip() for med in mediums_param.split(',') if med.strip()]
-
-        movements: Optional[List[str]] = None
-        if movements_param:
-            movements = [mov.strip() for mov in movements_param.split(',') if mov.strip()]
-
-        year_min: Optional[str] = None
-        if year_min_param:
-            try:
-                year_min = year_min_param
-            except ValueError:
-                return send_response(400, "Paramètre yearMin invalide. Doit être un entier.")
-
-        year_max: Optional[str] = None
-        if year_max_param:
-            try:
-                year_max = year_max_param
-            except ValueError:
-                return send_response(400, "Paramètre yearMax invalide. Doit être un entier.")
-
-        exclude_artists: bool = exclude_artists_param == 'true'
-        exclude_artworks: bool = exclude_artworks_param == 'true'
-
-        if exclude_artists and exclude_artworks:
-            return send_response(400, "Impossible d'exclure à la fois les artistes et les œuvres.")
-
-        if year_min is not None and year_max is not None and year_min > year_max:
-            return send_response(400, "L'année minimale ne peut pas être supérieure à l'année maximale.")
+        filters, error = parse_graph_filters()
+        if error:
+            return send_response(400, error)
+
+        depth, error = parse_positive_int('depth')
+        if error:
+            return send_response(400, error)
+
+        max_nodes, error = parse_positive_int('maxNodes')
+        if error:
+            return send_response(400, error)
+
+        direction = request.args.get('direction', 'both')
+        if direction not in graph_traversal.DIRECTIONS:
+            return send_response(400, "Paramètre direction invalide. Valeurs possibles : out, in, both.")
+
+        version, epoch = graph_changes.current_position()
 
         # Appel au service avec le nouvel ID de nœud central
         subgraph_data = graph_service.get_subgraph(
             central_node_id=central_node_id,
-            nationalities=nationalities,
-            mediums=mediums,
-            movements=movements,
-            year_min=year_min,
-            year_max=year_max,
-            exclude_artists=exclude_artists,
-            exclude_artworks=exclude_artworks
+            **filters,
+            depth=depth,
+            max_nodes=max_nodes,
+            direction=direction
         )
 
-        return send_response(data=subgraph_data)
+        return send_graph(subgraph_data, version, epoch)
 
     except Exception as e:
         print(f"Erreur lors de la récupération du sous-graphe filtré: {e}")
         return send_response(500, "Erreur interne lors de la récupération du sous-graphe.")
 
+@graph_controller.route('/changes', methods=['GET'])
+def get_changes() -> tuple[Response, int]:
+    """
+    Endpoint pour récupérer les modifications du graphe depuis une version
+
+    Paramètres de requête supportés:
+    - since: Version déjà connue du client (en-tête X-Graph-Version de /graphs, ou 'version' du dernier appel)
+    - epoch: Epoch reçu avec cette version (X-Graph-Epoch ou 'epoch'), sans lequel 'reset' vaut true
+
+    Si 'reset' vaut true, les modifications ne sont pas disponibles (par exemple après une
+    écriture faite par un autre worker) et le graphe est à recharger
+    """
+    try:
+        try:
+            since = int(request.args['since'])
+        except (KeyError, ValueError):
+            return send_response(400, "Paramètre since obligatoire. Doit être un entier.")
+
+        if since < 0:
+            return send_response(400, "Paramètre since invalide. Doit être supérieur ou égal à 0.")
+
+        changes = graph_changes.get_changes(since, request.args.get('epoch'))
+        return send_response(data=changes)
+
+    except Exception as e:
+        print(f"Erreur lors de la récupération des modifications du graphe: {e}")
+        return send_response(500, "Erreur interne lors de la récupération des modifications du graphe.")
+
+@graph_controller.route('/path', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
+def get_path() -> tuple[Response, int]:
+    """
+    Endpoint pour récupérer les plus courts chemins entre deux nœuds, par les relations INSPIRE et CREATED
+
+    Paramètres de requête supportés:
+    - from: ID du nœud de départ (obligatoire)
+    - to: ID du nœud d'arrivée (obligatoire)
+    - maxDepth: Longueur maximale d'un chemin (entier >= 1, au plus PATH_MAX_DEPTH)
+    - limit: Nombre maximal de chemins renvoyés (entier >= 1, au plus PATH_MAX_RESULTS)
+    - direction: 'out' (relations suivies dans leur sens), 'in' ou 'both' (par défaut)
+    - les mêmes filtres que /graphs, appliqués aux nœuds intermédiaires
+
+    Renvoie les nœuds et relations des chemins, et 'paths' : les identifiants de chaque chemin
+    """
+    try:
+        try:
+            source_id = int(request.args['from'])
+            target_id = int(request.args['to'])
+        except (KeyError, ValueError):
+            return send_response(400, "Paramètres from et to obligatoires. Doivent être des entiers.")
+
+        if source_id == target_id:
+            return send_response(400, "Les nœuds de départ et d'arrivée doivent être différents.")
+
+        filters, error = parse_graph_filters()
+        if error:
+            return send_response(400, error)
+
+        max_depth, error = parse_positive_int('maxDepth')
+        if error:
+            return send_response(400, error)
+
+        limit, error = parse_positive_int('limit')
+        if error:
+            return send_response(400, error)
+
+        direction = request.args.get('direction', 'both')
+        if direction not in graph_traversal.DIRECTIONS:
+            return send_response(400, "Paramètre direction invalide. Valeurs possibles : out, in, both.")
+
+        path_data = graph_service.get_path(
+            source_id,
+            target_id,
+            **filters,
+            max_depth=max_depth,
+            limit=limit,
+            direction=direction
+        )
+        if path_data is None:
+            return send_response(500, "Erreur interne lors de la recherche de chemins.")
+        if not path_data:
+            return send_response(404, "Nœud de départ ou d'arrivée introuvable.")
+
+        return send_response(data=path_data)
+
+    except Exception as e:
+        print(f"Erreur lors de la recherche de chemins: {e}")
+        return send_response(500, "Erreur interne lors de la recherche de chemins.")
+
+@graph_controller.route('/layout', methods=['GET'])
+def get_layout() -> tuple[Response, int]:
+    """
+    Endpoint pour récupérer les positions des nœuds du graphe, calculées côté serveur
+
+    Paramètres de requête supportés: les mêmes filtres que /graphs
+
+    Le premier calcul pour une combinaison de filtres se fait en arrière-plan :
+    la réponse est 202 (avec Retry-After) jusqu'à ce qu'il soit fini
+    """
+    try:
+        filters, error = parse_graph_filters()
+        if error:
+            return send_response(400, error)
+
+        layout = graph_layout.get_layout(**filters)
+        if layout is None:
+            response, status = send_response(202, "Disposition du graphe en cours de calcul. Réessayer plus tard.")
+            response.headers['Retry-After'] = '1'
+            return response, status
+        return send_response(data=layout)
+
+    except Exception as e:
+        print(f"Erreur lors du calcul de la disposition du graphe: {e}")
+        return send_response(500, "Erreur interne lors du calcul de la disposition du graphe.")
+
+@graph_controller.route('/analytics/<metric>', methods=['GET'])
+def get_analytics(metric: str) -> tuple[Response, int]:
+    """
+    Endpoint pour récupérer une métrique calculée sur tout le graphe
+
+    - metric: 'pagerank', 'degree' ou 'components'
+
+    Paramètres de requête supportés:
+    - limit: Nombre de nœuds (ou de composantes) renvoyés, par ordre décroissant (entier, 100 par défaut)
+    """
+    try:
+        if metric not in graph_analytics.METRICS:
+            return send_response(404, "Métrique inconnue. Valeurs possibles : pagerank, degree, components.")
+
+        limit, error = parse_positive_int('limit')
+        if error:
+            return send_response(400, error)
+
+        analytics = graph_analytics.get_metric(metric, limit or 100)
+        return send_response(data=analytics)
+
+    except Exception as e:
+        print(f"Erreur lors du calcul des métriques du graphe: {e}")
+        return send_response(500, "Erreur interne lors du calcul des métriques du graphe.")
+
 @graph_controller.route('/filter-options', methods=['GET'])
+@conditional_get(graph_changes.etag_version)
 def get_filter_options() -> tuple[Response, int]:
     """
     Endpoint pour récupérer toutes les options disponibles pour les filtres
@@ -0,0 +1,33 @@
+from flask import Blueprint, Response
+
+from config import query_templates
+from services import graph_snapshot
+from utils.entity_cache import entity_cache
+from utils.function import send_response
+
+metrics_controller = Blueprint('metrics', __name__, url_prefix='/metrics')
+
+
+@metrics_controller.route('/graph-snapshot', methods=['GET'])
+def get_graph_snapshot_metrics() -> tuple[Response, int]:
+    """
+    Endpoint pour suivre le snapshot du graphe : temps de chargement, mémoire par nœud, latences p50/p99
+    """
+    return send_response(data=graph_snapshot.get_stats())
+
+
+@metrics_controller.route('/query-templates', methods=['GET'])
+def get_query_template_metrics() -> tuple[Response, int]:
+    """
+    Endpoint pour suivre la mémoïsation du texte des requêtes : appels, réutilisations du texte
+    et formes distinctes par requête (pas le cache de plans de Neo4j)
+    """
+    return send_response(data=query_templates.get_stats())
+
+
+@metrics_controller.route('/entity-cache', methods=['GET'])
+def get_entity_cache_metrics() -> tuple[Response, int]:
+    """
+    Endpoint pour suivre le cache des lectures par identifiant : taux de succès par type, évictions, expirations
+    """
+    return send_response(data=entity_cache.get_stats())
@@ -0,0 +1,26 @@
+from flask import Blueprint, Response
+import services.bulk_service as bulk_service
+from utils.bulk import read_rows
+from utils.function import send_response, send_error
+
+relation_controller = Blueprint('relations', __name__, url_prefix='/relations')
+
+
+@relation_controller.route('/bulk', methods=['POST'])
+def post_relations_bulk() -> tuple[Response, int]:
+    """
+    Import en masse de relations {type, source, target} : tableau JSON, NDJSON ou CSV.
+    CREATED va d'un Ar_ArtistID vers un Art_ArtworkID, INSPIRE d'un Art_ArtworkID vers un autre.
+    Les relations déjà présentes sont listées dans 'existing' ; 201 seulement si au moins une a été créée.
+    """
+    try:
+        report = bulk_service.import_relations(read_rows())
+    except ValueError as e:
+        return send_error(status=400, message=str(e))
+
+    created = report['counts']['created']
+    return send_response(
+        status=201 if created else 200,
+        messages=f"{created} relations created, {report['counts']['existing']} already existed, {report['counts']['errors']} rejected",
+        data=report
+    )
@@ -0,0 +1,60 @@
+"""
+Benchmark des métriques de services.graph_analytics (degrés, PageRank, composantes)
+sur des graphes aléatoires, sans base de données.
+
+Pour chaque taille, le graphe a --edges relations tirées au hasard entre
+edges / --ratio nœuds ; on donne la médiane de --repeat mesures par métrique.
+Depuis la racine du dépôt :
+    python -m scripts.bench_graph_analytics --edges 10000 100000 1000000
+"""
+import argparse
+import statistics
+import sys
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+from services.graph_analytics import connected_components, pagerank
+
+
+def _median_ms(run: Callable[[], object], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def measure(edge_count: int, node_count: int, repeat: int, seed: int = 0) -> Dict[str, float]:
+    rng = np.random.default_rng(seed)
+    sources = rng.integers(0, node_count, edge_count)
+    targets = rng.integers(0, node_count, edge_count)
+    return {
+        'degree': _median_ms(lambda: (np.bincount(targets, minlength=node_count), np.bincount(sources, minlength=node_count)), repeat),
+        'pagerank': _median_ms(lambda: pagerank(sources, targets, node_count), repeat),
+        'components': _median_ms(lambda: connected_components(sources, targets, node_count), repeat)
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--edges', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--ratio', type=int, default=4, help="nombre de relations par nœud")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'relations':>10} {'nœuds':>10} {'degree (ms)':>12} {'pagerank (ms)':>14} {'components (ms)':>16}")
+    for edge_count in args.edges:
+        node_count = max(1, edge_count // args.ratio)
+        timings = measure(edge_count, node_count, args.repeat)
+        print(
+            f"{edge_count:>10} {node_count:>10} {timings['degree']:>12.1f}"
+            f" {timings['pagerank']:>14.1f} {timings['components']:>16.1f}"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
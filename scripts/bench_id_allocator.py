@@ -0,0 +1,169 @@
+"""
+Débit des créations dans la base configurée (NEO4J_URL), selon le nombre de workers :
+identifiants réservés par blocs (config.id_allocator) contre un incrément du compteur
+:Counter dans chaque création (ancien chemin de post_artist et post_artwork).
+
+Chaque worker est un processus, avec son driver et son allocateur, comme un worker du
+serveur ; ses --threads threads créent chacun --creates nœuds :BenchIdAllocator par
+execute_data_write, comme les vraies créations (incrément de :DataVersion compris).
+Pour chaque nombre de workers et chaque mode, on donne les créations par seconde, et
+le script échoue si un identifiant est donné deux fois. Les nœuds et les compteurs de
+test sont supprimés à la fin ; à lancer sur une base de test : la version des données
+avance comme après de vraies écritures. Depuis la racine du dépôt :
+    python -m scripts.bench_id_allocator --workers 1 2 4 8 --threads 8 --creates 200
+"""
+import argparse
+import multiprocessing
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+from config import id_allocator
+from config.db_connection import execute_data_write, execute_write
+from config.id_allocator import IdAllocator
+
+MODES = ('counter', 'block')
+LABEL = 'BenchIdAllocator'
+
+# Ancien chemin : le compteur est incrémenté dans la transaction de chaque création
+COUNTER_CREATE_QUERY = f"""
+MERGE (c:Counter {{name: $name}})
+ON CREATE SET c.count = 0
+SET c.count = c.count + 1
+WITH c.count AS new_id
+CREATE (n:{LABEL} {{id: new_id}})
+RETURN new_id
+"""
+
+BLOCK_CREATE_QUERY = f"""
+CREATE (n:{LABEL} {{id: $new_id}})
+RETURN $new_id AS new_id
+"""
+
+DELETE_NODES_QUERY = f"""
+MATCH (n:{LABEL})
+WITH n LIMIT 10000
+DELETE n
+RETURN count(*) AS deleted
+"""
+
+DELETE_COUNTER_QUERY = "MATCH (c:Counter {name: $name}) DELETE c"
+
+
+def _counter_name(mode: str) -> str:
+    return f"bench_id_allocator:{mode}"
+
+
+def _create(mode: str, allocator, count: int, ids: List[int], failures: List[str]) -> None:
+    for _ in range(count):
+        if mode == 'counter':
+            results = execute_data_write(COUNTER_CREATE_QUERY, {'name': _counter_name(mode)})
+        else:
+            new_id = allocator.next_id()
+            if new_id is None:
+                failures.append("réservation d'un bloc impossible")
+                return
+            results = execute_data_write(BLOCK_CREATE_QUERY, {'new_id': new_id})
+        if not results:
+            failures.append("création impossible")
+            return
+        ids.append(results[0]['new_id'])
+
+
+def _worker(mode: str, threads: int, creates: int, block_size: int, ready, start, results) -> None:
+    allocator = IdAllocator(_counter_name(mode), block_size)
+    ids: List[int] = []
+    failures: List[str] = []
+    workers = [
+        threading.Thread(target=_create, args=(mode, allocator, creates, ids, failures))
+        for _ in range(threads)
+    ]
+    ready.release()
+    start.wait()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    results.put((ids, failures))
+
+
+def measure(mode: str, workers: int, threads: int, creates: int, block_size: int) -> Optional[float]:
+    """
+    Créations par seconde pour workers processus de threads threads, ou None en cas
+    d'échec (création impossible ou identifiant en double)
+    """
+    context = multiprocessing.get_context('spawn')
+    ready = context.Semaphore(0)
+    start = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(mode, threads, creates, block_size, ready, start, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Les processus ouvrent leur connexion avant la mesure
+    for _ in processes:
+        ready.acquire()
+
+    begin = time.perf_counter()
+    start.set()
+    taken: List[int] = []
+    failures: List[str] = []
+    for _ in processes:
+        ids, worker_failures = results.get()
+        taken.extend(ids)
+        failures.extend(worker_failures)
+    seconds = time.perf_counter() - begin
+    for process in processes:
+        process.join()
+
+    if failures:
+        print(f"Échec ({mode}, {workers} workers) : {failures[0]}")
+        return None
+    duplicates = [new_id for new_id, count in Counter(taken).items() if count > 1]
+    if duplicates:
+        print(f"Échec ({mode}, {workers} workers) : {len(duplicates)} identifiants en double, par exemple {sorted(duplicates)[:10]}")
+        return None
+    return len(taken) / seconds
+
+
+def _cleanup() -> None:
+    while True:
+        results = execute_write(DELETE_NODES_QUERY)
+        if not results or not results[0]['deleted']:
+            break
+    for mode in MODES:
+        execute_write(DELETE_COUNTER_QUERY, {'name': _counter_name(mode)})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help="nombres de workers (processus) mesurés")
+    parser.add_argument('--threads', type=int, default=8, help="threads par worker")
+    parser.add_argument('--creates', type=int, default=200, help="créations par thread")
+    parser.add_argument('--block-size', type=int, default=id_allocator.ID_BLOCK_SIZE)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'workers':>8} {'counter (créations/s)':>22} {'block (créations/s)':>20} {'rapport':>8}")
+    try:
+        for workers in args.workers:
+            rates = {}
+            for mode in MODES:
+                rates[mode] = measure(mode, workers, args.threads, args.creates, args.block_size)
+                failed = failed or rates[mode] is None
+                _cleanup()
+            if None in rates.values():
+                continue
+            print(f"{workers:>8} {rates['counter']:>22.0f} {rates['block']:>20.0f} {rates['block'] / rates['counter']:>7.1f}x")
+    finally:
+        _cleanup()
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Benchmark de la collecte des relations de get_subgraph : jointure cartésienne
+(ancienne requête) contre passe sur les relations sortantes (requête actuelle).
+
+Crée un graphe synthétique de nœuds :BenchSubgraph (degré sortant constant),
+mesure pour chaque taille les accès base (PROFILE) et la durée des deux variantes,
+puis supprime le graphe. Les accès de l'ancienne requête croissent en n², ceux de
+la nouvelle en n ; le script échoue si l'exposant mesuré de la nouvelle dépasse 1,5.
+
+À lancer depuis la racine du dépôt, sur une base de test (NEO4J_URL, NEO4J_DATABASE) :
+    python -m scripts.bench_subgraph_relations --sizes 250 500 1000 2000 --degree 4
+"""
+import argparse
+import math
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from config.db_connection import DATABASE, driver
+from services.graph_service import _keep_internal_relations
+
+LABEL = 'BenchSubgraph'
+
+CREATE_NODES_QUERY = f"UNWIND range(0, $n - 1) AS i CREATE (:{LABEL} {{i: i}})"
+
+# Chaque nœud pointe vers degree autres nœuds répartis sur tout le graphe
+CREATE_EDGES_QUERY = f"""
+MATCH (node:{LABEL})
+WITH node ORDER BY node.i
+WITH collect(node) AS nodes
+UNWIND range(0, size(nodes) - 1) AS i
+UNWIND range(1, $degree) AS k
+WITH nodes[i] AS source, nodes[(i + k * 7919) % size(nodes)] AS target
+WHERE source <> target
+CREATE (source)-[:BENCH]->(target)
+"""
+
+DELETE_QUERY = f"MATCH (node:{LABEL}) DETACH DELETE node"
+
+IDS_QUERY = f"MATCH (node:{LABEL}) RETURN collect(id(node)) AS ids"
+
+SELECTED = """
+UNWIND $ids AS nodeId
+MATCH (node)
+WHERE id(node) = nodeId
+WITH collect(node) AS selectedNodes
+"""
+
+# Ancienne requête : une recherche de relation pour chaque paire (source, cible) de nœuds sélectionnés
+CARTESIAN_QUERY = SELECTED + """
+CALL {
+  WITH selectedNodes
+  UNWIND selectedNodes AS source
+  UNWIND selectedNodes AS target
+  MATCH (source)-[r]->(target)
+  RETURN collect(DISTINCT {source: id(source), target: id(target)}) AS relations
+}
+RETURN relations
+"""
+
+# Relations du sous-graphe dans graph_service.get_subgraph
+INCIDENT_QUERY = SELECTED + """
+CALL {
+  WITH selectedNodes
+  UNWIND selectedNodes AS source
+  WITH DISTINCT source
+  MATCH (source)-[r]->(target)
+  RETURN collect(DISTINCT {source: id(source), target: id(target)}) AS relations
+}
+RETURN relations, [node IN selectedNodes | id(node)] AS selectedIds
+"""
+
+
+def _db_hits(plan: Dict[str, Any]) -> int:
+    return plan.get('dbHits', 0) + sum(_db_hits(child) for child in plan.get('children', []))
+
+
+def _profile(session, query: str, parameters: dict) -> Tuple[int, float, List[dict]]:
+    start = time.perf_counter()
+    result = session.run("PROFILE " + query, parameters)
+    records = [record.data() for record in result]
+    summary = result.consume()
+    return _db_hits(summary.profile), time.perf_counter() - start, records
+
+
+def _measure(session, n: int, degree: int) -> Dict[str, Any]:
+    session.run(DELETE_QUERY).consume()
+    session.run(CREATE_NODES_QUERY, {'n': n}).consume()
+    session.run(CREATE_EDGES_QUERY, {'degree': degree}).consume()
+    ids = session.run(IDS_QUERY).single()['ids']
+
+    old_hits, old_seconds, old_records = _profile(session, CARTESIAN_QUERY, {'ids': ids})
+    new_hits, new_seconds, new_records = _profile(session, INCIDENT_QUERY, {'ids': ids})
+    start = time.perf_counter()
+    record = new_records[0]
+    _keep_internal_relations(record, record.pop('selectedIds'))
+    new_seconds += time.perf_counter() - start
+
+    # Les deux variantes doivent renvoyer les mêmes relations
+    old_relations = {(r['source'], r['target']) for r in old_records[0]['relations']}
+    new_relations = {(r['source'], r['target']) for r in record['relations']}
+    if old_relations != new_relations:
+        raise AssertionError(f"Relations différentes pour n={n} : {len(old_relations)} contre {len(new_relations)}")
+
+    return {
+        'n': n,
+        'relations': len(new_relations),
+        'old_hits': old_hits,
+        'new_hits': new_hits,
+        'old_ms': old_seconds * 1000,
+        'new_ms': new_seconds * 1000
+    }
+
+
+def _exponent(rows: List[Dict[str, Any]], key: str) -> float:
+    """
+    Pente de log(accès) en fonction de log(n) entre la plus petite et la plus grande taille
+    """
+    first, last = rows[0], rows[-1]
+    return math.log(last[key] / first[key]) / math.log(last['n'] / first['n'])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[250, 500, 1000, 2000])
+    parser.add_argument('--degree', type=int, default=4)
+    args = parser.parse_args()
+    sizes = sorted(args.sizes)
+
+    rows = []
+    with driver.session(database=DATABASE) as session:
+        try:
+            for n in sizes:
+                rows.append(_measure(session, n, args.degree))
+        finally:
+            session.run(DELETE_QUERY).consume()
+
+    print(f"{'n':>8} {'relations':>10} {'accès avant':>14} {'accès après':>14} {'ms avant':>10} {'ms après':>10}")
+    for row in rows:
+        print(
+            f"{row['n']:>8} {row['relations']:>10} {row['old_hits']:>14} {row['new_hits']:>14}"
+            f" {row['old_ms']:>10.1f} {row['new_ms']:>10.1f}"
+        )
+
+    if len(rows) < 2:
+        return 0
+    old_exponent = _exponent(rows, 'old_hits')
+    new_exponent = _exponent(rows, 'new_hits')
+    print(f"Croissance des accès : n^{old_exponent:.2f} avant, n^{new_exponent:.2f} après")
+    if new_exponent > 1.5:
+        print("Régression : la collecte des relations n'est plus linéaire")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Vérification des invalidations du cache des entités entre processus.
+
+Plusieurs caches EntityCache (un par « worker », backend memory) lisent les mêmes
+données ; des threads les modifient dans un worker puis invalident la clé, pendant
+que d'autres threads lisent dans tous les workers. Les invalidations passent par un
+bus : par défaut un bus simulé en mémoire, qui livre les messages avec un délai et
+peut être coupé ; avec --redis URL, un canal pub/sub Redis (RedisInvalidationBus).
+
+Le script échoue si, une fois les écritures finies et les messages livrés, un worker
+sert encore une valeur périmée, ou si un worker coupé du bus sert une valeur en cache.
+Depuis la racine du dépôt :
+    python -m scripts.check_entity_cache --workers 4 --keys 50 --writes 2000
+    python -m scripts.check_entity_cache --redis redis://localhost:6379/0
+"""
+import argparse
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from utils.entity_cache import EntityCache, MemoryBackend, RedisInvalidationBus
+
+KIND = 'check'
+
+
+class _LocalHub:
+    """
+    Canal partagé par les bus simulés : chaque message est remis aux autres abonnés
+    par une file, avec un délai aléatoire (comme un message Redis en transit)
+    """
+
+    def __init__(self, max_delay: float):
+        self.max_delay = max_delay
+        self.buses: List['_LocalBus'] = []
+
+    def publish(self, sender: '_LocalBus', keys: list) -> None:
+        for bus in self.buses:
+            if bus is not sender and bus.connected:
+                bus.inbox.put((time.monotonic() + random.uniform(0, self.max_delay), keys))
+
+
+class _LocalBus:
+    """
+    Bus simulé, avec la même interface que RedisInvalidationBus. disconnect perd les
+    messages jusqu'à reconnect, qui rappelle on_connect comme un réabonnement.
+    """
+
+    def __init__(self, hub: _LocalHub):
+        self.hub = hub
+        self.inbox: "queue.Queue[tuple]" = queue.Queue()
+        self.connected = False
+        self._on_connect: Optional[Callable[[], None]] = None
+        hub.buses.append(self)
+
+    def start(self, on_keys: Callable[[list], None], on_connect: Callable[[], None]) -> None:
+        self._on_connect = on_connect
+        threading.Thread(target=self._deliver, args=(on_keys,), daemon=True).start()
+        self.reconnect()
+
+    def publish(self, keys: list) -> None:
+        self.hub.publish(self, keys)
+
+    def disconnect(self) -> None:
+        self.connected = False
+
+    def reconnect(self) -> None:
+        self._on_connect()
+        self.connected = True
+
+    def _deliver(self, on_keys: Callable[[list], None]) -> None:
+        while True:
+            due, keys = self.inbox.get()
+            time.sleep(max(0.0, due - time.monotonic()))
+            on_keys(keys)
+            self.inbox.task_done()
+
+    def drain(self) -> None:
+        self.inbox.join()
+
+
+class _Database:
+    """
+    Données partagées par les workers : une version par clé, incrémentée à chaque écriture
+    """
+
+    def __init__(self, keys: int):
+        self.values: Dict[int, int] = {key: 0 for key in range(keys)}
+        self._lock = threading.Lock()
+
+    def write(self, key: int) -> None:
+        with self._lock:
+            self.values[key] += 1
+
+    def read(self, key: int) -> dict:
+        # Laisse les autres threads écrire entre la lecture et la mise en cache
+        value = self.values[key]
+        time.sleep(0)
+        return {'key': key, 'version': value}
+
+
+def _writer(database: _Database, caches: List[EntityCache], keys: int, writes: int) -> None:
+    for _ in range(writes):
+        key = random.randrange(keys)
+        database.write(key)
+        random.choice(caches).invalidate((KIND, key))
+
+
+def _reader(database: _Database, cache: EntityCache, keys: int, stop: threading.Event) -> None:
+    while not stop.is_set():
+        key = random.randrange(keys)
+        cache.get_or_load(KIND, key, lambda: database.read(key))
+
+
+def _stale_keys(database: _Database, cache: EntityCache, keys: int) -> List[int]:
+    return [
+        key for key in range(keys)
+        if cache.get_or_load(KIND, key, lambda: database.read(key))['version'] != database.values[key]
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help="caches (processus simulés)")
+    parser.add_argument('--keys', type=int, default=50, help="nombre d'entités")
+    parser.add_argument('--writers', type=int, default=4, help="threads qui écrivent")
+    parser.add_argument('--readers', type=int, default=4, help="threads qui lisent, par worker")
+    parser.add_argument('--writes', type=int, default=2000, help="écritures par thread")
+    parser.add_argument('--max-delay', type=float, default=0.005, help="délai maximal (secondes) d'un message du bus simulé")
+    parser.add_argument('--redis', metavar='URL', help="utilise un canal pub/sub Redis au lieu du bus simulé")
+    args = parser.parse_args()
+
+    sys.setswitchinterval(1e-6)
+
+    hub = _LocalHub(args.max_delay)
+    if args.redis:
+        buses = [RedisInvalidationBus(args.redis, f"check_entity_cache:{time.time_ns()}") for _ in range(args.workers)]
+    else:
+        buses = [_LocalBus(hub) for _ in range(args.workers)]
+    caches = [EntityCache(MemoryBackend(max_size=args.keys * 2, ttl=3600), bus) for bus in buses]
+    database = _Database(args.keys)
+
+    deadline = time.monotonic() + 10
+    while not all(bus.connected for bus in buses):
+        if time.monotonic() > deadline:
+            print("Échec : abonnement au bus impossible")
+            return 1
+        time.sleep(0.05)
+
+    stop = threading.Event()
+    readers = [
+        threading.Thread(target=_reader, args=(database, cache, args.keys, stop), daemon=True)
+        for cache in caches
+        for _ in range(args.readers)
+    ]
+    writers = [
+        threading.Thread(target=_writer, args=(database, caches, args.keys, args.writes))
+        for _ in range(args.writers)
+    ]
+
+    start = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    # Attend la livraison des derniers messages
+    if args.redis:
+        time.sleep(1)
+    else:
+        for bus in buses:
+            bus.drain()
+
+    failed = False
+    for index, cache in enumerate(caches):
+        stale = _stale_keys(database, cache, args.keys)
+        stats = cache.get_stats()
+        print(
+            f"worker {index} : {stats['hits']} succès, {stats['misses']} absences, "
+            f"{stats['invalidations']} invalidations locales, {stats['remote_invalidations']} reçues"
+        )
+        if stale:
+            print(f"Échec : le worker {index} sert {len(stale)} valeurs périmées, par exemple {stale[:10]}")
+            failed = True
+    print(f"{args.writers * args.writes} écritures en {seconds * 1000:.0f} ms")
+
+    if not args.redis:
+        # Coupure : les messages sont perdus, le worker coupé ne doit pas servir son cache
+        bus = buses[-1]
+        bus.disconnect()
+        for key in range(args.keys):
+            database.write(key)
+            caches[0].invalidate((KIND, key))
+        stale = _stale_keys(database, caches[-1], args.keys)
+        bus.reconnect()
+        stale += _stale_keys(database, caches[-1], args.keys)
+        if stale:
+            print(f"Échec : après une coupure du bus, {len(stale)} valeurs périmées servies")
+            failed = True
+        else:
+            print(f"Coupure du bus : {caches[-1].get_stats()['bypasses']} lectures sans cache, aucune valeur périmée")
+
+    if failed:
+        return 1
+    print("Aucune valeur périmée")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Vérification et benchmark de l'encodage en colonnes des graphes (utils.graph_encoding).
+
+Encode un graphe en MessagePack, le décode et vérifie que l'on retrouve exactement
+les nœuds (identifiant, type, propriétés) et les relations de la réponse JSON ;
+compare ensuite la taille (brute et gzip) et la durée d'encodage des deux formats.
+Le script échoue si le décodage ne redonne pas le graphe d'origine.
+
+Par défaut le graphe est synthétique (aucune base nécessaire) ; avec --live il est
+lu par graph_service.get_graph depuis la base configurée (NEO4J_URL).
+Depuis la racine du dépôt :
+    python -m scripts.check_graph_encoding --artists 5000 --artworks 20000
+    python -m scripts.check_graph_encoding --live
+"""
+import argparse
+import gzip
+import json
+import random
+import statistics
+import sys
+import time
+from array import array
+from typing import Any, Callable, Dict, List
+
+import msgpack
+
+from utils.graph_encoding import DICTIONARY_COLUMNS, to_msgpack
+
+NATIONALITIES = ['French', 'Italian', 'Spanish', 'Dutch', 'German', 'American', 'Japanese', 'Belgian']
+MOVEMENTS = ['Impressionism', 'Cubism', 'Surrealism', 'Baroque', 'Renaissance', 'Fauvism', 'Expressionism']
+MEDIUMS = ['Oil on canvas', 'Watercolor', 'Fresco', 'Bronze', 'Marble', 'Tempera on panel']
+
+
+def synthetic_graph(artist_count: int, artwork_count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Graphe de la forme de get_graph : chaque œuvre a un créateur et inspire parfois une autre œuvre
+    """
+    rng = random.Random(seed)
+    artists = [
+        {
+            'id': i,
+            'type': 'Artist',
+            'data': {
+                'Ar_ArtistID': i + 1,
+                'Ar_FirstName': f"Prénom {i}",
+                'Ar_LastName': f"Nom {i}",
+                'Ar_BirthDay': f"{rng.randint(1400, 1990)}-01-01",
+                'Ar_Nationality': rng.choice(NATIONALITIES),
+                'Ar_Movement': rng.sample(MOVEMENTS, rng.randint(0, 2)),
+                'Ar_Biography': "Biographie " * 5,
+                'Ar_ImageURL': f"https://images.example/artists/{i}.jpg"
+            }
+        }
+        for i in range(artist_count)
+    ]
+    artworks = [
+        {
+            'id': artist_count + i,
+            'type': 'Artwork',
+            'data': {
+                'Art_ArtworkID': i + 1,
+                'Art_Title': f"Œuvre {i}",
+                'Art_Year': f"{rng.randint(1400, 2020)}-01-01",
+                'Art_Medium': rng.choice(MEDIUMS),
+                'Art_Dimensions': f"{rng.randint(10, 300)} x {rng.randint(10, 300)} cm",
+                'Art_Description': "Description " * 5,
+                'Art_ImageURL': f"https://images.example/artworks/{i}.jpg"
+            }
+        }
+        for i in range(artwork_count)
+    ]
+    relations = []
+    for artwork in artworks:
+        if artists:
+            relations.append({'source': rng.randrange(artist_count), 'target': artwork['id']})
+        if artwork_count > 1 and rng.random() < 0.3:
+            other = artist_count + rng.randrange(artwork_count)
+            if other != artwork['id']:
+                relations.append({'source': artwork['id'], 'target': other})
+    return [{'artists': artists, 'artworks': artworks, 'relations': relations}]
+
+
+def irregular_graph(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Copie du graphe avec des valeurs inattendues dans les colonnes du dictionnaire
+    (mouvement en chaîne au lieu d'une liste, nationalité numérique) : ces colonnes
+    doivent être envoyées telles quelles
+    """
+    record = records[0]
+    artists = [{**artist, 'data': dict(artist['data'])} for artist in record['artists']]
+    if artists:
+        artists[0]['data']['Ar_Movement'] = MOVEMENTS[0]
+        artists[-1]['data']['Ar_Nationality'] = 1
+    return [{**record, 'artists': artists}]
+
+
+def _unpack(typecode: str, data: bytes) -> List[int]:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tolist()
+
+
+def decode_columnar(data: bytes) -> Dict[str, Any]:
+    """
+    Décodage de référence du format version 1, tel qu'un client le ferait
+    """
+    payload = msgpack.unpackb(data, raw=False)
+    strings = payload['strings']
+    count = payload['nodes']['count']
+    ids = _unpack('q', payload['nodes']['id'])
+    types = [payload['node_types'][code] for code in _unpack('B', payload['nodes']['type'])]
+
+    properties: List[Dict[str, Any]] = [{} for _ in range(count)]
+    for key, column in payload['nodes']['columns'].items():
+        if 'values' in column:
+            values = column['values']
+        elif 'offsets' in column:
+            offsets, codes = _unpack('i', column['offsets']), _unpack('i', column['codes'])
+            values = [[strings[code] for code in codes[offsets[i]:offsets[i + 1]]] for i in range(count)]
+        else:
+            values = [strings[code] if code >= 0 else None for code in _unpack('i', column['codes'])]
+        for row, value in enumerate(values):
+            properties[row][key] = value
+
+    sources = _unpack('i', payload['edges']['source'])
+    targets = _unpack('i', payload['edges']['target'])
+    return {
+        'nodes': list(zip(ids, types, properties)),
+        'relations': [(ids[source], ids[target]) for source, target in zip(sources, targets)]
+    }
+
+
+def _normalize(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Le graphe JSON sous la forme renvoyée par decode_columnar. Une propriété absente d'un
+    nœud devient None, comme dans les colonnes (une liste vide dans une colonne de listes
+    codées par le dictionnaire, où toutes les valeurs présentes sont des listes de chaînes).
+    """
+    nodes = record['artists'] + record['artworks']
+    keys = {key for node in nodes for key in node['data']}
+    list_keys = {
+        key for key in keys & DICTIONARY_COLUMNS
+        if all(
+            isinstance(node['data'][key], list) and all(isinstance(item, str) for item in node['data'][key])
+            for node in nodes if node['data'].get(key) is not None
+        )
+    }
+    rows = {node['id'] for node in nodes}
+    return {
+        'nodes': [
+            (node['id'], node['type'], {
+                key: node['data'].get(key, [] if key in list_keys else None) for key in keys
+            })
+            for node in nodes
+        ],
+        'relations': [
+            (relation['source'], relation['target'])
+            for relation in record['relations']
+            if relation['source'] in rows and relation['target'] in rows
+        ]
+    }
+
+
+def _median_ms(encode: Callable[[], bytes], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--artists', type=int, default=2000)
+    parser.add_argument('--artworks', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--live', action='store_true', help="encode le graphe de la base au lieu d'un graphe synthétique")
+    args = parser.parse_args()
+
+    if args.live:
+        from services import graph_service
+
+        records = graph_service.get_graph()
+        if records is None:
+            print("Impossible de lire le graphe depuis la base")
+            return 2
+    else:
+        records = synthetic_graph(args.artists, args.artworks)
+
+    encoded = to_msgpack(records)
+    expected = _normalize(records[0]) if records else {'nodes': [], 'relations': []}
+    if decode_columnar(encoded) != expected:
+        print("Échec : le décodage de l'encodage en colonnes ne redonne pas le graphe d'origine")
+        return 1
+    if records and decode_columnar(to_msgpack(irregular_graph(records))) != _normalize(irregular_graph(records)[0]):
+        print("Échec : des valeurs de types inattendus sont perdues par l'encodage en colonnes")
+        return 1
+
+    json_body = json.dumps({'data': records}, default=str).encode()
+    sizes = {
+        'JSON': (len(json_body), len(gzip.compress(json_body))),
+        'MessagePack en colonnes': (len(encoded), len(gzip.compress(encoded)))
+    }
+    timings = {
+        'JSON': _median_ms(lambda: json.dumps({'data': records}, default=str).encode(), args.repeat),
+        'MessagePack en colonnes': _median_ms(lambda: to_msgpack(records), args.repeat)
+    }
+
+    print(f"Nœuds : {len(expected['nodes'])}, relations : {len(expected['relations'])} — décodage vérifié")
+    print(f"{'format':<26} {'octets':>12} {'gzip':>12} {'encodage (ms)':>14}")
+    for name, (raw, compressed) in sizes.items():
+        print(f"{name:<26} {raw:>12} {compressed:>12} {timings[name]:>14.1f}")
+    print(f"Taille : {sizes['MessagePack en colonnes'][0] / sizes['JSON'][0]:.0%} du JSON "
+          f"({sizes['MessagePack en colonnes'][1] / sizes['JSON'][1]:.0%} après gzip)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Vérification de config.id_allocator sous concurrence.
+
+Plusieurs allocateurs (un par « worker ») partagent le même compteur ; chacun est
+sollicité par plusieurs threads qui demandent des identifiants avec next_id (et
+parfois next_ids). Le script échoue si un identifiant est donné deux fois.
+
+Par défaut le compteur est simulé en mémoire, avec la même sémantique que
+RESERVE_QUERY (incrément atomique, bloc de count - size + 1 à count) ; avec --live,
+les blocs sont réservés dans la base configurée (NEO4J_URL) sur un compteur de test,
+supprimé à la fin. Depuis la racine du dépôt :
+    python -m scripts.check_id_allocator --workers 4 --threads 16 --ids 2000
+    python -m scripts.check_id_allocator --live --block-size 10
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from config import id_allocator
+from config.id_allocator import IdAllocator
+
+COUNTER_NAME = 'check_id_allocator'
+
+DELETE_COUNTER_QUERY = "MATCH (c:Counter {name: $name}) DELETE c"
+
+
+class _FakeCounters:
+    """
+    Compteurs :Counter en mémoire : chaque réservation est atomique, comme la
+    transaction de RESERVE_QUERY
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.reservations = 0
+        self._lock = threading.Lock()
+
+    def execute_write(self, query: str, parameters: dict = None) -> Optional[List[dict]]:
+        with self._lock:
+            high = self.counts.get(parameters['name'], 0) + parameters['size']
+            self.counts[parameters['name']] = high
+            self.reservations += 1
+        # Laisse les autres threads s'intercaler entre la réservation et son utilisation
+        time.sleep(0)
+        return [{'high': high}]
+
+
+def _hammer(allocator: IdAllocator, count: int, batch: int, taken: List[int], failures: List[str]) -> None:
+    ids: List[int] = []
+    while len(ids) < count:
+        if batch > 1 and len(ids) % 7 == 0:
+            new_ids = allocator.next_ids(min(batch, count - len(ids)))
+            if new_ids is None:
+                failures.append("next_ids a renvoyé None")
+                return
+            ids.extend(new_ids)
+        else:
+            new_id = allocator.next_id()
+            if new_id is None:
+                failures.append("next_id a renvoyé None")
+                return
+            ids.append(new_id)
+    taken.extend(ids)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help="allocateurs partageant le compteur")
+    parser.add_argument('--threads', type=int, default=16, help="threads par allocateur")
+    parser.add_argument('--ids', type=int, default=2000, help="identifiants demandés par thread")
+    parser.add_argument('--batch', type=int, default=5, help="taille des appels à next_ids (1 : next_id seul)")
+    parser.add_argument('--block-size', type=int, default=id_allocator.ID_BLOCK_SIZE)
+    parser.add_argument('--live', action='store_true', help="réserve les blocs dans la base au lieu d'un compteur simulé")
+    args = parser.parse_args()
+
+    fake = None
+    if not args.live:
+        fake = _FakeCounters()
+        id_allocator.execute_write = fake.execute_write
+
+    # Changements de thread très fréquents, pour que les entrelacements arrivent vraiment
+    sys.setswitchinterval(1e-6)
+
+    allocators = [IdAllocator(COUNTER_NAME, args.block_size) for _ in range(args.workers)]
+    taken: List[int] = []
+    failures: List[str] = []
+    threads = [
+        threading.Thread(target=_hammer, args=(allocator, args.ids, args.batch, taken, failures))
+        for allocator in allocators
+        for _ in range(args.threads)
+    ]
+
+    start = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if args.live:
+            id_allocator.execute_write(DELETE_COUNTER_QUERY, {'name': COUNTER_NAME})
+    seconds = time.perf_counter() - start
+
+    if failures:
+        print(f"Échec : {failures[0]} ({len(failures)} threads arrêtés)")
+        return 1
+
+    duplicates = [new_id for new_id, count in Counter(taken).items() if count > 1]
+    expected = args.workers * args.threads * args.ids
+    print(f"{len(taken)} identifiants donnés par {len(threads)} threads sur {args.workers} allocateurs en {seconds * 1000:.0f} ms")
+    if fake is not None:
+        print(f"{fake.reservations} blocs réservés, {fake.counts.get(COUNTER_NAME, 0) - len(taken)} identifiants inutilisés")
+    if len(taken) != expected:
+        print(f"Échec : {expected} identifiants attendus")
+        return 1
+    if duplicates:
+        print(f"Échec : {len(duplicates)} identifiants donnés plusieurs fois, par exemple {sorted(duplicates)[:10]}")
+        return 1
+    print("Aucun doublon")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
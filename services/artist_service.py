@@ -1,8 +1,36 @@
-from config.db_connection import execute_query
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import id_allocator, query_templates
+from config.db_connection import execute_data_write, execute_read
+from utils.entity_cache import entity_cache
+from utils.search import CONTAINS, FULLTEXT, search_mode
+from utils.ttl_cache import TTLCache
+from services import graph_events
+
+# Durée (secondes) pendant laquelle le nombre total de résultats d'une recherche est gardé en cache
+TOTAL_COUNT_CACHE_TTL = float(os.getenv("TOTAL_COUNT_CACHE_TTL", "30"))
+
+_total_count_cache = TTLCache(max_size=256, ttl=TOTAL_COUNT_CACHE_TTL)
+
+# Début des requêtes de recherche : les nœuds trouvés (node) et leur pertinence (score),
+# par l'index full-text artist_search, ou par les prédicats CONTAINS d'origine tant que
+# l'index n'existe pas (migration 3 non appliquée : score constant, tri par identifiant)
+SEARCH_MATCHES = {
+    FULLTEXT: "CALL db.index.fulltext.queryNodes('artist_search', $search) YIELD node, score",
+    CONTAINS: """MATCH (node:Artist)
+        WHERE toString(node.Ar_BirthDay) CONTAINS toString($recherche)
+           OR toString(node.Ar_DeathYear) CONTAINS toString($recherche)
+           OR any(mov IN node.Ar_Movement WHERE toLower(mov) CONTAINS toLower($recherche))
+           OR toLower(node.Ar_LastName) CONTAINS toLower($recherche)
+           OR toLower(node.Ar_FirstName) CONTAINS toLower($recherche)
+           OR toLower(node.Ar_Nationality) CONTAINS toLower($recherche)
+        WITH node, 0.0 AS score"""
+}
 
 def get_artists():
     query = "MATCH (Artist:Artist) RETURN Artist"
-    results = execute_query(query=query)
+    results = execute_read(query=query)
     return [record['Artist'] for record in results]
 
 
@@ -20,12 +48,8 @@ def post_artist(
 ):
 
     query = """
-    MERGE (c:Counter {name: 'Ar_ArtistID'})
-    ON CREATE SET c.count = 0
-    SET c.count = c.count + 1
-    WITH c.count AS new_id
     CREATE (a:Artist {
-        Ar_ArtistID: new_id,
+        Ar_ArtistID: $new_id,
         Ar_FirstName: $Ar_FirstName,
         Ar_LastName: $Ar_LastName,
         Ar_BirthDay: $Ar_BirthDay,
@@ -37,9 +61,13 @@ def post_artist(
         Ar_CountryDeath: $Ar_CountryDeath,
         Ar_Movement: $Ar_Movement
     })
-    RETURN a
+    RETURN a, id(a) AS node_id
     """
+    new_id = id_allocator.next_id('Ar_ArtistID')
+    if new_id is None:
+        return None
     params = {
+        'new_id': new_id,
         'Ar_FirstName': Ar_FirstName,
         'Ar_LastName': Ar_LastName,
         'Ar_BirthDay': Ar_BirthDay,
@@ -51,18 +79,41 @@ def post_artist(
         'Ar_CountryDeath': Ar_CountryDeath,
         'Ar_Movement': Ar_Movement or []
     }
-    results = execute_query(query=query, parameters=params)
-    return results[0]['a'] if results else None
+    results = execute_data_write(query=query, parameters=params)
+    if not results:
+        return None
+    graph_events.publish(graph_events.NODE_CREATED, label='Artist', node_id=results[0]['node_id'], data=results[0]['a'])
+    return results[0]['a']
+
+
+def _invalidate_artist(Ar_ArtistID: int, artwork_ids: List[int]) -> None:
+    # L'artiste apparaît aussi dans l'entrée "artiste de l'œuvre" de chacune de ses œuvres
+    entity_cache.invalidate(
+        ('artist', Ar_ArtistID), ('artist_artworks', Ar_ArtistID),
+        *(('artwork_artist', artwork_id) for artwork_id in artwork_ids)
+    )
+
+
+def _invalidate_created(Ar_ArtistID: int, Art_ArtworkID: int) -> None:
+    entity_cache.invalidate(('artist_artworks', Ar_ArtistID), ('artwork_artist', Art_ArtworkID))
 
 
 def delete_artist_by_id(Ar_ArtistID: int):
     query = """
     MATCH (a:Artist {Ar_ArtistID: $Ar_ArtistID})
+    OPTIONAL MATCH (a)-[:CREATED]->(artwork:Artwork)
+    WITH a, id(a) AS node_id, collect(artwork.Art_ArtworkID) AS artwork_ids
     DETACH DELETE a
-    RETURN COUNT(a) AS deletedCount
+    RETURN COUNT(a) AS deletedCount, collect(node_id) AS node_ids,
+           reduce(ids = [], artist_artworks IN collect(artwork_ids) | ids + artist_artworks) AS artwork_ids
     """
-    results = execute_query(query=query, parameters={'Ar_ArtistID': Ar_ArtistID})
-    return results and results[0]['deletedCount'] > 0
+    results = execute_data_write(query=query, parameters={'Ar_ArtistID': Ar_ArtistID})
+    if not results or results[0]['deletedCount'] == 0:
+        return False
+    _invalidate_artist(Ar_ArtistID, results[0]['artwork_ids'])
+    for node_id in results[0]['node_ids']:
+        graph_events.publish(graph_events.NODE_DELETED, label='Artist', node_id=node_id)
+    return True
 
 
 def update_artist_by_id(Ar_ArtistID: int, fields: dict):
@@ -80,7 +131,9 @@ def update_artist_by_id(Ar_ArtistID: int, fields: dict):
         a.Ar_CountryBirth = coalesce($Ar_CountryBirth, a.Ar_CountryBirth),
         a.Ar_CountryDeath = coalesce($Ar_CountryDeath, a.Ar_CountryDeath),
         a.Ar_Movement = coalesce($Ar_Movement, a.Ar_Movement)
-    RETURN a
+    WITH a
+    OPTIONAL MATCH (a)-[:CREATED]->(artwork:Artwork)
+    RETURN a, id(a) AS node_id, collect(artwork.Art_ArtworkID) AS artwork_ids
     """
     params = {
         'Ar_ArtistID': Ar_ArtistID,
@@ -96,39 +149,74 @@ def update_artist_by_id(Ar_ArtistID: int, fields: dict):
         'Ar_CountryDeath': fields.get('Ar_CountryDeath'),
         'Ar_Movement': fields.get('Ar_Movement')
     }
-    results = execute_query(query=query, parameters=params)
-    return results[0]['a'] if results else None
+    results = execute_data_write(query=query, parameters=params)
+    if not results:
+        return None
+    _invalidate_artist(Ar_ArtistID, results[0]['artwork_ids'])
+    graph_events.publish(graph_events.NODE_UPDATED, label='Artist', node_id=results[0]['node_id'], data=results[0]['a'])
+    return results[0]['a']
 
 
 
+@entity_cache.cached('artist')
 def get_artist_by_id(Ar_ArtistID: int):
     query = """
     MATCH (a:Artist {Ar_ArtistID: $Ar_ArtistID})
     RETURN a
     """
-    results = execute_query(query=query, parameters={'Ar_ArtistID': Ar_ArtistID})
+    results = execute_read(query=query, parameters={'Ar_ArtistID': Ar_ArtistID})
     if results:
         return results[0]['a']
     return None
 
 
-def post_create_relation(Ar_ArtistID: int, Art_ArtworkID: int):
+def post_create_relations(pairs: List[Tuple[int, int]]) -> Optional[List[Optional[dict]]]:
     """
-    Crée une relation 'CREATE' entre un artiste et une œuvre
+    Crée des relations 'CREATED' en une seule requête, pour des paires (artiste, œuvre).
+    Une relation déjà présente n'est pas recréée (MERGE).
+
+    Returns:
+        Pour chaque paire, dans l'ordre : la relation (r, artist, artwork, et created à
+        False si elle existait déjà), ou None si l'artiste ou l'œuvre n'existe pas.
+        None si la requête échoue.
     """
     query = """
-    MATCH (artist:Artist {Ar_ArtistID: $Ar_ArtistID})
-    MATCH (artwork:Artwork {Art_ArtworkID: $Art_ArtworkID})
+    UNWIND $pairs AS pair
+    MATCH (artist:Artist {Ar_ArtistID: pair.artist})
+    MATCH (artwork:Artwork {Art_ArtworkID: pair.artwork})
     MERGE (artist)-[r:CREATED]->(artwork)
-    RETURN r, artist, artwork
+    ON CREATE SET r._created = true
+    WITH pair, r, artist, artwork, r._created IS NOT NULL AS created
+    REMOVE r._created
+    RETURN pair.index AS index, r, artist, artwork, created, id(artist) AS source_id, id(artwork) AS target_id
     """
-    params = {
-        'Ar_ArtistID': Ar_ArtistID,
-        'Art_ArtworkID': Art_ArtworkID
-    }
-    results = execute_query(query=query, parameters=params)
-    return results[0] if results else None
+    parameters = {'pairs': [
+        {'index': index, 'artist': artist, 'artwork': artwork}
+        for index, (artist, artwork) in enumerate(pairs)
+    ]}
+    results = execute_data_write(query=query, parameters=parameters)
+    if results is None:
+        return None
+
+    relations: List[Optional[dict]] = [None] * len(pairs)
+    for relation in results:
+        source_id, target_id = relation.pop('source_id'), relation.pop('target_id')
+        if relation['created']:
+            _invalidate_created(*pairs[relation['index']])
+            graph_events.publish(graph_events.RELATION_CREATED, type='CREATED', source=source_id, target=target_id)
+        relations[relation.pop('index')] = relation
+    return relations
+
+
+def post_create_relation(Ar_ArtistID: int, Art_ArtworkID: int):
+    """
+    Crée une relation 'CREATE' entre un artiste et une œuvre, si elle n'existe pas déjà
+    (created à False dans ce cas)
+    """
+    relations = post_create_relations([(Ar_ArtistID, Art_ArtworkID)])
+    return relations[0] if relations else None
 
+@entity_cache.cached('artist_artworks')
 def get_artist_with_artworks(Ar_ArtistID: int):
     """
     Récupère un artiste avec toutes ses œuvres
@@ -138,7 +226,7 @@ def get_artist_with_artworks(Ar_ArtistID: int):
     OPTIONAL MATCH (artist)-[:CREATED]->(artwork:Artwork)
     RETURN artist, COLLECT(artwork) AS artworks
     """
-    results = execute_query(query=query, parameters={'Ar_ArtistID': Ar_ArtistID})
+    results = execute_read(query=query, parameters={'Ar_ArtistID': Ar_ArtistID})
     if results:
         return {
             'artist': results[0]['artist'],
@@ -150,31 +238,54 @@ def delete_relation(Ar_ArtistID: int, Art_ArtworkID: int):
     query = """
     MATCH (artist:Artist {Ar_ArtistID: $Ar_ArtistID})-[r:CREATED]->(artwork:Artwork {Art_ArtworkID: $Art_ArtworkID})
     DELETE r
-    RETURN artist, artwork
+    RETURN artist, artwork, id(artist) AS source_id, id(artwork) AS target_id
     """
     params = {
         'Ar_ArtistID': Ar_ArtistID,
         'Art_ArtworkID': Art_ArtworkID
     }
-    results = execute_query(query=query, parameters=params)
-    return results[0] if results else None
+    results = execute_data_write(query=query, parameters=params)
+    if not results:
+        return None
+    _invalidate_created(Ar_ArtistID, Art_ArtworkID)
+    relation = results[0]
+    graph_events.publish(graph_events.RELATION_DELETED, type='CREATED',
+                         source=relation.pop('source_id'), target=relation.pop('target_id'))
+    return relation
 
 def update_relation(old_artist_id: int, new_artist_id: int, artwork_id: int):
+    """
+    Remplace l'auteur d'une œuvre, en une seule requête : rien n'est supprimé si le
+    nouvel artiste n'existe pas. created est à False si la nouvelle relation existait déjà.
+    """
     query = """
     MATCH (old_artist:Artist {Ar_ArtistID: $old_artist_id})-[r:CREATED]->(artwork:Artwork {Art_ArtworkID: $artwork_id})
-    DELETE r
-    WITH artwork
     MATCH (new_artist:Artist {Ar_ArtistID: $new_artist_id})
-    MERGE (new_artist)-[:CREATED]->(artwork)
-    RETURN new_artist, artwork
+    DELETE r
+    WITH old_artist, new_artist, artwork
+    MERGE (new_artist)-[created_relation:CREATED]->(artwork)
+    ON CREATE SET created_relation._created = true
+    WITH old_artist, new_artist, artwork, created_relation, created_relation._created IS NOT NULL AS created
+    REMOVE created_relation._created
+    RETURN new_artist, artwork, created, id(old_artist) AS old_source_id, id(new_artist) AS source_id, id(artwork) AS target_id
     """
     params = {
         'old_artist_id': old_artist_id,
         'new_artist_id': new_artist_id,
         'artwork_id': artwork_id
     }
-    results = execute_query(query=query, parameters=params)
-    return results[0] if results else None
+    results = execute_data_write(query=query, parameters=params)
+    if not results:
+        return None
+    _invalidate_created(old_artist_id, artwork_id)
+    _invalidate_created(new_artist_id, artwork_id)
+    relation = results[0]
+    target_id = relation.pop('target_id')
+    source_id = relation.pop('source_id')
+    graph_events.publish(graph_events.RELATION_DELETED, type='CREATED', source=relation.pop('old_source_id'), target=target_id)
+    if relation['created']:
+        graph_events.publish(graph_events.RELATION_CREATED, type='CREATED', source=source_id, target=target_id)
+    return relation
 
 
 
@@ -189,32 +300,34 @@ def get_artist_by_page(page_number: int, page_size: int = 16, recherche: str = "
 
     offset = (page_number - 1) * page_size
 
-    if recherche:
-        query = f"""
-        MATCH (artist:Artist)
-        WHERE toString(artist.Ar_BirthDay) CONTAINS toString($recherche)
-           OR toString(artist.Ar_DeathYear) CONTAINS toString($recherche)
-           OR any(mov IN artist.Ar_Movement WHERE toLower(mov) CONTAINS toLower($recherche))
-           OR toLower(artist.Ar_LastName) CONTAINS toLower($recherche)
-           OR toLower(artist.Ar_FirstName) CONTAINS toLower($recherche)
-           OR toLower(artist.Ar_Nationality) CONTAINS toLower($recherche)
-        RETURN artist
-        ORDER BY artist.Ar_ArtistID
-        SKIP {offset}
-        LIMIT {page_size}
+    mode, search = search_mode(recherche, 'artist_search')
+    if mode == FULLTEXT and search is None:
+        return []
+
+    if mode:
+        # Recherche (voir SEARCH_MATCHES), résultats par pertinence
+        query = SEARCH_MATCHES[mode] + """
+        RETURN node AS artist
+        ORDER BY score DESC, node.Ar_ArtistID
+        SKIP $skip
+        LIMIT $limit
         """
-        parameters = {"recherche": recherche}
+        parameters = {"search": search, "recherche": recherche, "skip": offset, "limit": page_size}
     else:
-        query = f"""
+        query = """
         MATCH (artist:Artist)
         RETURN artist
         ORDER BY artist.Ar_ArtistID
-        SKIP {offset}
-        LIMIT {page_size}
+        SKIP $skip
+        LIMIT $limit
         """
-        parameters = {}
+        parameters = {"skip": offset, "limit": page_size}
 
-    results = execute_query(query=query, parameters=parameters)
+    query = query_templates.template('artist_page', mode, query)
+
+    results = execute_read(query=query, parameters=parameters)
+    if results is None:
+        return None
     artist_list = [record['artist'] for record in results]
 
     return artist_list
@@ -226,32 +339,83 @@ def get_total_artist_count(recherche: str = ""):
     """
     Récupère le nombre total d'artistes (avec ou sans filtre).
     """
-    if recherche:
-        query = """
-        MATCH (artist:Artist)
-        WHERE toLower(artist.nom) CONTAINS toLower($recherche)
-           OR toLower(artist.prenom) CONTAINS toLower($recherche)
-        RETURN count(artist) AS total
+    mode, search = search_mode(recherche, 'artist_search')
+    if mode == FULLTEXT and search is None:
+        return 0
+
+    if mode:
+        query = SEARCH_MATCHES[mode] + """
+        RETURN count(node) AS total
         """
-        parameters = {"recherche": recherche}
+        parameters = {"search": search, "recherche": recherche}
     else:
         query = "MATCH (artist:Artist) RETURN count(artist) as total"
         parameters = {}
 
-    results = execute_query(query=query, parameters=parameters)
+    query = query_templates.template('artist_count', mode, query)
+
+    results = execute_read(query=query, parameters=parameters)
     return results[0]['total'] if results else 0
 
 
 
+def get_artist_page_with_total(page_number: int, page_size: int = 16, recherche: str = "") -> Tuple[List[dict], Optional[int]]:
+    """
+    Récupère une page de get_artist_by_page et le nombre total de résultats en une seule
+    requête, avec la même sélection pour les deux (None, None si la requête échoue)
+    """
+    if page_number < 1:
+        raise ValueError("Le numéro de page doit être supérieur ou égal à 1")
+
+    mode, search = search_mode(recherche, 'artist_search')
+    if mode == FULLTEXT and search is None:
+        return [], 0
+
+    if mode:
+        # Les résultats triés sont collectés une fois : le total est leur nombre
+        query = SEARCH_MATCHES[mode] + """
+        WITH node ORDER BY score DESC, node.Ar_ArtistID
+        WITH collect(node) AS matches
+        RETURN size(matches) AS total, matches[$skip..$skip + $limit] AS artists
+        """
+    else:
+        # Le nombre de nœuds d'un label est lu dans les statistiques de la base
+        query = """
+        MATCH (artist:Artist)
+        WITH count(artist) AS total
+        CALL {
+          MATCH (artist:Artist)
+          WITH artist ORDER BY artist.Ar_ArtistID SKIP $skip LIMIT $limit
+          RETURN collect(artist) AS artists
+        }
+        RETURN total, artists
+        """
+
+    query = query_templates.template('artist_page_total', mode, query)
+
+    parameters = {"search": search, "recherche": recherche, "skip": (page_number - 1) * page_size, "limit": page_size}
+    results = execute_read(query=query, parameters=parameters)
+    if not results:
+        return None, None
+    return results[0]['artists'], results[0]['total']
+
+
 def get_artist_pagination_info(page_number: int, page_size: int = 16, recherche: str = ""):
     """
-    Récupère les artistes avec infos de pagination et filtre optionnel.
+    Récupère les artistes avec infos de pagination et filtre optionnel (None si la lecture échoue).
     """
-    total_count = get_total_artist_count(recherche)
+    # Total déjà connu : seule la page est demandée ; sinon page et total en une requête
+    total_count = _total_count_cache.get(recherche)
+    if total_count is None:
+        artist_list, total_count = get_artist_page_with_total(page_number, page_size, recherche)
+        if total_count is not None:
+            _total_count_cache.set(recherche, total_count)
+    else:
+        artist_list = get_artist_by_page(page_number, page_size, recherche)
+    if artist_list is None:
+        return None
     total_pages = (total_count + page_size - 1) // page_size
 
-    artist_list = get_artist_by_page(page_number, page_size, recherche)
-
     return {
         'artists': artist_list,
         'current_page': page_number,
@@ -261,3 +425,88 @@ def get_artist_pagination_info(page_number: int, page_size: int = 16, recherche:
         'has_next': page_number < total_pages,
         'has_previous': page_number > 1
     }
+
+
+def get_artist_page_after(
+        cursor: Optional[Dict[str, Any]] = None,
+        limit: int = 16,
+        recherche: str = ""
+) -> Tuple[List[dict], Optional[Dict[str, Any]]]:
+    """
+    Pagination par curseur : au lieu de sauter les `offset` premiers artistes, la requête
+    repart de la position du dernier artist renvoyé (index de Ar_ArtistID), si bien
+    qu'une page lointaine coûte autant que la première.
+
+    Args:
+        cursor: Position du dernier élément de la page précédente ({id}, et {score} pour
+            une recherche), None pour la première page
+        limit: Nombre d'éléments par page
+        recherche: Recherche full-text optionnelle ; les résultats sont alors triés par pertinence
+
+    Returns:
+        Les artistes de la page, et la position à passer pour la page suivante (None s'il n'y en a pas)
+    """
+    mode, search = search_mode(recherche, 'artist_search')
+    if mode == FULLTEXT and search is None:
+        return [], None
+
+    # La page est coupée dans la requête : Neo4j ne garde que $limit + 1 lignes (tri partiel),
+    # la ligne de plus indiquant seulement s'il existe une page suivante
+    if mode:
+        query = SEARCH_MATCHES[mode] + """
+        WHERE $after_score IS NULL
+           OR score < $after_score
+           OR (score = $after_score AND node.Ar_ArtistID > $after_id)
+        WITH node, score
+        ORDER BY score DESC, node.Ar_ArtistID
+        LIMIT $limit + 1
+        WITH collect({artist: node, score: score}) AS rows
+        RETURN rows[..$limit] AS page, size(rows) > $limit AS has_next
+        """
+    else:
+        query = """
+        MATCH (artist:Artist)
+        WHERE artist.Ar_ArtistID > $after_id
+        WITH artist
+        ORDER BY artist.Ar_ArtistID
+        LIMIT $limit + 1
+        WITH collect({artist: artist}) AS rows
+        RETURN rows[..$limit] AS page, size(rows) > $limit AS has_next
+        """
+
+    query = query_templates.template('artist_page_after', mode, query)
+
+    parameters = {
+        "search": search,
+        "recherche": recherche,
+        "after_id": cursor['id'] if cursor else -1,
+        "after_score": cursor.get('score') if cursor and mode else None,
+        "limit": limit
+    }
+    results = execute_read(query=query, parameters=parameters)
+    if results is None:
+        return None, None
+
+    page = results[0]['page']
+    next_cursor = None
+    if results[0]['has_next']:
+        last = page[-1]
+        next_cursor = {'id': last['artist']['Ar_ArtistID']}
+        if mode:
+            next_cursor['score'] = last['score']
+
+    return [record['artist'] for record in page], next_cursor
+
+
+def get_cached_total_artist_count(recherche: str = "") -> int:
+    """
+    get_total_artist_count, gardé en cache TOTAL_COUNT_CACHE_TTL secondes par recherche
+    """
+    return _total_count_cache.get_or_set(recherche, lambda: get_total_artist_count(recherche))
+
+
+@graph_events.subscribe
+def _on_graph_event(event: str, **payload) -> None:
+    # Une création, modification ou suppression peut changer le total de n'importe quelle recherche
+    if any(data.get('label') == 'Artist' for _, data in graph_events.unfold(event, payload)):
+        _total_count_cache.clear()
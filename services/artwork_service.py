@@ -1,20 +1,45 @@
-from config.db_connection import execute_query
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import id_allocator, query_templates
+from config.db_connection import execute_data_write, execute_read
+from utils.entity_cache import entity_cache
+from utils.search import CONTAINS, FULLTEXT, search_mode
+from utils.ttl_cache import TTLCache
+from services import graph_events
+
+# Durée (secondes) pendant laquelle le nombre total de résultats d'une recherche est gardé en cache
+TOTAL_COUNT_CACHE_TTL = float(os.getenv("TOTAL_COUNT_CACHE_TTL", "30"))
+
+_total_count_cache = TTLCache(max_size=256, ttl=TOTAL_COUNT_CACHE_TTL)
+
+# Début des requêtes de recherche : les nœuds trouvés (node) et leur pertinence (score),
+# par l'index full-text artwork_search, ou par les prédicats CONTAINS d'origine tant que
+# l'index n'existe pas (migration 3 non appliquée : score constant, tri par identifiant)
+SEARCH_MATCHES = {
+    FULLTEXT: "CALL db.index.fulltext.queryNodes('artwork_search', $search) YIELD node, score",
+    CONTAINS: """MATCH (node:Artwork)
+        WHERE toLower(node.Art_Title) CONTAINS toLower($recherche)
+           OR toLower(node.artist) CONTAINS toLower($recherche)
+        WITH node, 0.0 AS score"""
+}
 
 
 def get_artwork():
     query: str = "MATCH (Artwork :Artwork) RETURN Artwork"
-    results: list = execute_query(query=query)
+    results: list = execute_read(query=query)
     artwork: list = [record['Artwork'] for record in results]
 
     return artwork
 
 
+@entity_cache.cached('artwork')
 def get_artwork_by_id(Art_ArtworkID: int):
     query = """
     MATCH (a:Artwork {Art_ArtworkID: $Art_ArtworkID})
     RETURN a
     """
-    results = execute_query(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
+    results = execute_read(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
     if results:
         return results[0]['a']
     return None
@@ -23,16 +48,16 @@ def get_artwork_by_id(Art_ArtworkID: int):
 def post_artwork(Art_Title: str, Art_Year: int, Art_Description: str, Art_ImageURL: str, Art_Medium: str,
                  Art_Dimensions: str, Ar_ArtistID: int = ""):
     query = """
-    MERGE (c:Counter {name: 'Art_ArtworkID'})
-    ON CREATE SET c.count = 0
-    SET c.count = c.count + 1
-    WITH c.count AS new_id
-    CREATE (aw:Artwork {Art_ArtworkID: new_id, Art_Title: $Art_Title, Art_Year: $Art_Year, 
+    CREATE (aw:Artwork {Art_ArtworkID: $new_id, Art_Title: $Art_Title, Art_Year: $Art_Year, 
     Art_Description: $Art_Description, Art_ImageURL: $Art_ImageURL, Art_Medium: $Art_Medium, Art_Dimensions: 
     $Art_Dimensions, Ar_ArtistID: $Ar_ArtistID})
-    RETURN aw AS Artwork
+    RETURN aw AS Artwork, id(aw) AS node_id
     """
+    new_id = id_allocator.next_id('Art_ArtworkID')
+    if new_id is None:
+        return None
     params = {
+        'new_id': new_id,
         'Art_Title': Art_Title,
         'Art_Year': Art_Year,
         'Art_Description': Art_Description,
@@ -42,61 +67,82 @@ def post_artwork(Art_Title: str, Art_Year: int, Art_Description: str, Art_ImageU
         'Ar_ArtistID': Ar_ArtistID
     }
 
-    results = execute_query(query=query, parameters=params)
+    results = execute_data_write(query=query, parameters=params)
     if results:
+        graph_events.publish(graph_events.NODE_CREATED, label='Artwork', node_id=results[0]['node_id'],
+                             data=results[0]['Artwork'])
         return results[0]['Artwork']
     return None
 
 
-def post_inspire_relation(source_artwork_id: int, inspired_artwork_id: int):
-    """
-    Crée une relation 'INSPIRE' entre deux œuvres
-    source_artwork_id: l'œuvre qui inspire
-    inspired_artwork_id: l'œuvre inspirée
-
-    Raises:
-        ValueError: Si la relation existe déjà ou si les œuvres n'existent pas
+def post_inspire_relations(pairs: List[Tuple[int, int]]) -> Optional[List[Optional[dict]]]:
     """
+    Crée des relations 'INSPIRE' en une seule requête, pour des paires
+    (œuvre qui inspire, œuvre inspirée). Comme avant, deux œuvres ne sont liées que
+    dans un sens : si une relation existe déjà dans un sens ou dans l'autre, elle
+    n'est pas recréée et c'est elle qui est renvoyée (source et inspired donnent son
+    sens réel). Les deux œuvres sont verrouillées avant la vérification : deux appels
+    simultanés, même en sens opposés, ne peuvent pas créer deux relations.
 
-    # Vérifier que les deux œuvres existent et qu'il n'y a pas déjà de relation
-    check_query = """
-    MATCH (source:Artwork {Art_ArtworkID: $source_artwork_id})
-    MATCH (inspired:Artwork {Art_ArtworkID: $inspired_artwork_id})
-    OPTIONAL MATCH (source)-[existing:INSPIRE]-(inspired)
-    RETURN source, inspired, existing
+    Returns:
+        Pour chaque paire, dans l'ordre : la relation (r, source, inspired, et created à
+        False si elle existait déjà), ou None si une des œuvres n'existe pas.
+        None si la requête échoue.
     """
-
-    check_params = {
-        'source_artwork_id': source_artwork_id,
-        'inspired_artwork_id': inspired_artwork_id
+    query = """
+    UNWIND $pairs AS pair
+    CALL {
+        WITH pair
+        MATCH (source:Artwork {Art_ArtworkID: pair.source})
+        MATCH (inspired:Artwork {Art_ArtworkID: pair.inspired})
+        SET source._lock = true, inspired._lock = true
+        REMOVE source._lock, inspired._lock
+        WITH source, inspired
+        OPTIONAL MATCH (source)-[existing:INSPIRE]-(inspired)
+        WITH source, inspired, count(existing) AS existing
+        FOREACH (_ IN CASE WHEN existing = 0 THEN [1] ELSE [] END |
+            CREATE (source)-[:INSPIRE {_created: true}]->(inspired)
+        )
+        WITH source, inspired
+        MATCH (source)-[r:INSPIRE]-(inspired)
+        WITH source, r ORDER BY startNode(r) = source DESC LIMIT 1
+        RETURN r
     }
-
-    check_results = execute_query(query=check_query, parameters=check_params)
-
-    if not check_results:
+    WITH pair, r, r._created IS NOT NULL AS created
+    REMOVE r._created
+    RETURN pair.index AS index, r, startNode(r) AS source, endNode(r) AS inspired, created,
+           id(startNode(r)) AS source_id, id(endNode(r)) AS target_id
+    """
+    parameters = {'pairs': [
+        {'index': index, 'source': source, 'inspired': inspired}
+        for index, (source, inspired) in enumerate(pairs)
+    ]}
+    results = execute_data_write(query=query, parameters=parameters)
+    if results is None:
         return None
 
-    result = check_results[0]
+    relations: List[Optional[dict]] = [None] * len(pairs)
+    for relation in results:
+        source_id, target_id = relation.pop('source_id'), relation.pop('target_id')
+        if relation['created']:
+            entity_cache.invalidate(*(('artwork_inspirations', artwork_id) for artwork_id in pairs[relation['index']]))
+            graph_events.publish(graph_events.RELATION_CREATED, type='INSPIRE', source=source_id, target=target_id)
+        relations[relation.pop('index')] = relation
+    return relations
 
-    # Vérifier si la relation existe déjà
-    if result.get('existing') is not None:
-        return None
 
-    # Créer la relation si elle n'existe pas
-    create_query = """
-    MATCH (source:Artwork {Art_ArtworkID: $source_artwork_id})
-    MATCH (inspired:Artwork {Art_ArtworkID: $inspired_artwork_id})
-    CREATE (source)-[r:INSPIRE]->(inspired)
-    RETURN r, source, inspired
+def post_inspire_relation(source_artwork_id: int, inspired_artwork_id: int):
     """
+    Crée une relation 'INSPIRE' entre deux œuvres, si elle n'existe pas déjà
+    source_artwork_id: l'œuvre qui inspire
+    inspired_artwork_id: l'œuvre inspirée
 
-    create_params = {
-        'source_artwork_id': source_artwork_id,
-        'inspired_artwork_id': inspired_artwork_id
-    }
-
-    results = execute_query(query=create_query, parameters=create_params)
-    return results[0] if results else None
+    Returns:
+        La relation, avec created à False si elle existait déjà ; None si une des
+        œuvres n'existe pas ou en cas d'erreur
+    """
+    relations = post_inspire_relations([(source_artwork_id, inspired_artwork_id)])
+    return relations[0] if relations else None
 
 
 def get_artworks_inspired_by(Art_ArtworkID: int):
@@ -108,7 +154,7 @@ def get_artworks_inspired_by(Art_ArtworkID: int):
     RETURN inspired
     """
 
-    results = execute_query(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
+    results = execute_read(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
     return [record['inspired'] for record in results]
 
 
@@ -121,10 +167,11 @@ def get_artworks_that_inspired(Art_ArtworkID: int):
     RETURN source
     """
 
-    results = execute_query(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
+    results = execute_read(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
     return [record['source'] for record in results]
 
 
+@entity_cache.cached('artwork_inspirations')
 def get_artwork_with_inspirations(Art_ArtworkID: int):
     """
     Récupère une œuvre avec ses inspirations et les œuvres qu'elle a inspirées
@@ -138,7 +185,7 @@ def get_artwork_with_inspirations(Art_ArtworkID: int):
            COLLECT(DISTINCT inspired) AS inspired_artworks
     """
 
-    results = execute_query(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
+    results = execute_read(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
     if results:
         return {
             'artwork': results[0]['artwork'],
@@ -148,6 +195,7 @@ def get_artwork_with_inspirations(Art_ArtworkID: int):
     return None
 
 
+@entity_cache.cached('artwork_artist')
 def get_artist_of_artwork(Art_ArtworkID: int):
     """
     Récupère l'artiste qui a créé une œuvre
@@ -157,7 +205,7 @@ def get_artist_of_artwork(Art_ArtworkID: int):
     RETURN artist
     """
 
-    results = execute_query(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
+    results = execute_read(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
     if results:
         return results[0]['artist']
     return None
@@ -180,28 +228,34 @@ def get_artwork_by_page(page_number: int, page_size: int = 16,recherche: str = "
 
     offset = (page_number - 1) * page_size
 
-    if recherche:
-        query = f"""
-            MATCH (artwork:Artwork)
-            WHERE toLower(artwork.Art_Title) CONTAINS toLower($recherche)
-               OR toLower(artwork.artist) CONTAINS toLower($recherche)
-            RETURN artwork
-            ORDER BY artwork.Art_ArtworkID
-            SKIP {offset}
-            LIMIT {page_size}
+    mode, search = search_mode(recherche, 'artwork_search')
+    if mode == FULLTEXT and search is None:
+        return []
+
+    if mode:
+        # Recherche (voir SEARCH_MATCHES), résultats par pertinence
+        query = SEARCH_MATCHES[mode] + """
+            RETURN node AS artwork
+            ORDER BY score DESC, node.Art_ArtworkID
+            SKIP $skip
+            LIMIT $limit
             """
-        parameters = {"recherche": recherche}
+        parameters = {"search": search, "recherche": recherche, "skip": offset, "limit": page_size}
     else:
-        query = f"""
+        query = """
             MATCH (artwork:Artwork)
             RETURN artwork
             ORDER BY artwork.Art_ArtworkID
-            SKIP {offset}
-            LIMIT {page_size}
+            SKIP $skip
+            LIMIT $limit
             """
-        parameters = {}
+        parameters = {"skip": offset, "limit": page_size}
+
+    query = query_templates.template('artwork_page', mode, query)
 
-    results = execute_query(query=query, parameters=parameters)
+    results = execute_read(query=query, parameters=parameters)
+    if results is None:
+        return None
     return [record['artwork'] for record in results]
 
 
@@ -209,32 +263,83 @@ def get_total_artwork_count(recherche: str = ""):
     """
     Retourne le nombre total d'artworks (filtré si nécessaire).
     """
-    if recherche:
-        query = """
-        MATCH (artwork:Artwork)
-        WHERE toLower(artwork.Art_Title) CONTAINS toLower($recherche)
-           OR toLower(artwork.artist) CONTAINS toLower($recherche)
-        RETURN count(artwork) AS total
+    mode, search = search_mode(recherche, 'artwork_search')
+    if mode == FULLTEXT and search is None:
+        return 0
+
+    if mode:
+        query = SEARCH_MATCHES[mode] + """
+        RETURN count(node) AS total
         """
-        parameters = {"recherche": recherche}
+        parameters = {"search": search, "recherche": recherche}
     else:
         query = "MATCH (artwork:Artwork) RETURN count(artwork) AS total"
         parameters = {}
 
-    results = execute_query(query=query, parameters=parameters)
+    query = query_templates.template('artwork_count', mode, query)
+
+    results = execute_read(query=query, parameters=parameters)
     return results[0]['total'] if results else 0
 
 
 
+def get_artwork_page_with_total(page_number: int, page_size: int = 16, recherche: str = "") -> Tuple[List[dict], Optional[int]]:
+    """
+    Récupère une page de get_artwork_by_page et le nombre total de résultats en une seule
+    requête, avec la même sélection pour les deux (None, None si la requête échoue)
+    """
+    if page_number < 1:
+        raise ValueError("Le numéro de page doit être supérieur ou égal à 1")
+
+    mode, search = search_mode(recherche, 'artwork_search')
+    if mode == FULLTEXT and search is None:
+        return [], 0
+
+    if mode:
+        # Les résultats triés sont collectés une fois : le total est leur nombre
+        query = SEARCH_MATCHES[mode] + """
+        WITH node ORDER BY score DESC, node.Art_ArtworkID
+        WITH collect(node) AS matches
+        RETURN size(matches) AS total, matches[$skip..$skip + $limit] AS artworks
+        """
+    else:
+        # Le nombre de nœuds d'un label est lu dans les statistiques de la base
+        query = """
+        MATCH (artwork:Artwork)
+        WITH count(artwork) AS total
+        CALL {
+          MATCH (artwork:Artwork)
+          WITH artwork ORDER BY artwork.Art_ArtworkID SKIP $skip LIMIT $limit
+          RETURN collect(artwork) AS artworks
+        }
+        RETURN total, artworks
+        """
+
+    query = query_templates.template('artwork_page_total', mode, query)
+
+    parameters = {"search": search, "recherche": recherche, "skip": (page_number - 1) * page_size, "limit": page_size}
+    results = execute_read(query=query, parameters=parameters)
+    if not results:
+        return None, None
+    return results[0]['artworks'], results[0]['total']
+
+
 def get_artwork_pagination_info(page_number: int, page_size: int = 16, recherche: str = ""):
     """
-    Récupère les artworks + infos de pagination, avec filtrage optionnel.
+    Récupère les artworks + infos de pagination, avec filtrage optionnel (None si la lecture échoue).
     """
-    total_count = get_total_artwork_count(recherche)
+    # Total déjà connu : seule la page est demandée ; sinon page et total en une requête
+    total_count = _total_count_cache.get(recherche)
+    if total_count is None:
+        artworks, total_count = get_artwork_page_with_total(page_number, page_size, recherche)
+        if total_count is not None:
+            _total_count_cache.set(recherche, total_count)
+    else:
+        artworks = get_artwork_by_page(page_number, page_size, recherche)
+    if artworks is None:
+        return None
     total_pages = (total_count + page_size - 1) // page_size
 
-    artworks = get_artwork_by_page(page_number, page_size, recherche)
-
     return {
         'artworks': artworks,
         'current_page': page_number,
@@ -245,14 +350,34 @@ def get_artwork_pagination_info(page_number: int, page_size: int = 16, recherche
         'has_previous': page_number > 1
     }
 
+def _invalidate_artwork(Art_ArtworkID: int, artist_ids: List[int], neighbor_ids: List[int]) -> None:
+    # L'œuvre apparaît aussi dans les entrées de ses artistes et des œuvres liées par INSPIRE
+    entity_cache.invalidate(
+        ('artwork', Art_ArtworkID), ('artwork_inspirations', Art_ArtworkID), ('artwork_artist', Art_ArtworkID),
+        *(('artist_artworks', artist_id) for artist_id in artist_ids),
+        *(('artwork_inspirations', neighbor_id) for neighbor_id in neighbor_ids)
+    )
+
+
 def delete_artwork(Art_ArtworkID: int) -> bool:
     query = """
     MATCH (a:Artwork {Art_ArtworkID: $Art_ArtworkID})
+    OPTIONAL MATCH (artist:Artist)-[:CREATED]->(a)
+    OPTIONAL MATCH (a)-[:INSPIRE]-(neighbor:Artwork)
+    WITH a, id(a) AS node_id, collect(DISTINCT artist.Ar_ArtistID) AS artist_ids,
+         collect(DISTINCT neighbor.Art_ArtworkID) AS neighbor_ids
     DETACH DELETE a
-    RETURN COUNT(a) AS deleted_count
+    RETURN COUNT(a) AS deleted_count, collect(node_id) AS node_ids,
+           reduce(ids = [], artwork_artists IN collect(artist_ids) | ids + artwork_artists) AS artist_ids,
+           reduce(ids = [], artwork_neighbors IN collect(neighbor_ids) | ids + artwork_neighbors) AS neighbor_ids
     """
-    results = execute_query(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
-    return results and results[0]['deleted_count'] > 0
+    results = execute_data_write(query=query, parameters={'Art_ArtworkID': Art_ArtworkID})
+    if not results or results[0]['deleted_count'] == 0:
+        return False
+    _invalidate_artwork(Art_ArtworkID, results[0]['artist_ids'], results[0]['neighbor_ids'])
+    for node_id in results[0]['node_ids']:
+        graph_events.publish(graph_events.NODE_DELETED, label='Artwork', node_id=node_id)
+    return True
 
 def update_artwork(Art_ArtworkID: int, data: dict):
     query = """
@@ -264,7 +389,11 @@ def update_artwork(Art_ArtworkID: int, data: dict):
         a.Art_Medium = coalesce($Art_Medium, a.Art_Medium),
         a.Art_Dimensions = coalesce($Art_Dimensions, a.Art_Dimensions),
         a.Ar_ArtistID = coalesce($Ar_ArtistID, a.Ar_ArtistID)
-    RETURN a AS Artwork
+    WITH a
+    OPTIONAL MATCH (artist:Artist)-[:CREATED]->(a)
+    OPTIONAL MATCH (a)-[:INSPIRE]-(neighbor:Artwork)
+    RETURN a AS Artwork, id(a) AS node_id, collect(DISTINCT artist.Ar_ArtistID) AS artist_ids,
+           collect(DISTINCT neighbor.Art_ArtworkID) AS neighbor_ids
     """
     params = {
         'Art_ArtworkID': Art_ArtworkID,
@@ -276,6 +405,95 @@ def update_artwork(Art_ArtworkID: int, data: dict):
         'Art_Dimensions': data.get('Art_Dimensions'),
         'Ar_ArtistID': data.get('Ar_ArtistID')
     }
-    results = execute_query(query=query, parameters=params)
-    return results[0]['Artwork'] if results else None
+    results = execute_data_write(query=query, parameters=params)
+    if not results:
+        return None
+    _invalidate_artwork(Art_ArtworkID, results[0]['artist_ids'], results[0]['neighbor_ids'])
+    graph_events.publish(graph_events.NODE_UPDATED, label='Artwork', node_id=results[0]['node_id'],
+                         data=results[0]['Artwork'])
+    return results[0]['Artwork']
+
+
+def get_artwork_page_after(
+        cursor: Optional[Dict[str, Any]] = None,
+        limit: int = 16,
+        recherche: str = ""
+) -> Tuple[List[dict], Optional[Dict[str, Any]]]:
+    """
+    Pagination par curseur : au lieu de sauter les `offset` premiers œuvres, la requête
+    repart de la position du dernier artwork renvoyé (index de Art_ArtworkID), si bien
+    qu'une page lointaine coûte autant que la première.
+
+    Args:
+        cursor: Position du dernier élément de la page précédente ({id}, et {score} pour
+            une recherche), None pour la première page
+        limit: Nombre d'éléments par page
+        recherche: Recherche full-text optionnelle ; les résultats sont alors triés par pertinence
+
+    Returns:
+        Les œuvres de la page, et la position à passer pour la page suivante (None s'il n'y en a pas)
+    """
+    mode, search = search_mode(recherche, 'artwork_search')
+    if mode == FULLTEXT and search is None:
+        return [], None
+
+    # La page est coupée dans la requête : Neo4j ne garde que $limit + 1 lignes (tri partiel),
+    # la ligne de plus indiquant seulement s'il existe une page suivante
+    if mode:
+        query = SEARCH_MATCHES[mode] + """
+        WHERE $after_score IS NULL
+           OR score < $after_score
+           OR (score = $after_score AND node.Art_ArtworkID > $after_id)
+        WITH node, score
+        ORDER BY score DESC, node.Art_ArtworkID
+        LIMIT $limit + 1
+        WITH collect({artwork: node, score: score}) AS rows
+        RETURN rows[..$limit] AS page, size(rows) > $limit AS has_next
+        """
+    else:
+        query = """
+        MATCH (artwork:Artwork)
+        WHERE artwork.Art_ArtworkID > $after_id
+        WITH artwork
+        ORDER BY artwork.Art_ArtworkID
+        LIMIT $limit + 1
+        WITH collect({artwork: artwork}) AS rows
+        RETURN rows[..$limit] AS page, size(rows) > $limit AS has_next
+        """
+
+    query = query_templates.template('artwork_page_after', mode, query)
+
+    parameters = {
+        "search": search,
+        "recherche": recherche,
+        "after_id": cursor['id'] if cursor else -1,
+        "after_score": cursor.get('score') if cursor and mode else None,
+        "limit": limit
+    }
+    results = execute_read(query=query, parameters=parameters)
+    if results is None:
+        return None, None
+
+    page = results[0]['page']
+    next_cursor = None
+    if results[0]['has_next']:
+        last = page[-1]
+        next_cursor = {'id': last['artwork']['Art_ArtworkID']}
+        if mode:
+            next_cursor['score'] = last['score']
+
+    return [record['artwork'] for record in page], next_cursor
+
+
+def get_cached_total_artwork_count(recherche: str = "") -> int:
+    """
+    get_total_artwork_count, gardé en cache TOTAL_COUNT_CACHE_TTL secondes par recherche
+    """
+    return _total_count_cache.get_or_set(recherche, lambda: get_total_artwork_count(recherche))
+
 
+@graph_events.subscribe
+def _on_graph_event(event: str, **payload) -> None:
+    # Une création, modification ou suppression peut changer le total de n'importe quelle recherche
+    if any(data.get('label') == 'Artwork' for _, data in graph_events.unfold(event, payload)):
+        _total_count_cache.clear()
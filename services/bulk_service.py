@@ -0,0 +1,247 @@
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import id_allocator
+from config.db_connection import execute_data_write
+from services import artist_service, artwork_service, graph_events
+from utils.validators import validate_artist, validate_artwork, validate_relation
+
+# Nombre de lignes écrites par requête (UNWIND) lors d'un import en masse
+BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+# Nombre maximal de lignes détaillées dans chaque liste du rapport ; les compteurs restent exacts
+REPORT_MAX_ROWS = int(os.getenv("BULK_REPORT_MAX_ROWS", "1000"))
+
+BATCH_ERROR = "Failed to write batch. Please try again later."
+
+ARTISTS_QUERY = """
+UNWIND $rows AS row
+CREATE (a:Artist {
+    Ar_ArtistID: row.Ar_ArtistID,
+    Ar_FirstName: row.Ar_FirstName,
+    Ar_LastName: row.Ar_LastName,
+    Ar_BirthDay: row.Ar_BirthDay,
+    Ar_Nationality: row.Ar_Nationality,
+    Ar_Biography: row.Ar_Biography,
+    Ar_ImageURL: row.Ar_ImageURL,
+    Ar_DeathDay: row.Ar_DeathDay,
+    Ar_CountryBirth: row.Ar_CountryBirth,
+    Ar_CountryDeath: row.Ar_CountryDeath,
+    Ar_Movement: row.Ar_Movement
+})
+RETURN row.row_number AS row_number, a AS node, id(a) AS node_id
+"""
+
+ARTWORKS_QUERY = """
+UNWIND $rows AS row
+CREATE (aw:Artwork {
+    Art_ArtworkID: row.Art_ArtworkID,
+    Art_Title: row.Art_Title,
+    Art_Year: row.Art_Year,
+    Art_Description: row.Art_Description,
+    Art_ImageURL: row.Art_ImageURL,
+    Art_Medium: row.Art_Medium,
+    Art_Dimensions: row.Art_Dimensions,
+    Ar_ArtistID: row.Ar_ArtistID
+})
+RETURN row.row_number AS row_number, aw AS node, id(aw) AS node_id
+"""
+
+# Création par lot et message des lignes dont un nœud n'existe pas, par type de relation
+RELATION_WRITERS = {
+    'CREATED': (artist_service.post_create_relations, "Artist or artwork not found"),
+    'INSPIRE': (artwork_service.post_inspire_relations, "Artwork not found")
+}
+
+# Lignes validées d'un lot : (numéro de ligne, données)
+Batch = List[Tuple[int, dict]]
+
+
+def _as_int(value: Any) -> Any:
+    # Les identifiants lus en CSV sont des chaînes
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return value
+
+
+def _import(
+    rows: Iterable[Tuple[int, Any]],
+    normalize: Callable[[dict], dict],
+    validate: Callable[[dict], Optional[str]],
+    write_batch: Callable[[Batch], Optional[Dict[int, Any]]]
+) -> Dict[str, Any]:
+    """
+    Valide les lignes une à une et écrit les lignes valides par lots de BATCH_SIZE.
+    write_batch renvoie, pour chaque ligne écrite, ce qu'il faut ajouter au rapport
+    (avec 'existing' à True si rien n'a été créé), ou un message d'erreur pour une ligne
+    refusée par la base ; None si le lot a échoué.
+    Les écritures de chaque lot sont notifiées en un seul événement (graph_events.batch),
+    dès que le lot est écrit.
+
+    Returns:
+        received: nombre de lignes reçues
+        created: lignes écrites
+        existing: lignes déjà présentes en base, sans écriture
+        errors: lignes refusées ({row, message}), le numéro de ligne commençant à 1
+        counts: nombre de lignes created, existing et errors
+        truncated: True si une liste a été limitée à ses REPORT_MAX_ROWS premières lignes
+    """
+    report: Dict[str, Any] = {
+        'received': 0,
+        'created': [],
+        'existing': [],
+        'errors': [],
+        'counts': {'created': 0, 'existing': 0, 'errors': 0},
+        'truncated': False
+    }
+    batch: Batch = []
+
+    def add(kind: str, entry: dict) -> None:
+        report['counts'][kind] += 1
+        if len(report[kind]) < REPORT_MAX_ROWS:
+            report[kind].append(entry)
+        else:
+            report['truncated'] = True
+
+    def flush() -> None:
+        with graph_events.batch():
+            written = write_batch(batch)
+        for row_number, _ in batch:
+            result = written.get(row_number, BATCH_ERROR) if written is not None else BATCH_ERROR
+            if isinstance(result, str):
+                add('errors', {'row': row_number, 'message': result})
+            elif result.pop('existing', False):
+                add('existing', result)
+            else:
+                add('created', result)
+        batch.clear()
+
+    for row_number, row in rows:
+        report['received'] += 1
+        if not isinstance(row, dict):
+            add('errors', {'row': row_number, 'message': "Row must be an object"})
+            continue
+        row = normalize(row)
+        error = validate(row)
+        if error:
+            add('errors', {'row': row_number, 'message': error})
+            continue
+        batch.append((row_number, row))
+        if len(batch) >= BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    return report
+
+
+def _write_nodes(batch: Batch, label: str, id_field: str, query: str, params: Callable[[dict], dict]) -> Optional[Dict[int, Any]]:
+    ids = id_allocator.next_ids(id_field, len(batch))
+    if ids is None:
+        return None
+    rows = [
+        {**params(row), id_field: new_id, 'row_number': row_number}
+        for (row_number, row), new_id in zip(batch, ids)
+    ]
+    results = execute_data_write(query=query, parameters={'rows': rows})
+    if results is None:
+        return None
+
+    written = {}
+    for record in results:
+        graph_events.publish(graph_events.NODE_CREATED, label=label, node_id=record['node_id'], data=record['node'])
+        written[record['row_number']] = {'row': record['row_number'], id_field: record['node'][id_field]}
+    return written
+
+
+def _artist_params(row: dict) -> dict:
+    return {
+        'Ar_FirstName': row['Ar_FirstName'],
+        'Ar_LastName': row['Ar_LastName'],
+        'Ar_BirthDay': row['Ar_BirthDay'],
+        'Ar_Nationality': row['Ar_Nationality'],
+        'Ar_Biography': row['Ar_Biography'],
+        'Ar_ImageURL': row['Ar_ImageURL'],
+        'Ar_DeathDay': row.get('Ar_DeathDay', ""),
+        'Ar_CountryBirth': row.get('Ar_CountryBirth', ""),
+        'Ar_CountryDeath': row.get('Ar_CountryDeath', ""),
+        'Ar_Movement': row.get('Ar_Movement') or []
+    }
+
+
+def _normalize_artist(row: dict) -> dict:
+    # En CSV, les mouvements sont séparés par des points-virgules
+    if isinstance(row.get('Ar_Movement'), str):
+        row = {**row, 'Ar_Movement': [movement.strip() for movement in row['Ar_Movement'].split(';') if movement.strip()]}
+    return row
+
+
+def _artwork_params(row: dict) -> dict:
+    return {
+        'Art_Title': row['Art_Title'],
+        'Art_Year': row['Art_Year'],
+        'Art_Description': row['Art_Description'],
+        'Art_ImageURL': row['Art_ImageURL'],
+        'Art_Medium': row['Art_Medium'],
+        'Art_Dimensions': row['Art_Dimensions'],
+        'Ar_ArtistID': row.get('Ar_ArtistID', "")
+    }
+
+
+def _normalize_artwork(row: dict) -> dict:
+    if 'Ar_ArtistID' in row:
+        row = {**row, 'Ar_ArtistID': _as_int(row['Ar_ArtistID'])}
+    return row
+
+
+def _normalize_relation(row: dict) -> dict:
+    return {**row, **{field: _as_int(row[field]) for field in ('source', 'target') if field in row}}
+
+
+def _write_relations(batch: Batch) -> Dict[int, Any]:
+    written: Dict[int, Any] = {}
+    for rel_type, (post_relations, missing_message) in RELATION_WRITERS.items():
+        rows = [(row_number, row) for row_number, row in batch if row['type'] == rel_type]
+        if not rows:
+            continue
+        relations = post_relations([(row['source'], row['target']) for _, row in rows])
+        for index, (row_number, _) in enumerate(rows):
+            if relations is None:
+                written[row_number] = BATCH_ERROR
+            elif relations[index] is None:
+                written[row_number] = missing_message
+            else:
+                written[row_number] = {'row': row_number, 'existing': not relations[index]['created']}
+    return written
+
+
+def import_artists(rows: Iterable[Tuple[int, Any]]) -> Dict[str, Any]:
+    """
+    Crée les artistes valides par lots ; chaque ligne suit les règles de POST /artists
+    (Ar_Movement peut être une chaîne de mouvements séparés par des points-virgules).
+    'created' donne l'Ar_ArtistID attribué à chaque ligne.
+    """
+    return _import(
+        rows, _normalize_artist, validate_artist,
+        lambda batch: _write_nodes(batch, 'Artist', 'Ar_ArtistID', ARTISTS_QUERY, _artist_params)
+    )
+
+
+def import_artworks(rows: Iterable[Tuple[int, Any]]) -> Dict[str, Any]:
+    """
+    Crée les œuvres valides par lots ; chaque ligne suit les règles de POST /artworks.
+    'created' donne l'Art_ArtworkID attribué à chaque ligne.
+    """
+    return _import(
+        rows, _normalize_artwork, validate_artwork,
+        lambda batch: _write_nodes(batch, 'Artwork', 'Art_ArtworkID', ARTWORKS_QUERY, _artwork_params)
+    )
+
+
+def import_relations(rows: Iterable[Tuple[int, Any]]) -> Dict[str, Any]:
+    """
+    Crée les relations valides par lots : {type: 'CREATED', source: Ar_ArtistID, target: Art_ArtworkID}
+    ou {type: 'INSPIRE', source: Art_ArtworkID qui inspire, target: Art_ArtworkID inspiré}.
+    Une ligne dont un nœud n'existe pas est signalée en erreur ; une relation qui
+    existait déjà est listée dans 'existing', pas dans 'created'.
+    """
+    return _import(rows, _normalize_relation, validate_relation, _write_relations)
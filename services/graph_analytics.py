@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services import graph_changes, graph_events, graph_service
+
+METRICS = ('pagerank', 'degree', 'components')
+
+DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-8
+PAGERANK_MAX_ITERATIONS = 100
+# Délai avant le recalcul en arrière-plan, pour regrouper les écritures rapprochées
+RECOMPUTE_DELAY = float(os.getenv("GRAPH_ANALYTICS_RECOMPUTE_DELAY", "5"))
+
+_results: Optional[Dict[str, Any]] = None
+_dirty = False
+_compute_lock = threading.Lock()
+# Recalcul en arrière-plan : un seul thread, réveillé par les écritures
+_wakeup = threading.Event()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+def pagerank(sources: np.ndarray, targets: np.ndarray, n: int) -> np.ndarray:
+    """
+    PageRank par itération de puissance. Le produit matrice creuse x vecteur est
+    fait avec np.bincount ; le rang des nœuds sans relation sortante est redistribué
+    uniformément.
+    """
+    if n == 0:
+        return np.zeros(0)
+    out_degree = np.bincount(sources, minlength=n).astype(np.float64)
+    dangling = out_degree == 0
+    inverse_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(PAGERANK_MAX_ITERATIONS):
+        spread = np.bincount(targets, weights=rank[sources] * inverse_degree[sources], minlength=n)
+        new_rank = (1 - DAMPING) / n + DAMPING * (spread + rank[dangling].sum() / n)
+        converged = np.abs(new_rank - rank).sum() < PAGERANK_TOLERANCE
+        rank = new_rank
+        if converged:
+            break
+    return rank
+
+
+def connected_components(sources: np.ndarray, targets: np.ndarray, n: int) -> np.ndarray:
+    """
+    Composantes faiblement connexes : chaque nœud prend le plus petit indice de sa
+    composante, par propagation du minimum le long des arêtes et sauts de pointeurs
+    """
+    labels = np.arange(n)
+    while True:
+        smallest = np.minimum(labels[sources], labels[targets])
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, sources, smallest)
+        np.minimum.at(new_labels, targets, smallest)
+        np.minimum.at(new_labels, labels, new_labels)
+        new_labels = new_labels[new_labels]
+        if np.array_equal(new_labels, labels):
+            return labels
+        labels = new_labels
+
+
+def compute() -> Dict[str, Any]:
+    """
+    Calcule toutes les métriques sur le graphe complet
+    """
+    # Lue avant le graphe, qui contient donc au moins ces écritures des autres workers
+    foreign = graph_changes.foreign_version()
+    records = graph_service.get_graph()
+    if records is None:
+        raise RuntimeError("Erreur lors de la récupération du graphe")
+    record = records[0] if records else {'artists': [], 'artworks': [], 'relations': []}
+
+    nodes = record['artists'] + record['artworks']
+    rows = {node['id']: row for row, node in enumerate(nodes)}
+    n = len(nodes)
+    edges = [
+        (rows[relation['source']], rows[relation['target']])
+        for relation in record['relations']
+        if relation['source'] in rows and relation['target'] in rows
+    ]
+    sources = np.array([source for source, _ in edges], dtype=np.int64)
+    targets = np.array([target for _, target in edges], dtype=np.int64)
+
+    timings = {}
+
+    start = time.perf_counter()
+    in_degree = np.bincount(targets, minlength=n)
+    out_degree = np.bincount(sources, minlength=n)
+    timings['degree'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rank = pagerank(sources, targets, n)
+    timings['pagerank'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels = connected_components(sources, targets, n)
+    timings['components'] = time.perf_counter() - start
+
+    return {
+        'node_ids': np.array([node['id'] for node in nodes], dtype=np.int64),
+        'types': [node['type'] for node in nodes],
+        'in_degree': in_degree,
+        'out_degree': out_degree,
+        'pagerank': rank,
+        'components': labels,
+        'edges': len(sources),
+        'timings': timings,
+        'computed_at': time.time(),
+        'foreign': foreign
+    }
+
+
+def _recompute(if_missing: bool = False) -> None:
+    """
+    Recalcule les métriques ; avec if_missing, seulement si aucun résultat n'est
+    encore en cache (vérifié sous le verrou : des premières demandes simultanées
+    ne font qu'un calcul)
+    """
+    global _results, _dirty
+    with _compute_lock:
+        if if_missing and _results is not None:
+            return
+        _dirty = False
+        try:
+            _results = compute()
+        except Exception as e:
+            _dirty = True
+            print(f"Erreur lors du recalcul des métriques du graphe : {e}")
+
+
+def _get_results() -> Dict[str, Any]:
+    if _results is None:
+        _recompute(if_missing=True)
+        if _results is None:
+            raise RuntimeError("Métriques du graphe indisponibles")
+    return _results
+
+
+def _top(results: Dict[str, Any], scores: np.ndarray, limit: int) -> List[Dict[str, Any]]:
+    order = np.argsort(-scores, kind='stable')[:limit]
+    return [
+        {
+            'id': int(results['node_ids'][row]),
+            'type': results['types'][row],
+            'score': scores[row].item(),
+            'in': int(results['in_degree'][row]),
+            'out': int(results['out_degree'][row])
+        }
+        for row in order
+    ]
+
+
+def get_metric(metric: str, limit: int = 100) -> Dict[str, Any]:
+    """
+    Résultat d'une métrique ('pagerank', 'degree' ou 'components') pour les `limit`
+    premiers nœuds (ou composantes). Les résultats sont en cache ; après une écriture,
+    de ce processus ou d'un autre worker, la version en cache est servie (stale: true)
+    pendant le recalcul en arrière-plan.
+    """
+    global _dirty
+    results = _get_results()
+    foreign = graph_changes.foreign_version()
+    if foreign is not None and (results['foreign'] is None or foreign > results['foreign']) and not _dirty:
+        _dirty = True
+        _schedule_recompute()
+
+    if metric == 'pagerank':
+        data = {'nodes': _top(results, results['pagerank'], limit)}
+    elif metric == 'degree':
+        data = {'nodes': _top(results, results['in_degree'] + results['out_degree'], limit)}
+    else:
+        labels = results['components']
+        roots, sizes = np.unique(labels, return_counts=True)
+        order = np.argsort(-sizes, kind='stable')[:limit]
+        data = {
+            'count': len(roots),
+            'components': [
+                {'size': int(sizes[i]), 'nodes': results['node_ids'][labels == roots[i]].tolist()}
+                for i in order
+            ]
+        }
+
+    return {
+        'metric': metric,
+        **data,
+        'node_count': len(results['node_ids']),
+        'edge_count': results['edges'],
+        'duration_ms': results['timings'][metric] * 1000,
+        'computed_at': results['computed_at'],
+        'stale': _dirty
+    }
+
+
+def _recompute_loop() -> None:
+    """
+    Attend une écriture, laisse passer RECOMPUTE_DELAY secondes pour regrouper les
+    écritures suivantes, puis recalcule une seule fois pour toutes
+    """
+    while True:
+        _wakeup.wait()
+        time.sleep(RECOMPUTE_DELAY)
+        _wakeup.clear()
+        _recompute()
+
+
+def _schedule_recompute() -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_recompute_loop, name="graph-analytics", daemon=True)
+            _worker.start()
+    _wakeup.set()
+
+
+@graph_events.subscribe
+def _on_graph_event(event: str, **payload) -> None:
+    global _dirty
+    if _results is not None:
+        _dirty = True
+        _schedule_recompute()
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from config.db_connection import local_data_writes, read_data_version
+from services import graph_events
+from utils.entity_cache import entity_cache
+
+# Nombre d'écritures gardées dans le journal ; au-delà, le client doit tout recharger
+CHANGE_LOG_SIZE = int(os.getenv("GRAPH_CHANGE_LOG_SIZE", "10000"))
+
+# Identifie le processus : la version repart de 0 à chaque démarrage
+EPOCH = uuid.uuid4().hex
+
+# Délai (secondes) pendant lequel la version des données écrites par les autres workers
+# est réutilisée sans relire la base ; les écritures de ce processus comptent aussitôt
+DATA_VERSION_REFRESH = float(os.getenv("GRAPH_DATA_VERSION_REFRESH", "1"))
+
+_version = 0
+_log: Deque[Tuple[int, str, dict]] = deque(maxlen=CHANGE_LOG_SIZE)
+_lock = threading.Lock()
+# Écritures des autres workers à la dernière lecture de la base, et date de cette lecture
+_foreign_version: Optional[int] = None
+_foreign_read_at = 0.0
+_refresh_lock = threading.Lock()
+
+
+def _epoch(foreign: Optional[int]) -> str:
+    # Le processus, et les écritures des autres workers déjà comptées (absentes du journal)
+    return f"{EPOCH}:{'?' if foreign is None else foreign}"
+
+
+def current_position() -> Tuple[int, str]:
+    """
+    Version du journal de ce processus et epoch à passer ensuite à get_changes :
+    l'epoch identifie le processus et le nombre d'écritures des autres workers à ce moment
+    """
+    foreign = foreign_version()
+    return _version, _epoch(foreign)
+
+
+def foreign_version() -> Optional[int]:
+    """
+    Nombre d'écritures de données validées par les autres workers, relu dans Neo4j au
+    plus une fois toutes les DATA_VERSION_REFRESH secondes (un seul thread relit, les
+    autres gardent la valeur précédente). Renvoie None si elle n'a jamais pu être lue.
+    """
+    global _foreign_version, _foreign_read_at
+    if _foreign_version is not None and time.monotonic() - _foreign_read_at < DATA_VERSION_REFRESH:
+        return _foreign_version
+    if not _refresh_lock.acquire(blocking=_foreign_version is None):
+        return _foreign_version
+    try:
+        local = local_data_writes()
+        total = read_data_version()
+        # Une écriture de ce processus validée pendant la lecture fausserait la différence :
+        # la valeur précédente est gardée jusqu'à la prochaine lecture
+        if total is not None and local_data_writes() == local:
+            _foreign_version = max(_foreign_version or 0, total - local)
+            _foreign_read_at = time.monotonic()
+    finally:
+        _refresh_lock.release()
+    return _foreign_version
+
+
+def data_version() -> Optional[int]:
+    """
+    Version des données commune à tous les workers : nombre d'écritures validées par
+    tous les processus (voir config.db_connection.read_data_version). Celles de ce
+    processus sont comptées aussitôt, celles des autres avec au plus
+    DATA_VERSION_REFRESH secondes de retard. None si la base n'a jamais répondu.
+    """
+    foreign = foreign_version()
+    return None if foreign is None else foreign + local_data_writes()
+
+
+def etag_version() -> Optional[str]:
+    """
+    Version des données pour les ETag (voir data_version), ou None si elle est inconnue
+    """
+    version = data_version()
+    return None if version is None else str(version)
+
+
+def get_changes(since: int, epoch: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Modifications du graphe postérieures à la version since, fusionnées :
+    un nœud créé puis supprimé n'apparaît pas, un nœud modifié plusieurs fois
+    n'apparaît qu'une fois avec ses dernières données.
+
+    Les relations d'un nœud supprimé ne sont pas listées : le client les retire
+    avec le nœud.
+
+    Le journal ne contient que les écritures de ce processus. Celles des autres
+    workers sont détectées par la version partagée des données (voir foreign_version),
+    au plus DATA_VERSION_REFRESH secondes après : le client doit alors tout recharger.
+
+    Returns:
+        version: version actuelle, à renvoyer au prochain appel
+        epoch: à renvoyer au prochain appel (voir current_position)
+        reset: True si les modifications ne sont pas connues de ce processus (journal
+            dépassé, version inconnue, autre processus, écritures d'autres workers
+            ou epoch absent) : le graphe est à recharger
+        nodes: added / updated (nœuds au format de /graphs) et removed (identifiants)
+        relations: added / removed ({source, target, type})
+    """
+    foreign = foreign_version()
+    with _lock:
+        version = _version
+        entries = [entry for entry in _log if entry[0] > since]
+        oldest = _log[0][0] if _log else version + 1
+
+    changes: Dict[str, Any] = {
+        'version': version,
+        'epoch': _epoch(foreign),
+        'reset': foreign is None or epoch != _epoch(foreign) or since > version or since < oldest - 1,
+        'nodes': {'added': [], 'updated': [], 'removed': []},
+        'relations': {'added': [], 'removed': []}
+    }
+    if changes['reset']:
+        return changes
+
+    # État final de chaque nœud et relation touchés : (état, données)
+    nodes: Dict[int, Tuple[str, Optional[dict]]] = {}
+    relations: Dict[Tuple[int, int, str], str] = {}
+
+    for _, event, payload in entries:
+        if event in (graph_events.NODE_CREATED, graph_events.NODE_UPDATED):
+            node_id = payload['node_id']
+            state = 'added' if event == graph_events.NODE_CREATED or nodes.get(node_id, ('',))[0] == 'added' else 'updated'
+            nodes[node_id] = (state, {'data': payload['data'], 'id': node_id, 'type': payload['label']})
+        elif event == graph_events.NODE_DELETED:
+            node_id = payload['node_id']
+            if nodes.get(node_id, ('',))[0] == 'added':
+                del nodes[node_id]
+            else:
+                nodes[node_id] = ('removed', None)
+        else:
+            key = (payload['source'], payload['target'], payload['type'])
+            state = 'added' if event == graph_events.RELATION_CREATED else 'removed'
+            if relations.get(key, state) != state:
+                # Création puis suppression (ou l'inverse) : sans effet
+                del relations[key]
+            else:
+                relations[key] = state
+
+    for node_id, (state, node) in nodes.items():
+        changes['nodes'][state].append(node_id if state == 'removed' else node)
+    for (source, target, rel_type), state in relations.items():
+        if state == 'added' and (nodes.get(source, ('',))[0] == 'removed' or nodes.get(target, ('',))[0] == 'removed'):
+            continue
+        changes['relations'][state].append({'source': source, 'target': target, 'type': rel_type})
+
+    return changes
+
+
+@graph_events.subscribe
+def _on_graph_event(event: str, **payload) -> None:
+    global _version
+    with _lock:
+        for change, data in graph_events.unfold(event, payload):
+            _version += 1
+            _log.append((_version, change, data))
+
+
+# Le cache des entités de chaque processus suit les écritures des autres workers : il est
+# vidé quand elles changent (celles de ce processus invalident leurs entrées exactes)
+entity_cache.follow_version(foreign_version)
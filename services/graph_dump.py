@@ -0,0 +1,349 @@
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import click
+import msgpack
+from flask.cli import AppGroup
+
+from config.db_connection import execute_data_write, execute_read, execute_write, stream_query
+
+# Fichier de snapshot lu au démarrage pour remplir les structures en mémoire (vide = désactivé)
+SNAPSHOT_FILE = os.getenv("GRAPH_SNAPSHOT_FILE", "")
+# Âge maximal (secondes) du fichier pour être utilisé au démarrage (0 = sans limite)
+SNAPSHOT_FILE_MAX_AGE = float(os.getenv("GRAPH_SNAPSHOT_FILE_MAX_AGE", "3600"))
+# Nombre de nœuds ou de relations par bloc du fichier
+CHUNK_SIZE = int(os.getenv("GRAPH_DUMP_CHUNK_SIZE", "5000"))
+# Nombre de lignes écrites par requête lors d'une restauration (même réglage que l'import en masse)
+RESTORE_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+
+# Format du fichier (petit-boutiste) :
+# - en-tête : MAGIC, version (uint16), date de l'export (float64, secondes depuis l'epoch),
+#   puis l'état de la base lu avant l'export (int64 : nœuds, relations, version des données)
+# - blocs : type (1 octet : N nœuds, E relations, Z fin), longueur (uint32), puis le
+#   bloc en colonnes encodé en MessagePack et compressé avec zlib
+# Le bloc Z marque la fin : un fichier sans lui est incomplet.
+MAGIC = b'ERUAGRPH'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<8sHdqqq')
+CHUNK_HEADER = struct.Struct('<cI')
+NODES, EDGES, END = b'N', b'E', b'Z'
+
+LABELS = ('Artist', 'Artwork')
+# Propriété identifiant chaque label, utilisée pour retrouver les nœuds à la restauration
+KEYS = {'Artist': 'Ar_ArtistID', 'Artwork': 'Art_ArtworkID'}
+
+EXPORT_NODES_QUERY = """
+MATCH (node)
+WHERE node:Artist OR node:Artwork
+RETURN id(node) AS id, CASE WHEN node:Artist THEN 0 ELSE 1 END AS label, node AS data
+"""
+
+EXPORT_EDGES_QUERY = """
+MATCH (source)-[relation]->(target)
+WHERE (source:Artist OR source:Artwork) AND (target:Artist OR target:Artwork)
+RETURN id(source) AS source, id(target) AS target, type(relation) AS type,
+       CASE WHEN source:Artist THEN 0 ELSE 1 END AS source_label,
+       CASE WHEN target:Artist THEN 0 ELSE 1 END AS target_label,
+       coalesce(source.Ar_ArtistID, source.Art_ArtworkID) AS source_key,
+       coalesce(target.Ar_ArtistID, target.Art_ArtworkID) AS target_key
+"""
+
+COUNTERS_QUERY = """
+CALL {
+    MATCH (a:Artist) RETURN 'Ar_ArtistID' AS name, max(a.Ar_ArtistID) AS high
+    UNION
+    MATCH (aw:Artwork) RETURN 'Art_ArtworkID' AS name, max(aw.Art_ArtworkID) AS high
+}
+WITH name, high WHERE high IS NOT NULL
+MERGE (c:Counter {name: name})
+ON CREATE SET c.count = high
+SET c.count = CASE WHEN c.count < high THEN high ELSE c.count END
+"""
+
+
+# État de la base comparé à celui du fichier avant un démarrage à chaud : nombres de
+# nœuds et de relations (tenus à jour par Neo4j, sans parcours) et version des données
+# incrémentée par chaque écriture de l'API (config.db_connection.execute_data_write)
+WATERMARK_QUERY = """
+CALL { MATCH (artist:Artist) RETURN count(artist) AS artists }
+CALL { MATCH (artwork:Artwork) RETURN count(artwork) AS artworks }
+CALL { MATCH ()-[relation]->() RETURN count(relation) AS relations }
+CALL { MATCH (v:DataVersion) RETURN sum(v.count) AS version }
+RETURN artists + artworks AS nodes, relations, version
+"""
+
+Watermark = Tuple[int, int, int]
+
+
+def read_watermark() -> Optional[Watermark]:
+    """
+    État actuel de la base (nœuds, relations, version des données), ou None si elle ne répond pas
+    """
+    results = execute_read(WATERMARK_QUERY)
+    if not results:
+        return None
+    return results[0]['nodes'], results[0]['relations'], results[0]['version']
+
+
+def _pack(typecode: str, values: List[int]) -> bytes:
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(typecode: str, data: bytes) -> array:
+    unpacked = array(typecode)
+    unpacked.frombytes(data)
+    if sys.byteorder == 'big':
+        unpacked.byteswap()
+    return unpacked
+
+
+def _encode_nodes(rows: List[dict]) -> Dict[str, Any]:
+    keys = sorted({key for row in rows for key in row['data']})
+    return {
+        'id': _pack('q', [row['id'] for row in rows]),
+        'label': _pack('B', [row['label'] for row in rows]),
+        # Une colonne par propriété ; None = propriété absente du nœud
+        'columns': {key: [row['data'].get(key) for row in rows] for key in keys}
+    }
+
+
+def _encode_edges(rows: List[dict]) -> Dict[str, Any]:
+    types = sorted({row['type'] for row in rows})
+    return {
+        'types': types,
+        'type': _pack('B', [types.index(row['type']) for row in rows]),
+        'source': _pack('q', [row['source'] for row in rows]),
+        'target': _pack('q', [row['target'] for row in rows]),
+        'source_label': _pack('B', [row['source_label'] for row in rows]),
+        'target_label': _pack('B', [row['target_label'] for row in rows]),
+        'source_key': [row['source_key'] for row in rows],
+        'target_key': [row['target_key'] for row in rows]
+    }
+
+
+def _write_chunk(file, kind: bytes, chunk: Optional[Dict[str, Any]] = None) -> None:
+    payload = zlib.compress(msgpack.packb(chunk, use_bin_type=True, default=str)) if chunk is not None else b''
+    file.write(CHUNK_HEADER.pack(kind, len(payload)))
+    file.write(payload)
+
+
+def export_graph(path: str, chunk_size: int = CHUNK_SIZE) -> Tuple[int, int]:
+    """
+    Écrit tous les artistes, œuvres et relations dans le fichier path, bloc par bloc :
+    seul un bloc de chunk_size éléments est en mémoire à la fois.
+    Le fichier est écrit à côté puis renommé : un export interrompu ne remplace pas
+    le fichier précédent. L'état de la base est lu avant l'export : une écriture
+    pendant l'export le rend différent, et le fichier ne servira pas au démarrage.
+
+    Returns:
+        Nombre de nœuds et de relations exportés
+    """
+    watermark = read_watermark()
+    if watermark is None:
+        raise RuntimeError("Impossible de lire l'état de la base avant l'export")
+    counts = {NODES: 0, EDGES: 0}
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, time.time(), *watermark))
+        for kind, query, encode in ((NODES, EXPORT_NODES_QUERY, _encode_nodes), (EDGES, EXPORT_EDGES_QUERY, _encode_edges)):
+            rows: List[dict] = []
+            for record in stream_query(query, fetch_size=chunk_size):
+                rows.append(record)
+                if len(rows) >= chunk_size:
+                    _write_chunk(file, kind, encode(rows))
+                    counts[kind] += len(rows)
+                    rows = []
+            if rows:
+                _write_chunk(file, kind, encode(rows))
+                counts[kind] += len(rows)
+        _write_chunk(file, END)
+    os.replace(temporary_path, path)
+    return counts[NODES], counts[EDGES]
+
+
+def read_header(path: str) -> Tuple[int, float, Watermark]:
+    """
+    Version du format, date de l'export et état de la base au moment de l'export
+
+    Raises:
+        ValueError: Si le fichier n'est pas un snapshot du graphe ou si sa version n'est pas supportée
+    """
+    with open(path, 'rb') as file:
+        header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} n'est pas un snapshot du graphe")
+    magic, version, exported_at, *watermark = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} n'est pas un snapshot du graphe")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Version de snapshot non supportée : {version}")
+    return version, exported_at, tuple(watermark)
+
+
+def _iter_chunks(path: str, wanted: bytes) -> Iterator[Dict[str, Any]]:
+    """
+    Blocs du type wanted, décompressés un à un ; les autres blocs sont sautés sans être lus
+    """
+    read_header(path)
+    with open(path, 'rb') as file:
+        file.seek(HEADER.size)
+        while True:
+            chunk_header = file.read(CHUNK_HEADER.size)
+            if len(chunk_header) < CHUNK_HEADER.size:
+                raise ValueError(f"Snapshot incomplet : {path}")
+            kind, length = CHUNK_HEADER.unpack(chunk_header)
+            if kind == END:
+                return
+            if kind != wanted:
+                file.seek(length, os.SEEK_CUR)
+                continue
+            payload = file.read(length)
+            if len(payload) < length:
+                raise ValueError(f"Snapshot incomplet : {path}")
+            try:
+                payload = zlib.decompress(payload)
+            except zlib.error as e:
+                raise ValueError(f"Snapshot corrompu : {path} ({e})")
+            yield msgpack.unpackb(payload, raw=False)
+
+
+def iter_nodes(path: str) -> Iterator[Tuple[int, str, dict]]:
+    """
+    Nœuds du fichier : (identifiant Neo4j au moment de l'export, label, propriétés)
+    """
+    for chunk in _iter_chunks(path, NODES):
+        ids, labels, columns = _unpack('q', chunk['id']), _unpack('B', chunk['label']), chunk['columns']
+        for row, node_id in enumerate(ids):
+            data = {key: values[row] for key, values in columns.items() if values[row] is not None}
+            yield node_id, LABELS[labels[row]], data
+
+
+def iter_edges(path: str) -> Iterator[Tuple[int, int, str]]:
+    """
+    Relations du fichier : (identifiant source, identifiant cible, type)
+    """
+    for chunk in _iter_chunks(path, EDGES):
+        types = chunk['types']
+        for source, target, rel_type in zip(_unpack('q', chunk['source']), _unpack('q', chunk['target']), _unpack('B', chunk['type'])):
+            yield source, target, types[rel_type]
+
+
+def usable_snapshot_file() -> Optional[str]:
+    """
+    Chemin de GRAPH_SNAPSHOT_FILE s'il peut servir au démarrage : présent, lisible,
+    exporté depuis moins de GRAPH_SNAPSHOT_FILE_MAX_AGE secondes, et la base est
+    toujours dans l'état lu à l'export (mêmes nombres de nœuds et de relations, même
+    version des données). Sinon les structures sont chargées depuis Neo4j.
+    Le fichier est à régénérer (flask graph export) avant chaque déploiement, depuis
+    la même base (les relations y sont rangées par identifiant Neo4j des nœuds).
+    """
+    if not SNAPSHOT_FILE or not os.path.exists(SNAPSHOT_FILE):
+        return None
+    try:
+        _, exported_at, watermark = read_header(SNAPSHOT_FILE)
+    except (OSError, ValueError) as e:
+        print(f"Snapshot du graphe ignoré : {e}")
+        return None
+    if SNAPSHOT_FILE_MAX_AGE and time.time() - exported_at > SNAPSHOT_FILE_MAX_AGE:
+        print(f"Snapshot du graphe ignoré : {SNAPSHOT_FILE} a plus de {SNAPSHOT_FILE_MAX_AGE:.0f}s")
+        return None
+    current = read_watermark()
+    if current != watermark:
+        print(f"Snapshot du graphe ignoré : la base a changé depuis l'export (fichier {watermark}, base {current})")
+        return None
+    return SNAPSHOT_FILE
+
+
+def _write_batches(query: str, rows: List[dict], batch_size: int) -> None:
+    for start in range(0, len(rows), batch_size):
+        if execute_data_write(query, {'rows': rows[start:start + batch_size]}) is None:
+            raise RuntimeError("Échec de l'écriture d'un lot pendant la restauration")
+
+
+def restore_graph(path: str, batch_size: int = RESTORE_BATCH_SIZE) -> Tuple[int, int]:
+    """
+    Écrit le contenu du fichier dans Neo4j par lots, bloc par bloc. Les nœuds sont
+    retrouvés par leur identifiant métier (Ar_ArtistID, Art_ArtworkID) : une
+    restauration dans une base qui les contient déjà les met à jour sans doublon.
+    Les compteurs d'identifiants sont ensuite avancés au-delà des identifiants restaurés.
+    Les serveurs déjà démarrés voient ces écritures par la version des données, comme
+    celles d'un autre worker (le fichier ne correspond plus à la base pour un démarrage
+    à chaud : réexporter).
+
+    Returns:
+        Nombre de nœuds et de relations restaurés
+    """
+    node_count = edge_count = 0
+
+    for chunk in _iter_chunks(path, NODES):
+        labels = _unpack('B', chunk['label'])
+        columns = chunk['columns']
+        rows_by_label: Dict[str, List[dict]] = {label: [] for label in LABELS}
+        for row in range(len(labels)):
+            data = {key: values[row] for key, values in columns.items() if values[row] is not None}
+            label = LABELS[labels[row]]
+            if data.get(KEYS[label]) is not None:
+                rows_by_label[label].append(data)
+        for label, rows in rows_by_label.items():
+            query = f"""
+            UNWIND $rows AS row
+            MERGE (node:{label} {{{KEYS[label]}: row.{KEYS[label]}}})
+            SET node = row
+            """
+            _write_batches(query, rows, batch_size)
+            node_count += len(rows)
+
+    for chunk in _iter_chunks(path, EDGES):
+        types = chunk['types']
+        groups: Dict[Tuple[str, str, str], List[dict]] = {}
+        for rel_type, source_label, target_label, source_key, target_key in zip(
+            _unpack('B', chunk['type']), _unpack('B', chunk['source_label']), _unpack('B', chunk['target_label']),
+            chunk['source_key'], chunk['target_key']
+        ):
+            key = (types[rel_type], LABELS[source_label], LABELS[target_label])
+            groups.setdefault(key, []).append({'source': source_key, 'target': target_key})
+        for (rel_type, source_label, target_label), rows in groups.items():
+            # Le type vient du fichier : il est inséré dans la requête entre accents graves
+            query = f"""
+            UNWIND $rows AS row
+            MATCH (source:{source_label} {{{KEYS[source_label]}: row.source}})
+            MATCH (target:{target_label} {{{KEYS[target_label]}: row.target}})
+            MERGE (source)-[:`{rel_type.replace('`', '')}`]->(target)
+            """
+            _write_batches(query, rows, batch_size)
+            edge_count += len(rows)
+
+    if execute_write(COUNTERS_QUERY) is None:
+        raise RuntimeError("Impossible de mettre à jour les compteurs d'identifiants")
+    return node_count, edge_count
+
+
+graph_cli = AppGroup('graph', help="Export et restauration du graphe dans un fichier de snapshot")
+
+
+@graph_cli.command('export')
+@click.argument('path')
+@click.option('--chunk-size', default=CHUNK_SIZE, show_default=True, help="Nœuds ou relations par bloc")
+def export_command(path: str, chunk_size: int) -> None:
+    """Exporte les artistes, œuvres et relations dans le fichier PATH."""
+    start = time.perf_counter()
+    node_count, edge_count = export_graph(path, chunk_size)
+    click.echo(f"{node_count} nœuds et {edge_count} relations exportés en {time.perf_counter() - start:.2f}s.")
+
+
+@graph_cli.command('restore')
+@click.argument('path')
+@click.option('--batch-size', default=RESTORE_BATCH_SIZE, show_default=True, help="Lignes par requête")
+def restore_command(path: str, batch_size: int) -> None:
+    """Écrit le contenu du fichier PATH dans Neo4j."""
+    start = time.perf_counter()
+    node_count, edge_count = restore_graph(path, batch_size)
+    click.echo(f"{node_count} nœuds et {edge_count} relations restaurés en {time.perf_counter() - start:.2f}s.")
@@ -0,0 +1,77 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Tuple
+
+# Événements publiés par les services d'écriture (artist_service, artwork_service)
+NODE_CREATED = 'node_created'
+NODE_UPDATED = 'node_updated'
+NODE_DELETED = 'node_deleted'
+RELATION_CREATED = 'relation_created'
+RELATION_DELETED = 'relation_deleted'
+# Plusieurs écritures publiées ensemble (voir batch) : events, liste de (événement, données)
+BATCH = 'batch'
+
+_listeners: List[Callable[..., None]] = []
+# Événements retenus par batch, pour le thread courant
+_pending = threading.local()
+
+
+def subscribe(listener: Callable[..., None]) -> Callable[..., None]:
+    """
+    Abonne une fonction aux modifications du graphe.
+
+    La fonction est appelée avec le nom de l'événement puis ses données :
+    - node_created / node_updated: label, node_id, data
+    - node_deleted: label, node_id
+    - relation_created / relation_deleted: type, source, target
+    - batch: events, les événements ci-dessus publiés ensemble (voir unfold)
+    (node_id, source et target sont les identifiants internes Neo4j)
+    """
+    _listeners.append(listener)
+    return listener
+
+
+def unfold(event: str, payload: dict) -> List[Tuple[str, dict]]:
+    """
+    Les événements contenus dans une notification : ceux d'un batch, ou l'événement lui-même
+    """
+    return payload['events'] if event == BATCH else [(event, payload)]
+
+
+@contextmanager
+def batch() -> Iterator[None]:
+    """
+    Retient les événements publiés par ce thread dans le bloc, puis les publie en un
+    seul événement batch à la sortie (même en cas d'exception : les écritures déjà
+    validées restent notifiées). Les blocs imbriqués rejoignent le bloc englobant.
+    """
+    if getattr(_pending, 'events', None) is not None:
+        yield
+        return
+    _pending.events = []
+    try:
+        yield
+    finally:
+        events, _pending.events = _pending.events, None
+        if events:
+            _notify(BATCH, {'events': events})
+
+
+def publish(event: str, **payload) -> None:
+    """
+    Notifie tous les abonnés d'une écriture réussie (à la fin du bloc batch en cours s'il y en a un).
+    Une erreur d'un abonné ne doit jamais faire échouer l'écriture.
+    """
+    events = getattr(_pending, 'events', None)
+    if events is not None:
+        events.append((event, payload))
+        return
+    _notify(event, payload)
+
+
+def _notify(event: str, payload: dict) -> None:
+    for listener in list(_listeners):
+        try:
+            listener(event, **payload)
+        except Exception as e:
+            print(f"Erreur lors de la notification de l'événement '{event}' : {e}")
@@ -0,0 +1,320 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services import graph_changes, graph_events, graph_service
+
+# Nombre d'itérations pour un calcul complet, et pour affiner une disposition existante
+LAYOUT_ITERATIONS = int(os.getenv("GRAPH_LAYOUT_ITERATIONS", "100"))
+LAYOUT_REFINE_ITERATIONS = int(os.getenv("GRAPH_LAYOUT_REFINE_ITERATIONS", "30"))
+# Nombre de combinaisons de filtres gardées en cache
+LAYOUT_CACHE_SIZE = int(os.getenv("GRAPH_LAYOUT_CACHE_SIZE", "32"))
+# Nombre de lignes traitées à la fois pour la répulsion, pour borner la mémoire à BLOCK x n
+BLOCK_SIZE = 512
+# Nombre d'écritures dont on garde les nœuds touchés ; une disposition plus ancienne
+# que ce journal est affinée en entier
+TOUCHED_LOG_SIZE = 10000
+
+_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+# Ne protège que le cache, le journal et les calculs en cours : les calculs se font en dehors
+_lock = threading.Lock()
+# Incrémenté à chaque écriture ; une disposition calculée avant est à affiner
+_generation = 0
+# Nœuds touchés par chaque écriture : (génération, identifiants Neo4j)
+_touched: Deque[Tuple[int, Tuple[int, ...]]] = deque(maxlen=TOUCHED_LOG_SIZE)
+# Combinaisons de filtres en cours de calcul, et erreurs des calculs en arrière-plan
+_computing: Set[tuple] = set()
+_errors: Dict[tuple, Exception] = {}
+
+
+def force_directed_layout(
+        positions: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        iterations: int,
+        temperature: float = 0.1,
+        movable: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Algorithme de Fruchterman-Reingold vectorisé.
+
+    Args:
+        positions: Positions de départ (n x 2), dans le carré unité
+        sources: Lignes de départ des arêtes
+        targets: Lignes d'arrivée des arêtes
+        iterations: Nombre d'itérations
+        temperature: Déplacement maximal d'un nœud à la première itération
+        movable: Lignes des nœuds à déplacer (toutes par défaut) ; les autres restent
+            fixes mais exercent leurs forces. Une itération coûte O(m x n) pour m lignes.
+
+    Returns:
+        Les nouvelles positions (n x 2)
+    """
+    positions = positions.astype(np.float64, copy=True)
+    n = len(positions)
+    rows = np.arange(n) if movable is None else movable
+    if n < 2 or iterations <= 0 or not len(rows):
+        return positions
+
+    k = 1.0 / np.sqrt(n)
+    cooling = temperature / iterations
+
+    # Arêtes dont une extrémité bouge, avec l'indice de chaque extrémité dans rows (-1 = fixe)
+    slots = np.full(n, -1, dtype=np.int64)
+    slots[rows] = np.arange(len(rows))
+    moving = (slots[sources] >= 0) | (slots[targets] >= 0)
+    sources, targets = sources[moving], targets[moving]
+    source_slots, target_slots = slots[sources], slots[targets]
+    source_moves, target_moves = source_slots >= 0, target_slots >= 0
+
+    for _ in range(iterations):
+        displacement = np.zeros((len(rows), 2))
+
+        # Répulsion entre toutes les paires de nœuds : k² / d, le long de (pi - pj) / d.
+        # Avec w = k² / d², la somme des (pi - pj) * w vaut pi * somme(w) - w @ p
+        for start in range(0, len(rows), BLOCK_SIZE):
+            block = positions[rows[start:start + BLOCK_SIZE]]
+            dx = block[:, 0, None] - positions[None, :, 0]
+            dy = block[:, 1, None] - positions[None, :, 1]
+            weights = dx * dx
+            weights += dy * dy
+            np.maximum(weights, 1e-6, out=weights)
+            np.divide(k * k, weights, out=weights)
+            displacement[start:start + BLOCK_SIZE] += block * weights.sum(axis=1)[:, None] - weights @ positions
+
+        # Attraction le long des arêtes : d² / k
+        if len(sources):
+            delta = positions[sources] - positions[targets]
+            distance = np.sqrt((delta ** 2).sum(axis=1))
+            force = delta * (distance / k)[:, None]
+            np.subtract.at(displacement, source_slots[source_moves], force[source_moves])
+            np.add.at(displacement, target_slots[target_moves], force[target_moves])
+
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), 1e-9)
+        positions[rows] += displacement / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature = max(temperature - cooling, 1e-4)
+
+    return positions
+
+
+def _initial_positions(
+        node_ids: List[int],
+        sources: np.ndarray,
+        targets: np.ndarray,
+        previous: Optional[Dict[int, Tuple[float, float]]]
+) -> np.ndarray:
+    """
+    Reprend les positions connues ; un nouveau nœud est placé près de ses voisins déjà
+    positionnés, ou au hasard s'il n'en a pas
+    """
+    rng = np.random.default_rng(len(node_ids))
+    positions = rng.random((len(node_ids), 2))
+    if not previous:
+        return positions
+
+    known = np.array([node_id in previous for node_id in node_ids], dtype=bool)
+    for row, node_id in enumerate(node_ids):
+        if known[row]:
+            positions[row] = previous[node_id]
+
+    new_rows = np.flatnonzero(~known)
+    if len(new_rows) and len(sources):
+        # Moyenne des positions des voisins connus, avec un léger décalage
+        ends = np.concatenate([sources, targets])
+        others = np.concatenate([targets, sources])
+        mask = ~known[ends] & known[others]
+        sums = np.zeros_like(positions)
+        counts = np.zeros(len(node_ids))
+        np.add.at(sums, ends[mask], positions[others[mask]])
+        np.add.at(counts, ends[mask], 1)
+        placed = new_rows[counts[new_rows] > 0]
+        positions[placed] = sums[placed] / counts[placed, None] + rng.normal(0, 0.01, (len(placed), 2))
+
+    return positions
+
+
+def _movable_rows(
+        node_ids: List[int],
+        sources: np.ndarray,
+        targets: np.ndarray,
+        previous: Dict[int, Tuple[float, float]],
+        touched: Optional[Set[int]]
+) -> Optional[np.ndarray]:
+    """
+    Lignes à déplacer pour affiner une disposition : nœuds touchés par les écritures,
+    nœuds sans position connue, et leurs voisins. None pour déplacer tous les nœuds
+    (écritures trop anciennes pour le journal, ou voisinage couvrant tout le graphe).
+    """
+    if touched is None:
+        return None
+    seeds = np.array([node_id in touched or node_id not in previous for node_id in node_ids], dtype=bool)
+    movable = seeds.copy()
+    movable[targets[seeds[sources]]] = True
+    movable[sources[seeds[targets]]] = True
+    if movable.all():
+        return None
+    return np.flatnonzero(movable)
+
+
+def _touched_since(generation: int) -> Optional[Set[int]]:
+    """
+    Nœuds touchés par les écritures postérieures à generation, ou None si le journal
+    ne remonte pas jusque-là. À appeler avec _lock.
+    """
+    if generation < _generation and (not _touched or _touched[0][0] > generation + 1):
+        return None
+    return {node_id for entry_generation, node_ids in _touched if entry_generation > generation for node_id in node_ids}
+
+
+def _cache_key(filters: Dict[str, Any]) -> tuple:
+    return tuple(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in sorted(filters.items())
+    )
+
+
+def _compute(
+        key: tuple,
+        filters: Dict[str, Any],
+        entry: Optional[Dict[str, Any]],
+        touched: Optional[Set[int]],
+        generation: int,
+        foreign: Optional[int]
+) -> Dict[str, Any]:
+    """
+    Calcule (ou affine à partir de entry) la disposition d'une combinaison de filtres
+    et la range dans le cache. Sans verrou : seul le remplacement de l'entrée est protégé.
+    """
+    records = graph_service.get_graph(**filters)
+    if records is None:
+        raise RuntimeError("Erreur lors de la récupération du graphe")
+    record = records[0] if records else {'artists': [], 'artworks': [], 'relations': []}
+
+    node_ids = [node['id'] for node in record['artists'] + record['artworks']]
+    rows = {node_id: row for row, node_id in enumerate(node_ids)}
+    edges = [
+        (rows[relation['source']], rows[relation['target']])
+        for relation in record['relations']
+        if relation['source'] in rows and relation['target'] in rows
+    ]
+    sources = np.array([source for source, _ in edges], dtype=np.int64)
+    targets = np.array([target for _, target in edges], dtype=np.int64)
+
+    previous = entry['positions'] if entry is not None else None
+    movable = _movable_rows(node_ids, sources, targets, previous, touched) if previous else None
+    iterations = LAYOUT_REFINE_ITERATIONS if previous else LAYOUT_ITERATIONS
+    # Une disposition affinée ne doit bouger que localement
+    temperature = 0.02 if previous else 0.1
+
+    positions = force_directed_layout(
+        _initial_positions(node_ids, sources, targets, previous), sources, targets, iterations, temperature, movable
+    )
+
+    layout = {
+        'nodes': [
+            {'id': node_id, 'x': float(x), 'y': float(y)}
+            for node_id, (x, y) in zip(node_ids, positions)
+        ],
+        'iterations': iterations,
+        'refined': previous is not None,
+        'moved': len(node_ids) if movable is None else len(movable),
+        'stale': False
+    }
+
+    with _lock:
+        # Une disposition calculée entre-temps sur des données plus récentes est gardée
+        current = _cache.get(key)
+        if current is None or (current['generation'] <= generation and (current['foreign'] or 0) <= (foreign or 0)):
+            _cache[key] = {
+                'positions': {node_id: (x, y) for node_id, (x, y) in zip(node_ids, positions.tolist())},
+                'layout': layout,
+                'generation': generation,
+                'foreign': foreign
+            }
+            _cache.move_to_end(key)
+            while len(_cache) > LAYOUT_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return layout
+
+
+def _compute_in_background(key: tuple, filters: Dict[str, Any], generation: int, foreign: Optional[int]) -> None:
+    """
+    Premier calcul d'une combinaison de filtres ; une erreur est gardée pour la
+    prochaine demande
+    """
+    try:
+        _compute(key, filters, None, None, generation, foreign)
+    except Exception as e:
+        print(f"Erreur lors du calcul de la disposition du graphe : {e}")
+        with _lock:
+            _errors[key] = e
+    finally:
+        with _lock:
+            _computing.discard(key)
+
+
+def get_layout(**filters) -> Optional[Dict[str, Any]]:
+    """
+    Positions des nœuds du graphe filtré (mêmes filtres que graph_service.get_graph).
+
+    Le résultat est gardé en cache par combinaison de filtres, et un seul calcul à la
+    fois est fait par combinaison :
+    - sans disposition en cache, le calcul complet est lancé en arrière-plan et None
+      est renvoyé tant qu'il n'est pas fini ;
+    - après une écriture, seuls les nœuds touchés, les nouveaux nœuds et leurs voisins
+      sont déplacés à partir des positions existantes, par la première demande ; les
+      demandes simultanées reçoivent la disposition précédente (stale: true).
+    Les nœuds touchés par les écritures d'un autre worker ne sont pas connus : tous sont affinés.
+    Une erreur du calcul en arrière-plan est levée (RuntimeError) à la demande suivante.
+    """
+    key = _cache_key(filters)
+    foreign = graph_changes.foreign_version()
+
+    with _lock:
+        generation = _generation
+        entry = _cache.get(key)
+        touched = None
+        if entry is not None:
+            _cache.move_to_end(key)
+            if entry['foreign'] == foreign:
+                if entry['generation'] == generation:
+                    return entry['layout']
+                touched = _touched_since(entry['generation'])
+        if key in _computing:
+            return {**entry['layout'], 'stale': True} if entry is not None else None
+        error = _errors.pop(key, None)
+        if error is not None:
+            raise RuntimeError(f"Échec du calcul de la disposition du graphe : {error}")
+        _computing.add(key)
+
+    if entry is None:
+        threading.Thread(
+            target=_compute_in_background, args=(key, filters, generation, foreign),
+            name="graph-layout", daemon=True
+        ).start()
+        return None
+
+    try:
+        return _compute(key, filters, entry, touched, generation, foreign)
+    finally:
+        with _lock:
+            _computing.discard(key)
+
+
+@graph_events.subscribe
+def _on_graph_event(event: str, **payload) -> None:
+    # Une écriture peut toucher n'importe quelle combinaison de filtres : toutes les
+    # dispositions seront affinées à la prochaine demande, autour des nœuds touchés
+    global _generation
+    node_ids = tuple(
+        node_id
+        for _, data in graph_events.unfold(event, payload)
+        for node_id in ((data['node_id'],) if 'node_id' in data else (data['source'], data['target']))
+    )
+    with _lock:
+        _generation += 1
+        _touched.append((_generation, node_ids))
@@ -0,0 +1,296 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from config.db_connection import execute_reads
+from services import graph_changes, graph_dump, graph_events, graph_snapshot
+from services.graph_snapshot import NODES_QUERY, EDGES_QUERY
+
+DIMENSIONS = ('movement', 'nationality', 'decade')
+
+
+class GraphOverview:
+    """
+    Agrégats du graphe par mouvement, nationalité ou décennie.
+
+    Pour chaque dimension, on tient le nombre de nœuds par groupe et le nombre de
+    relations entre deux groupes. Un artiste peut appartenir à plusieurs mouvements ;
+    une œuvre appartient aux mouvements et nationalités des artistes qui l'ont créée
+    (relation CREATED), et à la décennie de son année.
+
+    Chaque écriture ne retire puis ne rajoute que les contributions des nœuds touchés
+    et de leurs relations, sans recalcul complet.
+    """
+
+    def __init__(self, nodes: Iterable[Tuple[int, str, dict]], edges: Iterable[Tuple[int, int, str]]):
+        self._lock = threading.RLock()
+        self.labels: Dict[int, str] = {}
+        self.data: Dict[int, dict] = {}
+        self.out_edges: Dict[int, Set[Tuple[int, str]]] = defaultdict(set)
+        self.in_edges: Dict[int, Set[Tuple[int, str]]] = defaultdict(set)
+        self.counts: Dict[str, Dict[Any, int]] = {dimension: defaultdict(int) for dimension in DIMENSIONS}
+        self.weights: Dict[str, Dict[Tuple[Any, Any], int]] = {dimension: defaultdict(int) for dimension in DIMENSIONS}
+
+        for node_id, label, data in nodes:
+            self.labels[node_id] = label
+            self.data[node_id] = data
+        for source, target, rel_type in edges:
+            if source in self.labels and target in self.labels:
+                self.out_edges[source].add((target, rel_type))
+                self.in_edges[target].add((source, rel_type))
+
+        for node_id in self.labels:
+            self._count_node(node_id, 1)
+            for target, _ in self.out_edges[node_id]:
+                self._count_edge(node_id, target, 1)
+
+    def _own_keys(self, node_id: int, dimension: str) -> Tuple[Any, ...]:
+        data = self.data[node_id]
+        if dimension == 'decade':
+            date = data.get('Ar_BirthDay' if self.labels[node_id] == 'Artist' else 'Art_Year')
+            return (date[:3] + "0",) if isinstance(date, str) and len(date) >= 4 else (None,)
+        if self.labels[node_id] != 'Artist':
+            return ()
+        if dimension == 'nationality':
+            return (data.get('Ar_Nationality'),)
+        movements = data.get('Ar_Movement')
+        return tuple(movements) if isinstance(movements, list) and movements else (None,)
+
+    def clusters(self, node_id: int, dimension: str) -> Tuple[Any, ...]:
+        if dimension == 'decade' or self.labels[node_id] == 'Artist':
+            return self._own_keys(node_id, dimension)
+        keys = {
+            key
+            for source, rel_type in self.in_edges[node_id] if rel_type == 'CREATED'
+            for key in self._own_keys(source, dimension)
+        }
+        return tuple(keys) if keys else (None,)
+
+    def _count_node(self, node_id: int, sign: int) -> None:
+        for dimension in DIMENSIONS:
+            for key in self.clusters(node_id, dimension):
+                self.counts[dimension][key] += sign
+
+    def _count_edge(self, source: int, target: int, sign: int) -> None:
+        for dimension in DIMENSIONS:
+            for source_key in self.clusters(source, dimension):
+                for target_key in self.clusters(target, dimension):
+                    self.weights[dimension][(source_key, target_key)] += sign
+
+    def _affected(self, node_ids: Iterable[int]) -> Set[int]:
+        """
+        Nœuds dont les groupes dépendent de node_ids : eux-mêmes et les œuvres qu'ils ont créées
+        """
+        affected = set()
+        for node_id in node_ids:
+            if node_id in self.labels:
+                affected.add(node_id)
+                affected.update(target for target, rel_type in self.out_edges[node_id] if rel_type == 'CREATED')
+        return affected
+
+    def _edges_of(self, node_ids: Set[int]) -> Set[Tuple[int, int, str]]:
+        edges = set()
+        for node_id in node_ids:
+            edges.update((node_id, target, rel_type) for target, rel_type in self.out_edges[node_id])
+            edges.update((source, node_id, rel_type) for source, rel_type in self.in_edges[node_id])
+        return edges
+
+    def _update(self, touched: Iterable[int], change) -> None:
+        """
+        Retire les contributions des nœuds touchés (et des œuvres qui en dépendent) et de
+        leurs relations, applique la modification, puis rajoute les nouvelles contributions
+        """
+        touched = set(touched)
+        with self._lock:
+            before = self._affected(touched)
+            for node_id in before:
+                self._count_node(node_id, -1)
+            for source, target, _ in self._edges_of(before):
+                self._count_edge(source, target, -1)
+
+            change()
+
+            after = {node_id for node_id in before | self._affected(touched) if node_id in self.labels}
+            for node_id in after:
+                self._count_node(node_id, 1)
+            for source, target, _ in self._edges_of(after):
+                self._count_edge(source, target, 1)
+
+    def upsert_node(self, node_id: int, label: str, data: dict) -> None:
+        def change():
+            self.labels[node_id] = label
+            self.data[node_id] = data
+        self._update([node_id], change)
+
+    def delete_node(self, node_id: int) -> None:
+        if node_id not in self.labels:
+            return
+
+        def change():
+            for target, rel_type in self.out_edges.pop(node_id, set()):
+                self.in_edges[target].discard((node_id, rel_type))
+            for source, rel_type in self.in_edges.pop(node_id, set()):
+                self.out_edges[source].discard((node_id, rel_type))
+            del self.labels[node_id]
+            del self.data[node_id]
+        self._update([node_id], change)
+
+    def add_edge(self, source: int, target: int, rel_type: str) -> None:
+        if source not in self.labels or target not in self.labels:
+            return
+
+        def change():
+            self.out_edges[source].add((target, rel_type))
+            self.in_edges[target].add((source, rel_type))
+        self._update([source, target], change)
+
+    def remove_edge(self, source: int, target: int, rel_type: str) -> None:
+        def change():
+            self.out_edges[source].discard((target, rel_type))
+            self.in_edges[target].discard((source, rel_type))
+        self._update([source, target], change)
+
+    def overview(self, dimension: str) -> Dict[str, Any]:
+        with self._lock:
+            clusters = [
+                {'key': key, 'count': count, 'filter': _drill_down_filter(dimension, key)}
+                for key, count in self.counts[dimension].items() if count > 0
+            ]
+            edges = [
+                {'source': source, 'target': target, 'weight': weight}
+                for (source, target), weight in self.weights[dimension].items() if weight > 0
+            ]
+        clusters.sort(key=lambda cluster: -cluster['count'])
+        return {'dimension': dimension, 'clusters': clusters, 'edges': edges}
+
+
+def _drill_down_filter(dimension: str, key: Any) -> Optional[Dict[str, str]]:
+    """
+    Paramètres de /graphs qui affichent le détail d'un groupe : exactement les nœuds
+    comptés dans le groupe (les œuvres par les attributs de leurs artistes, avec byCreator)
+    """
+    if key is None:
+        return None
+    if dimension == 'movement':
+        return {'movements': key, 'byCreator': 'true'}
+    if dimension == 'nationality':
+        return {'nationalities': key, 'byCreator': 'true'}
+    return {'yearMin': key, 'yearBefore': str(int(key) + 10)}
+
+
+_overview: Optional[GraphOverview] = None
+# Écritures des autres workers contenues dans les agrégats (voir graph_changes.foreign_version)
+_applied_foreign: Optional[int] = None
+_load_lock = threading.Lock()
+# Protège _overview, _loading et _missed_events entre le chargement et les abonnés aux écritures
+_events_lock = threading.Lock()
+_loading = False
+_missed_events: List[Tuple[str, dict]] = []
+
+
+def load_overview() -> Optional[GraphOverview]:
+    node_records, edge_records = execute_reads([(NODES_QUERY, None), (EDGES_QUERY, None)])
+    if node_records is None or edge_records is None:
+        print("Erreur lors du chargement des agrégats du graphe")
+        return None
+
+    nodes = [
+        (record['id'], 'Artist' if 'Artist' in record['labels'] else 'Artwork', record['data'])
+        for record in node_records
+    ]
+    edges = [(record['source'], record['target'], record['type']) for record in edge_records]
+    return GraphOverview(nodes, edges)
+
+
+def seed_from_file(path: str) -> bool:
+    """
+    Calcule les agrégats depuis un fichier exporté (flask graph export) au lieu de Neo4j,
+    si le démarrage à chaud est activé (GRAPH_SNAPSHOT_ENABLED, comme pour le snapshot).
+    Les écritures publiées pendant la lecture du fichier sont rejouées ensuite (voir _install).
+    """
+    if not graph_snapshot.is_enabled():
+        return False
+
+    def load() -> Optional[GraphOverview]:
+        try:
+            return GraphOverview(graph_dump.iter_nodes(path), graph_dump.iter_edges(path))
+        except (OSError, ValueError) as e:
+            print(f"Erreur lors de la lecture du snapshot {path} : {e}")
+            return None
+
+    with _load_lock:
+        if _overview is not None:
+            return False
+        return _install(load) is not None
+
+
+def _install(load: Callable[[], Optional[GraphOverview]]) -> Optional[GraphOverview]:
+    """
+    Calcule les agrégats avec load() puis les installe, en rejouant sous _events_lock
+    les écritures publiées pendant le calcul (voir graph_snapshot._install).
+    À appeler avec _load_lock.
+    """
+    global _overview, _loading, _applied_foreign
+    foreign = graph_changes.foreign_version()
+    with _events_lock:
+        _loading = True
+    overview = None
+    try:
+        overview = load()
+    finally:
+        with _events_lock:
+            if overview is not None:
+                for event, payload in _missed_events:
+                    _apply_event(overview, event, payload)
+                _overview = overview
+                _applied_foreign = foreign
+            _missed_events.clear()
+            _loading = False
+    return overview
+
+
+def _is_stale() -> bool:
+    # Un autre worker a écrit depuis le calcul (voir graph_snapshot._is_stale)
+    foreign = graph_changes.foreign_version()
+    return foreign is not None and (_applied_foreign is None or foreign > _applied_foreign)
+
+
+def get_overview(dimension: str) -> Optional[Dict[str, Any]]:
+    """
+    Vue d'ensemble du graphe regroupé par dimension ('movement', 'nationality' ou 'decade').
+    Les agrégats sont calculés au premier appel puis tenus à jour à chaque écriture de
+    ce processus ; après une écriture d'un autre worker, ils sont recalculés en entier
+    avant de répondre. None si le calcul échoue.
+    """
+    overview = _overview
+    if overview is None or _is_stale():
+        with _load_lock:
+            overview = _overview
+            if overview is None or _is_stale():
+                overview = _install(load_overview)
+    if overview is None:
+        return None
+    return overview.overview(dimension)
+
+
+def _apply_event(overview: GraphOverview, event: str, payload: dict) -> None:
+    if event in (graph_events.NODE_CREATED, graph_events.NODE_UPDATED):
+        overview.upsert_node(payload['node_id'], payload['label'], payload['data'])
+    elif event == graph_events.NODE_DELETED:
+        overview.delete_node(payload['node_id'])
+    elif event == graph_events.RELATION_CREATED:
+        overview.add_edge(payload['source'], payload['target'], payload['type'])
+    elif event == graph_events.RELATION_DELETED:
+        overview.remove_edge(payload['source'], payload['target'], payload['type'])
+
+
+@graph_events.subscribe
+def _on_graph_event(event: str, **payload) -> None:
+    with _events_lock:
+        if _loading:
+            _missed_events.extend(graph_events.unfold(event, payload))
+        overview = _overview
+    if overview is None:
+        return
+    for change, data in graph_events.unfold(event, payload):
+        _apply_event(overview, change, data)
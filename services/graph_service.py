@@ -1,30 +1,36 @@
-from config.db_connection import execute_query
-from typing import List, Optional, Dict, Any
+from config import query_templates
+from config.db_connection import execute_read, execute_reads, stream_query
+from services import graph_snapshot, graph_traversal
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 
+# Types des relations entre artistes et œuvres renvoyées par /graphs : le filtre fait
+# partie du motif MATCH, seules ces relations sont lues par Neo4j
+GRAPH_RELATIONS = 'CREATED|INSPIRE'
 
-def get_graph(
-        nationalities: Optional[List[str]] = None,
-        mediums: Optional[List[str]] = None,
-        movements: Optional[List[str]] = None,
-        year_min: Optional[str] = None,
-        year_max: Optional[str] = None,
-        exclude_artists: bool = False,
-        exclude_artworks: bool = False
-) -> List[Dict[str, Any]]:
-    """
-    Récupère les données du graphe avec filtres optionnels
-
-    Args:
-        nationalities: Liste des nationalités d'artistes à inclure
-        mediums: Liste des médiums d'œuvres à inclure
-        movements: Liste des mouvements artistiques à inclure
-        year_min: Année minimale (pour œuvres et artistes)
-        year_max: Année maximale (pour œuvres et artistes)
-        exclude_artists: Exclure les artistes du résultat
-        exclude_artworks: Exclure les œuvres du résultat
 
-    Returns:
-        Liste contenant les données du graphe filtré
+def _keep_internal_relations(record: Dict[str, Any], node_ids: List[int]) -> None:
+    """
+    Ne garde que les relations dont les deux extrémités font partie des nœuds sélectionnés.
+    Le test d'appartenance se fait sur un ensemble, en temps constant par relation.
+    """
+    selected = set(node_ids)
+    record['relations'] = [relation for relation in record['relations'] if relation['target'] in selected]
+
+
+def _graph_filters(
+        nationalities: Optional[List[str]],
+        mediums: Optional[List[str]],
+        movements: Optional[List[str]],
+        year_min: Optional[str],
+        year_max: Optional[str],
+        by_creator: bool = False,
+        year_before: Optional[str] = None
+) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Construit les clauses WHERE des artistes et des œuvres et leurs paramètres.
+    Avec by_creator, les filtres nationalities et movements s'appliquent aussi aux
+    œuvres : une œuvre n'est gardée que si l'un de ses artistes (relation CREATED) y correspond.
+    year_before exclut les dates à partir du 1er janvier de cette année.
     """
 
     # Construire les conditions de filtrage pour les artistes
@@ -47,6 +53,10 @@ def get_graph(
         artist_conditions.append("artist.Ar_BirthDay <= $year_max")
         artist_params['year_max'] = year_max + "-01-01"
 
+    if year_before is not None:
+        artist_conditions.append("artist.Ar_BirthDay < $year_before")
+        artist_params['year_before'] = year_before + "-01-01"
+
     # Construire les conditions de filtrage pour les œuvres
     artwork_conditions = []
     artwork_params = {}
@@ -63,124 +73,39 @@ def get_graph(
         artwork_conditions.append("artwork.Art_Year <= $year_max_art")
         artwork_params['year_max_art'] = year_max + "-01-01"
 
+    if year_before is not None:
+        artwork_conditions.append("artwork.Art_Year < $year_before_art")
+        artwork_params['year_before_art'] = year_before + "-01-01"
+
+    creator_conditions = [
+        condition.replace("artist.", "creator.")
+        for condition in artist_conditions
+        if "Ar_Nationality" in condition or "Ar_Movement" in condition
+    ]
+    if by_creator and creator_conditions:
+        artwork_conditions.append(
+            f"EXISTS {{ MATCH (creator:Artist)-[:CREATED]->(artwork) WHERE {' AND '.join(creator_conditions)} }}"
+        )
+
     # Construire les clauses WHERE
     artist_where = "WHERE " + " AND ".join(artist_conditions) if artist_conditions else ""
     artwork_where = "WHERE " + " AND ".join(artwork_conditions) if artwork_conditions else ""
 
-    # Construire la requête principale
-    query_parts = []
-
-    # Partie artistes
-    if not exclude_artists:
-        artist_query = f"""
-        CALL {{
-          MATCH (artist:Artist)
-          {artist_where}
-          RETURN collect({{
-                        data: artist,
-                        id: id(artist),
-                        type: 'Artist'
-                      }}) AS artists
-        }}"""
-        query_parts.append(artist_query)
-    else:
-        query_parts.append("CALL { RETURN [] AS artists }")
-
-    # Partie œuvres
-    if not exclude_artworks:
-        artwork_query = f"""
-        CALL {{
-          MATCH (artwork:Artwork)
-          {artwork_where}
-          RETURN collect({{
-                        data: artwork,
-                        id: id(artwork),
-                        type: 'Artwork'
-                      }}) AS artworks
-        }}"""
-        query_parts.append(artwork_query)
-    else:
-        query_parts.append("CALL { RETURN [] AS artworks }")
-
-    # Partie relations - seulement entre nœuds non exclus
-    relation_conditions = []
-    if exclude_artists and exclude_artworks:
-        # Si les deux sont exclus, pas de relations
-        query_parts.append("CALL { RETURN [] AS relations }")
-    else:
-        # Construire les conditions pour les relations
-        relation_filter = ""
-        if exclude_artists:
-            relation_filter = "WHERE NOT (n1:Artist OR n2:Artist)"
-        elif exclude_artworks:
-            relation_filter = "WHERE NOT (n1:Artwork OR n2:Artwork)"
-        elif artist_conditions or artwork_conditions:
-            # Si on a des filtres, on doit s'assurer que les nœuds dans les relations respectent les filtres
-            relation_subqueries = []
-
-            if artist_conditions:
-                relation_subqueries.append(f"""
-                    (NOT n1:Artist OR ({" AND ".join(n.replace("artist.", "n1.") for n in artist_conditions)}))
-                    AND (NOT n2:Artist OR ({" AND ".join(n.replace("artist.", "n2.") for n in artist_conditions)}))
-                """)
-
-            if artwork_conditions:
-                relation_subqueries.append(f"""
-                    (NOT n1:Artwork OR ({" AND ".join(n.replace("artwork.", "n1.") for n in artwork_conditions)}))
-                    AND (NOT n2:Artwork OR ({" AND ".join(n.replace("artwork.", "n2.") for n in artwork_conditions)}))
-                """)
-
-            if relation_subqueries:
-                relation_filter = f"WHERE {' AND '.join(relation_subqueries)}"
-
-        relations_query = f"""
-        CALL {{
-          MATCH (n1)-[relation]->(n2)
-          {relation_filter}
-          RETURN collect({{
-                        source: id(n1),
-                        target: id(n2)
-                      }}) AS relations
-        }}"""
-        query_parts.append(relations_query)
-
-    # Assembler la requête finale
-    query = "\n".join(query_parts) + "\nRETURN artists, artworks, relations"
-
-    # Combiner tous les paramètres
-    all_params = {**artist_params, **artwork_params}
-
-    # Exécuter la requête
-    results = execute_query(query=query, parameters=all_params if all_params else None)
-
-    return results
+    return artist_where, artwork_where, {**artist_params, **artwork_params}
 
 
-def get_subgraph(
-        central_node_id: int,
-        nationalities: Optional[List[str]] = None,
-        mediums: Optional[List[str]] = None,
-        movements: Optional[List[str]] = None,
-        year_min: Optional[str] = None,
-        year_max: Optional[str] = None,
-        exclude_artists: bool = False,
-        exclude_artworks: bool = False
-) -> List[Dict[str, Any]]:
+def _node_filters(
+        nationalities: Optional[List[str]],
+        mediums: Optional[List[str]],
+        movements: Optional[List[str]],
+        year_min: Optional[str],
+        year_max: Optional[str],
+        exclude_artists: bool,
+        exclude_artworks: bool
+) -> Tuple[str, str]:
     """
-    Récupère un sous-graphe centré sur un nœud spécifique avec filtres optionnels
-
-    Args:
-        central_node_id: ID du nœud central
-        nationalities: Liste des nationalités d'artistes à inclure
-        mediums: Liste des médiums d'œuvres à inclure
-        movements: Liste des mouvements artistiques à inclure
-        year_min: Année minimale (pour œuvres et artistes)
-        year_max: Année maximale (pour œuvres et artistes)
-        exclude_artists: Exclure les artistes du résultat
-        exclude_artworks: Exclure les œuvres du résultat
-
-    Returns:
-        Liste contenant les données du sous-graphe filtré
+    Conditions supplémentaires sur une variable `node` artiste ou œuvre (« AND ... »),
+    avec les paramètres de _graph_filters
     """
 
     # Construire les conditions de filtrage pour les artistes
@@ -219,48 +144,314 @@ def get_subgraph(
     if artwork_filter_conditions:
         artwork_filter = f"AND ({' AND '.join(artwork_filter_conditions)})"
 
-    # Construire la requête principale
-    query = f"""
-    WITH $centralNodeId AS centralNodeId
+    return (
+        artist_filter if not exclude_artists else "AND FALSE",
+        artwork_filter if not exclude_artworks else "AND FALSE"
+    )
 
-    MATCH (centralNode)
-    WHERE id(centralNode) = centralNodeId
 
-    CALL {{
-      WITH centralNode
+def get_graph(
+        nationalities: Optional[List[str]] = None,
+        mediums: Optional[List[str]] = None,
+        movements: Optional[List[str]] = None,
+        year_min: Optional[str] = None,
+        year_max: Optional[str] = None,
+        exclude_artists: bool = False,
+        exclude_artworks: bool = False,
+        by_creator: bool = False,
+        year_before: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Récupère les données du graphe avec filtres optionnels
 
-      MATCH path = (centralNode)-[*]->(node)
-      WHERE length(path) > 0
-        AND (
-          (node:Artist {artist_filter if not exclude_artists else "AND FALSE"})
-          OR 
-          (node:Artwork {artwork_filter if not exclude_artworks else "AND FALSE"})
-        )
+    Args:
+        nationalities: Liste des nationalités d'artistes à inclure
+        mediums: Liste des médiums d'œuvres à inclure
+        movements: Liste des mouvements artistiques à inclure
+        year_min: Année minimale (pour œuvres et artistes)
+        year_max: Année maximale (pour œuvres et artistes)
+        exclude_artists: Exclure les artistes du résultat
+        exclude_artworks: Exclure les œuvres du résultat
+        by_creator: Ne garder que les œuvres dont un artiste correspond aux filtres
+            nationalities et movements
+        year_before: Année exclue : ne garder que les dates antérieures au 1er janvier
+            de cette année (filtre des vues détaillées par décennie)
 
-      RETURN collect(DISTINCT node) AS outgoingNodes
-    }}
+    Returns:
+        Liste contenant les données du graphe filtré
+    """
 
-    CALL {{
-      WITH centralNode
+    # Réponse sans aller-retour Neo4j si le snapshot en mémoire est activé
+    snapshot_result = graph_snapshot.get_graph(
+        nationalities=nationalities,
+        mediums=mediums,
+        movements=movements,
+        year_min=year_min,
+        year_max=year_max,
+        exclude_artists=exclude_artists,
+        exclude_artworks=exclude_artworks,
+        by_creator=by_creator,
+        year_before=year_before
+    )
+    if snapshot_result is not None:
+        return snapshot_result
+
+    artist_where, artwork_where, all_params = _graph_filters(
+        nationalities, mediums, movements, year_min, year_max, by_creator, year_before
+    )
+
+    def build() -> str:
+        # Construire la requête principale
+        query_parts = []
+
+        # Partie artistes
+        if not exclude_artists:
+            artist_query = f"""
+            CALL {{
+              MATCH (artist:Artist)
+              {artist_where}
+              RETURN collect({{
+                            data: artist,
+                            id: id(artist),
+                            type: 'Artist'
+                          }}) AS artists
+            }}"""
+            query_parts.append(artist_query)
+        else:
+            query_parts.append("CALL { RETURN [] AS artists }")
+
+        # Partie œuvres
+        if not exclude_artworks:
+            artwork_query = f"""
+            CALL {{
+              MATCH (artwork:Artwork)
+              {artwork_where}
+              RETURN collect({{
+                            data: artwork,
+                            id: id(artwork),
+                            type: 'Artwork'
+                          }}) AS artworks
+            }}"""
+            query_parts.append(artwork_query)
+        else:
+            query_parts.append("CALL { RETURN [] AS artworks }")
+
+        # Partie relations - on réutilise les nœuds déjà sélectionnés par les deux parties
+        # précédentes : chaque filtre n'est évalué qu'une fois par nœud, et une relation n'est
+        # gardée que si sa cible fait aussi partie de la sélection
+        relations_query = f"""
+            CALL {{
+              WITH artists, artworks
+              UNWIND artists + artworks AS selected
+              MATCH (n1)-[relation:{GRAPH_RELATIONS}]->(n2)
+              WHERE id(n1) = selected.id
+              RETURN collect({{
+                            source: id(n1),
+                            target: id(n2)
+                          }}) AS relations
+            }}"""
+        query_parts.append(relations_query)
+
+        # Assembler la requête finale
+        return "\n".join(query_parts) + "\nRETURN artists, artworks, relations"
+
+    query = query_templates.template('graph', (artist_where, artwork_where, exclude_artists, exclude_artworks), build)
+
+    # Exécuter la requête
+    results = execute_read(query=query, parameters=all_params if all_params else None)
+
+    for record in results or []:
+        _keep_internal_relations(record, [node['id'] for node in record['artists'] + record['artworks']])
+
+    return results
+
+
+def stream_graph(
+        nationalities: Optional[List[str]] = None,
+        mediums: Optional[List[str]] = None,
+        movements: Optional[List[str]] = None,
+        year_min: Optional[str] = None,
+        year_max: Optional[str] = None,
+        exclude_artists: bool = False,
+        exclude_artworks: bool = False,
+        by_creator: bool = False,
+        year_before: Optional[str] = None,
+        fetch_size: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Variante de get_graph qui produit les éléments du graphe un par un, sans jamais
+    construire la réponse complète en mémoire : d'abord les nœuds, puis les relations.
+
+    Les nœuds ont la même forme que dans get_graph ({data, id, type}) ; les relations
+    sont de la forme {source, target, type: 'Relation'}.
+
+    Args:
+        (mêmes filtres que get_graph)
+        fetch_size: Nombre d'enregistrements lus par lot depuis le curseur Neo4j
+    """
+    snapshot_result = graph_snapshot.get_graph(
+        nationalities=nationalities,
+        mediums=mediums,
+        movements=movements,
+        year_min=year_min,
+        year_max=year_max,
+        exclude_artists=exclude_artists,
+        exclude_artworks=exclude_artworks,
+        by_creator=by_creator,
+        year_before=year_before
+    )
+    if snapshot_result is not None:
+        for record in snapshot_result:
+            yield from record['artists']
+            yield from record['artworks']
+            for relation in record['relations']:
+                yield {**relation, 'type': 'Relation'}
+        return
+
+    artist_where, artwork_where, params = _graph_filters(
+        nationalities, mediums, movements, year_min, year_max, by_creator, year_before
+    )
+
+    def build() -> str:
+        node_queries = []
+        if not exclude_artists:
+            node_queries.append(f"""
+            MATCH (artist:Artist)
+            {artist_where}
+            RETURN artist AS data, id(artist) AS id, 'Artist' AS type""")
+        if not exclude_artworks:
+            node_queries.append(f"""
+            MATCH (artwork:Artwork)
+            {artwork_where}
+            RETURN artwork AS data, id(artwork) AS id, 'Artwork' AS type""")
+        return "\nUNION ALL".join(node_queries)
+
+    query = query_templates.template('graph_stream', (artist_where, artwork_where, exclude_artists, exclude_artworks), build)
+
+    # Seuls les identifiants des nœuds émis sont gardés, pour filtrer les relations
+    selected = set()
+    for node in stream_query(query, params, fetch_size):
+        selected.add(node['id'])
+        yield node
+
+    # Relations dont les deux extrémités ont un label non exclu, lues par type
+    labels = [label for label, excluded in (('Artist', exclude_artists), ('Artwork', exclude_artworks)) if not excluded]
+    if not labels:
+        return
+
+    def build_relations() -> str:
+        if len(labels) == 1:
+            return f"""
+            MATCH (n1:{labels[0]})-[relation:{GRAPH_RELATIONS}]->(n2:{labels[0]})
+            RETURN id(n1) AS source, id(n2) AS target
+            """
+        return f"""
+        MATCH (n1)-[relation:{GRAPH_RELATIONS}]->(n2)
+        WHERE (n1:Artist OR n1:Artwork) AND (n2:Artist OR n2:Artwork)
+        RETURN id(n1) AS source, id(n2) AS target
+        """
+
+    relations_query = query_templates.template('graph_stream_relations', tuple(labels), build_relations)
+    for relation in stream_query(relations_query, fetch_size=fetch_size):
+        if relation['source'] in selected and relation['target'] in selected:
+            yield {**relation, 'type': 'Relation'}
+
+
+def get_subgraph(
+        central_node_id: int,
+        nationalities: Optional[List[str]] = None,
+        mediums: Optional[List[str]] = None,
+        movements: Optional[List[str]] = None,
+        year_min: Optional[str] = None,
+        year_max: Optional[str] = None,
+        exclude_artists: bool = False,
+        exclude_artworks: bool = False,
+        depth: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+        direction: str = 'both'
+) -> List[Dict[str, Any]]:
+    """
+    Récupère un sous-graphe centré sur un nœud spécifique avec filtres optionnels
 
-      MATCH path = (node)-[*]->(centralNode)
-      WHERE length(path) > 0
+    Args:
+        central_node_id: ID du nœud central
+        nationalities: Liste des nationalités d'artistes à inclure
+        mediums: Liste des médiums d'œuvres à inclure
+        movements: Liste des mouvements artistiques à inclure
+        year_min: Année minimale (pour œuvres et artistes)
+        year_max: Année maximale (pour œuvres et artistes)
+        exclude_artists: Exclure les artistes du résultat
+        exclude_artworks: Exclure les œuvres du résultat
+        depth: Profondeur maximale du parcours (SUBGRAPH_MAX_DEPTH par défaut, et au plus)
+        max_nodes: Nombre maximal de nœuds parcourus (SUBGRAPH_MAX_NODES par défaut, et au plus)
+        direction: 'out' (nœuds atteints depuis le nœud central), 'in' (nœuds qui
+            l'atteignent) ou 'both'
+
+    Returns:
+        Liste contenant les données du sous-graphe filtré, avec 'truncated' à True
+        si le parcours a été arrêté par la profondeur ou le budget de nœuds
+    """
+
+    depth, max_nodes = graph_traversal.clamp_limits(depth, max_nodes)
+
+    # Réponse sans aller-retour Neo4j si le snapshot en mémoire est activé
+    snapshot_result = graph_snapshot.get_subgraph(
+        central_node_id,
+        depth=depth,
+        max_nodes=max_nodes,
+        direction=direction,
+        nationalities=nationalities,
+        mediums=mediums,
+        movements=movements,
+        year_min=year_min,
+        year_max=year_max,
+        exclude_artists=exclude_artists,
+        exclude_artworks=exclude_artworks
+    )
+    if snapshot_result is not None:
+        return snapshot_result
+
+    artist_filter, artwork_filter = _node_filters(
+        nationalities, mediums, movements, year_min, year_max, exclude_artists, exclude_artworks
+    )
+
+    # Parcours niveau par niveau, borné en profondeur et en nombre de nœuds,
+    # au lieu d'énumérer tous les chemins (centralNode)-[*]-(node)
+    reached_ids, truncated = graph_traversal.bounded_expand(
+        central_node_id,
+        graph_traversal.neo4j_neighbors,
+        direction=direction,
+        depth=depth,
+        max_nodes=max_nodes
+    )
+
+    # Construire la requête principale (même texte pour une même combinaison de filtres)
+    query = query_templates.template('subgraph', (artist_filter, artwork_filter), lambda: f"""
+    WITH $centralNodeId AS centralNodeId
+
+    MATCH (centralNode)
+    WHERE id(centralNode) = centralNodeId
+
+    CALL {{
+      UNWIND $reachedIds AS nodeId
+      MATCH (node)
+      WHERE id(node) = nodeId
         AND (
-          (node:Artist {artist_filter if not exclude_artists else "AND FALSE"})
+          (node:Artist {artist_filter})
           OR 
-          (node:Artwork {artwork_filter if not exclude_artworks else "AND FALSE"})
+          (node:Artwork {artwork_filter})
         )
 
-      RETURN collect(DISTINCT node) AS incomingNodes
+      RETURN collect(node) AS reachedNodes
     }}
 
-    WITH centralNode, outgoingNodes + incomingNodes + [centralNode] AS selectedNodes
+    WITH centralNode, reachedNodes + [centralNode] AS selectedNodes
 
     CALL {{
       WITH selectedNodes
       UNWIND selectedNodes AS node
       WITH DISTINCT node
-      WHERE node:Artist {artist_filter if not exclude_artists else "AND FALSE"}
+      WHERE node:Artist {artist_filter}
       RETURN collect({{
         data: node,
         id: id(node),
@@ -272,7 +463,7 @@ def get_subgraph(
       WITH selectedNodes
       UNWIND selectedNodes AS node
       WITH DISTINCT node
-      WHERE node:Artwork {artwork_filter if not exclude_artworks else "AND FALSE"}
+      WHERE node:Artwork {artwork_filter}
       RETURN collect({{
         data: node,
         id: id(node),
@@ -280,46 +471,152 @@ def get_subgraph(
       }}) AS artworks
     }}
 
+    // Relations sortantes des nœuds sélectionnés, en une passe ;
+    // celles dont la cible n'est pas sélectionnée sont écartées ensuite
     CALL {{
       WITH selectedNodes
       UNWIND selectedNodes AS source
-      UNWIND selectedNodes AS target
-      MATCH (source)-[r]->(target)
+      WITH DISTINCT source
+      MATCH (source)-[r:{GRAPH_RELATIONS}]->(target)
       RETURN collect(DISTINCT {{
         source: id(source),
         target: id(target)
       }}) AS relations
     }}
 
-    RETURN artists, artworks, relations
-    """
+    RETURN artists, artworks, relations, [node IN selectedNodes | id(node)] AS selectedIds
+    """)
 
     # Construire les paramètres
     params = {
-        'centralNodeId': central_node_id
+        'centralNodeId': central_node_id,
+        'reachedIds': list(reached_ids),
+        **_graph_filters(nationalities, mediums, movements, year_min, year_max)[2]
     }
 
-    if nationalities:
-        params['nationalities'] = nationalities
+    # Exécuter la requête
+    results = execute_read(query=query, parameters=params)
 
-    if mediums:
-        params['mediums'] = mediums
+    for record in results or []:
+        _keep_internal_relations(record, record.pop('selectedIds'))
+        record['truncated'] = truncated
 
-    if movements:
-        params['movements'] = movements
+    return results
 
-    if year_min is not None:
-        params['year_min'] = year_min + "-01-01"
-        params['year_min_art'] = year_min + "-01-01"
+def get_path(
+        source_id: int,
+        target_id: int,
+        nationalities: Optional[List[str]] = None,
+        mediums: Optional[List[str]] = None,
+        movements: Optional[List[str]] = None,
+        year_min: Optional[str] = None,
+        year_max: Optional[str] = None,
+        exclude_artists: bool = False,
+        exclude_artworks: bool = False,
+        max_depth: Optional[int] = None,
+        limit: Optional[int] = None,
+        direction: str = 'both'
+) -> List[Dict[str, Any]]:
+    """
+    Récupère les plus courts chemins entre deux nœuds, par les relations INSPIRE et CREATED
 
-    if year_max is not None:
-        params['year_max'] = year_max + "-01-01"
-        params['year_max_art'] = year_max + "-01-01"
+    Args:
+        source_id: ID du nœud de départ
+        target_id: ID du nœud d'arrivée
+        nationalities, mediums, movements, year_min, year_max, exclude_artists, exclude_artworks:
+            Filtres de get_graph, appliqués aux nœuds intermédiaires des chemins
+        max_depth: Longueur maximale d'un chemin (PATH_MAX_DEPTH par défaut, et au plus)
+        limit: Nombre maximal de chemins (PATH_MAX_RESULTS par défaut, et au plus)
+        direction: 'out' (relations suivies dans leur sens), 'in' (sens inverse) ou 'both'
 
-    # Exécuter la requête
-    results = execute_query(query=query, parameters=params)
+    Returns:
+        Liste contenant les nœuds et relations des chemins, et 'paths' : la liste des
+        identifiants de chaque chemin. Liste vide si l'un des nœuds n'existe pas
+    """
+
+    max_depth, limit = graph_traversal.clamp_path_limits(max_depth, limit)
+
+    filters = {
+        'nationalities': nationalities,
+        'mediums': mediums,
+        'movements': movements,
+        'year_min': year_min,
+        'year_max': year_max,
+        'exclude_artists': exclude_artists,
+        'exclude_artworks': exclude_artworks
+    }
+
+    # Parcours en largeur bidirectionnel sur le snapshot en mémoire s'il est activé
+    snapshot_result = graph_snapshot.get_path(
+        source_id, target_id, max_depth=max_depth, limit=limit, direction=direction, **filters
+    )
+    if snapshot_result is not None:
+        return snapshot_result
+
+    artist_filter, artwork_filter = _node_filters(**filters)
+    relation_types = '|'.join(graph_traversal.PATH_RELATIONS)
+    max_depth = int(max_depth)
+    pattern = {
+        'out': f"(source)-[:{relation_types}*..{max_depth}]->(target)",
+        'in': f"(source)<-[:{relation_types}*..{max_depth}]-(target)",
+        'both': f"(source)-[:{relation_types}*..{max_depth}]-(target)"
+    }[direction]
+
+    # allShortestPaths effectue lui aussi une recherche bidirectionnelle.
+    # Les bornes d'un chemin de longueur variable ne peuvent pas être des paramètres :
+    # la profondeur, entière et plafonnée à PATH_MAX_DEPTH, fait partie de la forme de la requête
+    query = query_templates.template('path', (pattern, artist_filter, artwork_filter), lambda: f"""
+    MATCH (source), (target)
+    WHERE id(source) = $sourceId AND id(target) = $targetId
+
+    OPTIONAL MATCH path = allShortestPaths({pattern})
+    WHERE ALL(node IN nodes(path)[1..-1] WHERE (node:Artist {artist_filter}) OR (node:Artwork {artwork_filter}))
+
+    WITH path LIMIT $limit
+    RETURN
+      [node IN nodes(path) | {{
+        data: node,
+        id: id(node),
+        type: CASE WHEN node:Artist THEN 'Artist' ELSE 'Artwork' END
+      }}] AS nodes,
+      [relation IN relationships(path) | {{
+        source: id(startNode(relation)),
+        target: id(endNode(relation))
+      }}] AS relations
+    """)
+
+    params = {
+        'sourceId': source_id,
+        'targetId': target_id,
+        'limit': limit,
+        **_graph_filters(nationalities, mediums, movements, year_min, year_max)[2]
+    }
+
+    results = execute_read(query=query, parameters=params)
+    if results is None:
+        return None
+    if not results:
+        return []
+
+    nodes: Dict[int, Dict[str, Any]] = {}
+    relations: Dict[Tuple[int, int], Dict[str, int]] = {}
+    paths = []
+    for record in results:
+        if record['nodes'] is None:
+            continue
+        for node in record['nodes']:
+            nodes[node['id']] = node
+        for relation in record['relations']:
+            relations[(relation['source'], relation['target'])] = relation
+        paths.append([node['id'] for node in record['nodes']])
+
+    return [{
+        'artists': [node for node in nodes.values() if node['type'] == 'Artist'],
+        'artworks': [node for node in nodes.values() if node['type'] == 'Artwork'],
+        'relations': list(relations.values()),
+        'paths': paths
+    }]
 
-    return results
 
 def get_filter_options() -> Dict[str, List[str]]:
     """
@@ -368,27 +665,25 @@ def get_filter_options() -> Dict[str, List[str]]:
     RETURN MIN(year) AS min_year, MAX(year) AS max_year
     """
 
-    try:
-        # Exécuter les requêtes
-        nationalities = [record['nationality'] for record in execute_query(nationality_query)]
-        mediums = [record['medium'] for record in execute_query(medium_query)]
-        movements = [record['movement'] for record in execute_query(movement_query)]
-        year_range = execute_query(year_query)[0] if execute_query(year_query) else {'min_year': 1800, 'max_year': 2024}
-
-        return {
-            'nationalities': nationalities,
-            'mediums': mediums,
-            'movements': movements,
-            'year_range': {
-                'min': year_range['min_year'],
-                'max': year_range['max_year']
-            }
+    # Requêtes indépendantes, exécutées en parallèle ; une requête en échec
+    # donne les valeurs par défaut de son filtre
+    nationality_results, medium_results, movement_results, year_results = execute_reads([
+        (nationality_query, None),
+        (medium_query, None),
+        (movement_query, None),
+        (year_query, None)
+    ])
+    if None in (nationality_results, medium_results, movement_results, year_results):
+        print("Erreur lors de la récupération des options de filtres")
+
+    year_range = year_results[0] if year_results else {'min_year': 1800, 'max_year': 2024}
+
+    return {
+        'nationalities': [record['nationality'] for record in nationality_results or []],
+        'mediums': [record['medium'] for record in medium_results or []],
+        'movements': [record['movement'] for record in movement_results or []],
+        'year_range': {
+            'min': year_range['min_year'],
+            'max': year_range['max_year']
         }
-    except Exception as e:
-        print(f"Erreur lors de la récupération des options de filtres: {e}")
-        return {
-            'nationalities': [],
-            'mediums': [],
-            'movements': [],
-            'year_range': {'min': 1800, 'max': 2024}
-        }
\ No newline at end of file
+    }
@@ -0,0 +1,650 @@
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from config.db_connection import execute_reads
+from services import graph_changes, graph_dump, graph_events, graph_traversal
+
+ARTIST = 0
+ARTWORK = 1
+LABELS = ('Artist', 'Artwork')
+
+SNAPSHOT_ENABLED = os.getenv("GRAPH_SNAPSHOT_ENABLED", "false").lower() == "true"
+# Nombre d'écritures conservées dans le delta avant de reconstruire les tableaux CSR
+COMPACTION_THRESHOLD = int(os.getenv("GRAPH_SNAPSHOT_COMPACTION_THRESHOLD", "1024"))
+
+NODES_QUERY = """
+MATCH (node)
+WHERE node:Artist OR node:Artwork
+RETURN id(node) AS id, labels(node) AS labels, node AS data
+"""
+
+EDGES_QUERY = """
+MATCH (source)-[relation]->(target)
+WHERE (source:Artist OR source:Artwork) AND (target:Artist OR target:Artwork)
+RETURN id(source) AS source, id(target) AS target, type(relation) AS type
+"""
+
+
+class GraphSnapshot:
+    """
+    Copie compacte en mémoire des artistes, des œuvres et de leurs relations.
+
+    Chaque nœud occupe une ligne dans des colonnes (identifiant Neo4j, label,
+    attributs de filtre) ; les valeurs répétées sont codées par un dictionnaire
+    de chaînes. Les arêtes sont rangées au format CSR : les voisins sortants de
+    la ligne i sont out_targets[out_offsets[i]:out_offsets[i + 1]].
+    Les écritures postérieures au chargement sont gardées dans un delta,
+    fusionné dans les tableaux CSR lorsqu'il dépasse COMPACTION_THRESHOLD.
+    """
+
+    def __init__(self, nodes: Iterable[Tuple[int, int, dict]], edges: Iterable[Tuple[int, int, str]]):
+        self._lock = threading.RLock()
+        self.load_seconds: Optional[float] = None
+        self._build(nodes, edges)
+
+    def _build(self, nodes: Iterable[Tuple[int, int, dict]], edges: Iterable[Tuple[int, int, str]]) -> None:
+        self.strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+        # Colonnes des nœuds
+        self.node_ids = array('q')
+        self.labels = array('b')
+        self.alive = bytearray()
+        self.nationality = array('i')
+        self.medium = array('i')
+        self.dates: List[Any] = []
+        self.movements: List[Tuple[int, ...]] = []
+        self.properties: List[dict] = []
+        self.index: Dict[int, int] = {}
+
+        for node_id, label, data in nodes:
+            self._append_node(node_id, label, data)
+
+        rows = []
+        for source, target, rel_type in edges:
+            source_row = self.index.get(source)
+            target_row = self.index.get(target)
+            if source_row is not None and target_row is not None:
+                rows.append((source_row, target_row, self._encode(rel_type)))
+
+        node_count = len(self.node_ids)
+        self.out_offsets, self.out_targets, self.out_types = self._csr(rows, node_count, 0, 1)
+        self.in_offsets, self.in_sources, self.in_types = self._csr(rows, node_count, 1, 0)
+
+        # Delta des écritures depuis la dernière construction
+        self._added_out: Dict[int, List[Tuple[int, int]]] = {}
+        self._added_in: Dict[int, List[Tuple[int, int]]] = {}
+        self._removed: Set[Tuple[int, int, int]] = set()
+        self._pending_writes = 0
+
+    @staticmethod
+    def _csr(rows: List[Tuple[int, int, int]], node_count: int, key: int, other: int):
+        offsets = array('i', [0]) * (node_count + 1)
+        for row in rows:
+            offsets[row[key] + 1] += 1
+        for i in range(node_count):
+            offsets[i + 1] += offsets[i]
+
+        neighbors = array('i', [0]) * len(rows)
+        types = array('i', [0]) * len(rows)
+        cursor = array('i', offsets[:-1])
+        for row in rows:
+            position = cursor[row[key]]
+            neighbors[position] = row[other]
+            types[position] = row[2]
+            cursor[row[key]] += 1
+        return offsets, neighbors, types
+
+    def _encode(self, value: Any) -> int:
+        if not isinstance(value, str):
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def _append_node(self, node_id: int, label: int, data: dict) -> None:
+        row = len(self.node_ids)
+        self.node_ids.append(node_id)
+        self.labels.append(label)
+        self.alive.append(1)
+        self.nationality.append(-1)
+        self.medium.append(-1)
+        self.dates.append(None)
+        self.movements.append(())
+        self.properties.append({})
+        self.index[node_id] = row
+        self._set_node(row, label, data)
+
+    def _set_node(self, row: int, label: int, data: dict) -> None:
+        self.labels[row] = label
+        self.properties[row] = data
+        if label == ARTIST:
+            self.nationality[row] = self._encode(data.get('Ar_Nationality'))
+            self.dates[row] = data.get('Ar_BirthDay')
+            movements = data.get('Ar_Movement')
+            self.movements[row] = tuple(self._encode(m) for m in movements) if isinstance(movements, list) else ()
+        else:
+            self.medium[row] = self._encode(data.get('Art_Medium'))
+            self.dates[row] = data.get('Art_Year')
+
+    def _out_edges(self, row: int) -> Iterator[Tuple[int, int]]:
+        if row < len(self.out_offsets) - 1:
+            for position in range(self.out_offsets[row], self.out_offsets[row + 1]):
+                target, rel_type = self.out_targets[position], self.out_types[position]
+                if (row, target, rel_type) not in self._removed:
+                    yield target, rel_type
+        yield from self._added_out.get(row, ())
+
+    def _in_edges(self, row: int) -> Iterator[Tuple[int, int]]:
+        if row < len(self.in_offsets) - 1:
+            for position in range(self.in_offsets[row], self.in_offsets[row + 1]):
+                source, rel_type = self.in_sources[position], self.in_types[position]
+                if (source, row, rel_type) not in self._removed:
+                    yield source, rel_type
+        yield from self._added_in.get(row, ())
+
+    def _node_filter(
+            self,
+            nationalities: Optional[List[str]] = None,
+            mediums: Optional[List[str]] = None,
+            movements: Optional[List[str]] = None,
+            year_min: Optional[str] = None,
+            year_max: Optional[str] = None,
+            exclude_artists: bool = False,
+            exclude_artworks: bool = False,
+            by_creator: bool = False,
+            year_before: Optional[str] = None
+    ) -> Callable[[int], bool]:
+        """
+        Traduit les filtres de graph_service en prédicat sur une ligne,
+        avec la même sémantique que les clauses WHERE Cypher.
+        """
+        date_min = year_min + "-01-01" if year_min is not None else None
+        date_max = year_max + "-01-01" if year_max is not None else None
+        date_before = year_before + "-01-01" if year_before is not None else None
+        nationality_codes = {self._codes[v] for v in nationalities if v in self._codes} if nationalities else None
+        medium_codes = {self._codes[v] for v in mediums if v in self._codes} if mediums else None
+        movement_codes = {self._codes[v] for v in movements if v in self._codes} if movements else None
+        created_code = self._codes.get('CREATED')
+        by_creator = by_creator and (nationality_codes is not None or movement_codes is not None)
+
+        def creator_matches(row: int) -> bool:
+            if nationality_codes is not None and self.nationality[row] not in nationality_codes:
+                return False
+            if movement_codes is not None and movement_codes.isdisjoint(self.movements[row]):
+                return False
+            return True
+
+        def accept(row: int) -> bool:
+            if not self.alive[row]:
+                return False
+
+            date = self.dates[row]
+            if (date_min is not None or date_max is not None or date_before is not None) and not isinstance(date, str):
+                return False
+            if date_min is not None and date < date_min:
+                return False
+            if date_max is not None and date > date_max:
+                return False
+            if date_before is not None and date >= date_before:
+                return False
+
+            if self.labels[row] == ARTIST:
+                if exclude_artists:
+                    return False
+                if nationality_codes is not None and self.nationality[row] not in nationality_codes:
+                    return False
+                if movement_codes is not None and movement_codes.isdisjoint(self.movements[row]):
+                    return False
+                return True
+
+            if exclude_artworks:
+                return False
+            if medium_codes is not None and self.medium[row] not in medium_codes:
+                return False
+            if by_creator:
+                return any(
+                    rel_type == created_code and self.alive[source] and self.labels[source] == ARTIST and creator_matches(source)
+                    for source, rel_type in self._in_edges(row)
+                )
+            return True
+
+        return accept
+
+    def _neighbors(self, frontier: List[int], direction: str) -> Iterator[int]:
+        edges = self._out_edges if direction == 'out' else self._in_edges
+        for row in frontier:
+            for neighbor, _ in edges(row):
+                if self.alive[neighbor]:
+                    yield neighbor
+
+    def _payload(self, node_rows: Iterable[int], edge_rows: Set[int]) -> Dict[str, Any]:
+        artists = []
+        artworks = []
+        for row in node_rows:
+            label = self.labels[row]
+            item = {
+                'data': self.properties[row],
+                'id': self.node_ids[row],
+                'type': LABELS[label]
+            }
+            (artists if label == ARTIST else artworks).append(item)
+
+        relations = [
+            {'source': self.node_ids[row], 'target': self.node_ids[target]}
+            for row in sorted(edge_rows)
+            for target, _ in self._out_edges(row)
+            if target in edge_rows
+        ]
+        return {'artists': artists, 'artworks': artworks, 'relations': relations}
+
+    def graph(self, **filters) -> List[Dict[str, Any]]:
+        """
+        Équivalent en mémoire de graph_service.get_graph
+        """
+        with self._lock:
+            accept = self._node_filter(**filters)
+            selected = [row for row in range(len(self.node_ids)) if accept(row)]
+            return [self._payload(selected, set(selected))]
+
+    def subgraph(
+            self,
+            central_node_id: int,
+            depth: Optional[int] = None,
+            max_nodes: Optional[int] = None,
+            direction: str = 'both',
+            **filters
+    ) -> List[Dict[str, Any]]:
+        """
+        Équivalent en mémoire de graph_service.get_subgraph
+        """
+        with self._lock:
+            central = self.index.get(central_node_id)
+            if central is None:
+                return []
+
+            accept = self._node_filter(**filters)
+            reached, truncated = graph_traversal.bounded_expand(
+                central, self._neighbors, direction=direction, depth=depth, max_nodes=max_nodes
+            )
+            selected = {row for row in reached if accept(row)}
+            selected.add(central)
+            payload = self._payload(sorted(row for row in selected if accept(row)), selected)
+            payload['truncated'] = truncated
+            return [payload]
+
+    def paths(
+            self,
+            source_id: int,
+            target_id: int,
+            max_depth: Optional[int] = None,
+            limit: Optional[int] = None,
+            direction: str = 'both',
+            **filters
+    ) -> List[Dict[str, Any]]:
+        """
+        Équivalent en mémoire de graph_service.get_path
+        """
+        with self._lock:
+            source = self.index.get(source_id)
+            target = self.index.get(target_id)
+            if source is None or target is None:
+                return []
+
+            codes = {self._codes[t] for t in graph_traversal.PATH_RELATIONS if t in self._codes}
+
+            def neighbors(row: int, d: str) -> Iterator[int]:
+                edges = self._out_edges if d == 'out' else self._in_edges
+                return (neighbor for neighbor, rel_type in edges(row) if rel_type in codes and self.alive[neighbor])
+
+            row_paths = graph_traversal.shortest_paths(
+                source, target, neighbors, direction=direction, max_depth=max_depth,
+                accept=self._node_filter(**filters), limit=limit
+            )
+
+            rows = sorted({row for path in row_paths for row in path})
+            payload = self._payload(rows, set())
+            steps = {(a, b) for path in row_paths for a, b in zip(path, path[1:])}
+            payload['relations'] = [
+                {'source': self.node_ids[a], 'target': self.node_ids[b]}
+                for a, b in sorted(steps | {(b, a) for a, b in steps})
+                if any(neighbor == b for neighbor in neighbors(a, 'out'))
+            ]
+            payload['paths'] = [[self.node_ids[row] for row in path] for path in row_paths]
+            return [payload]
+
+    def upsert_node(self, node_id: int, label: str, data: dict) -> None:
+        with self._lock:
+            label_code = LABELS.index(label)
+            row = self.index.get(node_id)
+            if row is None:
+                self._append_node(node_id, label_code, data)
+            else:
+                self._set_node(row, label_code, data)
+
+    def delete_node(self, node_id: int) -> None:
+        with self._lock:
+            row = self.index.pop(node_id, None)
+            if row is None:
+                return
+            self.alive[row] = 0
+            self._after_write()
+
+    def add_edge(self, source: int, target: int, rel_type: str) -> None:
+        with self._lock:
+            source_row = self.index.get(source)
+            target_row = self.index.get(target)
+            if source_row is None or target_row is None:
+                return
+            code = self._encode(rel_type)
+            if (target_row, code) in self._out_edges(source_row):
+                return
+            self._added_out.setdefault(source_row, []).append((target_row, code))
+            self._added_in.setdefault(target_row, []).append((source_row, code))
+            self._after_write()
+
+    def remove_edge(self, source: int, target: int, rel_type: str) -> None:
+        with self._lock:
+            source_row = self.index.get(source)
+            target_row = self.index.get(target)
+            if source_row is None or target_row is None or rel_type not in self._codes:
+                return
+            code = self._codes[rel_type]
+            if (target_row, code) in self._added_out.get(source_row, []):
+                self._added_out[source_row].remove((target_row, code))
+                self._added_in[target_row].remove((source_row, code))
+            self._removed.add((source_row, target_row, code))
+            self._after_write()
+
+    def _after_write(self) -> None:
+        self._pending_writes += 1
+        if self._pending_writes >= COMPACTION_THRESHOLD:
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Reconstruit les colonnes et les tableaux CSR sans les lignes supprimées ni le delta
+        """
+        live_rows = [row for row in range(len(self.node_ids)) if self.alive[row]]
+        nodes = [(self.node_ids[row], self.labels[row], self.properties[row]) for row in live_rows]
+        edges = [
+            (self.node_ids[row], self.node_ids[target], self.strings[rel_type])
+            for row in live_rows
+            for target, rel_type in self._out_edges(row)
+            if self.alive[target]
+        ]
+        self._build(nodes, edges)
+
+    def node_count(self) -> int:
+        return len(self.index)
+
+    def edge_count(self) -> int:
+        with self._lock:
+            return sum(
+                1
+                for row in range(len(self.node_ids)) if self.alive[row]
+                for target, _ in self._out_edges(row) if self.alive[target]
+            )
+
+    def memory_bytes(self) -> int:
+        """
+        Estimation de la mémoire occupée par les colonnes, l'index et les propriétés
+        """
+        with self._lock:
+            columns = [
+                self.node_ids, self.labels, self.alive, self.nationality, self.medium,
+                self.out_offsets, self.out_targets, self.out_types,
+                self.in_offsets, self.in_sources, self.in_types,
+                self.dates, self.movements, self.properties, self.index, self.strings
+            ]
+            total = sum(sys.getsizeof(column) for column in columns)
+            total += sum(sys.getsizeof(s) for s in self.strings)
+            total += sum(sys.getsizeof(data) for data in self.properties)
+            return total
+
+
+_snapshot: Optional[GraphSnapshot] = None
+# Écritures des autres workers contenues dans le snapshot (voir graph_changes.foreign_version)
+_applied_foreign: Optional[int] = None
+_load_lock = threading.Lock()
+# Protège _snapshot, _loading et _missed_events entre le chargement et les abonnés aux écritures
+_events_lock = threading.Lock()
+_loading = False
+_missed_events: List[Tuple[str, dict]] = []
+# Rechargement en arrière-plan après une écriture d'un autre worker
+_reloader: Optional[threading.Thread] = None
+_reloader_lock = threading.Lock()
+_reloads = 0
+_latencies: Dict[str, deque] = {'graph': deque(maxlen=1000), 'subgraph': deque(maxlen=1000), 'path': deque(maxlen=1000)}
+
+
+def is_enabled() -> bool:
+    return SNAPSHOT_ENABLED
+
+
+def load_snapshot() -> Optional[GraphSnapshot]:
+    """
+    Charge tous les artistes, œuvres et relations depuis Neo4j
+    """
+    start = time.perf_counter()
+    node_records, edge_records = execute_reads([(NODES_QUERY, None), (EDGES_QUERY, None)])
+    if node_records is None or edge_records is None:
+        print("Erreur lors du chargement du snapshot du graphe")
+        return None
+
+    nodes = [
+        (record['id'], ARTIST if 'Artist' in record['labels'] else ARTWORK, record['data'])
+        for record in node_records
+    ]
+    edges = [(record['source'], record['target'], record['type']) for record in edge_records]
+
+    snapshot = GraphSnapshot(nodes, edges)
+    snapshot.load_seconds = time.perf_counter() - start
+    print(f"Snapshot du graphe chargé : {len(nodes)} nœuds, {len(edges)} relations en {snapshot.load_seconds:.2f}s")
+    return snapshot
+
+
+def seed_from_file(path: str) -> bool:
+    """
+    Remplit le snapshot depuis un fichier exporté (flask graph export) au lieu de Neo4j,
+    si le snapshot est activé. Comme pour un chargement depuis Neo4j, les écritures
+    publiées pendant la lecture du fichier sont rejouées ensuite (voir _install).
+    """
+    if not SNAPSHOT_ENABLED:
+        return False
+
+    def load() -> Optional[GraphSnapshot]:
+        start = time.perf_counter()
+        try:
+            snapshot = GraphSnapshot(
+                ((node_id, LABELS.index(label), data) for node_id, label, data in graph_dump.iter_nodes(path)),
+                graph_dump.iter_edges(path)
+            )
+        except (OSError, ValueError) as e:
+            print(f"Erreur lors de la lecture du snapshot {path} : {e}")
+            return None
+        snapshot.load_seconds = time.perf_counter() - start
+        print(f"Snapshot du graphe chargé depuis {path} : {len(snapshot.node_ids)} nœuds en {snapshot.load_seconds:.2f}s")
+        return snapshot
+
+    with _load_lock:
+        if _snapshot is not None:
+            return False
+        return _install(load) is not None
+
+
+def _install(load: Callable[[], Optional[GraphSnapshot]]) -> Optional[GraphSnapshot]:
+    """
+    Charge le snapshot avec load() puis l'installe. Les écritures publiées pendant le
+    chargement sont gardées puis rejouées ; le rejeu et l'installation se font sous
+    _events_lock, que prend aussi l'abonné : aucune écriture ne peut arriver entre les deux.
+    La version des écritures des autres workers est lue avant le chargement, qui les contient.
+    À appeler avec _load_lock.
+    """
+    global _snapshot, _loading, _applied_foreign
+    foreign = graph_changes.foreign_version()
+    with _events_lock:
+        _loading = True
+    snapshot = None
+    try:
+        snapshot = load()
+    finally:
+        with _events_lock:
+            if snapshot is not None:
+                for event, payload in _missed_events:
+                    _apply_event(snapshot, event, payload)
+                _snapshot = snapshot
+                _applied_foreign = foreign
+            _missed_events.clear()
+            _loading = False
+    return snapshot
+
+
+def _is_stale() -> bool:
+    """
+    True si un autre worker a écrit depuis le chargement : ses écritures ne sont pas
+    publiées dans ce processus, le snapshot ne les contient pas
+    """
+    foreign = graph_changes.foreign_version()
+    return foreign is not None and (_applied_foreign is None or foreign > _applied_foreign)
+
+
+def _reload() -> None:
+    global _reloads
+    with _load_lock:
+        if _is_stale() and _install(load_snapshot) is not None:
+            _reloads += 1
+
+
+def _schedule_reload() -> None:
+    global _reloader
+    with _reloader_lock:
+        if _reloader is None or not _reloader.is_alive():
+            _reloader = threading.Thread(target=_reload, name="graph-snapshot-reload", daemon=True)
+            _reloader.start()
+
+
+def get_snapshot() -> Optional[GraphSnapshot]:
+    """
+    Retourne le snapshot, chargé au premier appel. None si désactivé ou indisponible.
+
+    Après une écriture d'un autre worker (vue au plus GRAPH_DATA_VERSION_REFRESH
+    secondes après), le snapshot est rechargé en entier en arrière-plan ; en attente,
+    renvoie None et les lectures passent par Neo4j. Avec plusieurs workers qui écrivent
+    souvent, le snapshot est donc souvent rechargé : il convient surtout aux déploiements
+    où les écritures sont rares ou passent par un seul worker.
+    """
+    if not SNAPSHOT_ENABLED:
+        return None
+    if _snapshot is None:
+        with _load_lock:
+            if _snapshot is None:
+                _install(load_snapshot)
+        return _snapshot
+    if _is_stale():
+        _schedule_reload()
+        return None
+    return _snapshot
+
+
+def _timed(operation: str, compute: Callable[[GraphSnapshot], List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return None
+    start = time.perf_counter()
+    result = compute(snapshot)
+    _latencies[operation].append(time.perf_counter() - start)
+    return result
+
+
+def get_graph(**filters) -> Optional[List[Dict[str, Any]]]:
+    """
+    Répond à graph_service.get_graph depuis le snapshot, ou None s'il n'est pas disponible
+    """
+    return _timed('graph', lambda snapshot: snapshot.graph(**filters))
+
+
+def get_subgraph(central_node_id: int, **options) -> Optional[List[Dict[str, Any]]]:
+    """
+    Répond à graph_service.get_subgraph depuis le snapshot, ou None s'il n'est pas disponible
+    """
+    return _timed('subgraph', lambda snapshot: snapshot.subgraph(central_node_id, **options))
+
+
+def get_path(source_id: int, target_id: int, **options) -> Optional[List[Dict[str, Any]]]:
+    """
+    Répond à graph_service.get_path depuis le snapshot, ou None s'il n'est pas disponible
+    """
+    return _timed('path', lambda snapshot: snapshot.paths(source_id, target_id, **options))
+
+
+def _percentile(samples: List[float], percentile: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(percentile * len(ordered)) - 1)]
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Temps de chargement, mémoire par nœud et latences du snapshot
+    """
+    snapshot = _snapshot
+    stats: Dict[str, Any] = {'enabled': SNAPSHOT_ENABLED, 'loaded': snapshot is not None, 'reloads': _reloads}
+
+    if snapshot is not None:
+        node_count = snapshot.node_count()
+        memory = snapshot.memory_bytes()
+        stats.update({
+            'nodes': node_count,
+            'edges': snapshot.edge_count(),
+            'load_seconds': snapshot.load_seconds,
+            'memory_bytes': memory,
+            'bytes_per_node': memory / node_count if node_count else None
+        })
+
+    stats['latency_ms'] = {}
+    for operation, samples in _latencies.items():
+        values = list(samples)
+        p50 = _percentile(values, 0.50)
+        p99 = _percentile(values, 0.99)
+        stats['latency_ms'][operation] = {
+            'count': len(values),
+            'p50': p50 * 1000 if p50 is not None else None,
+            'p99': p99 * 1000 if p99 is not None else None
+        }
+    return stats
+
+
+def _apply_event(snapshot: GraphSnapshot, event: str, payload: dict) -> None:
+    if event in (graph_events.NODE_CREATED, graph_events.NODE_UPDATED):
+        snapshot.upsert_node(payload['node_id'], payload['label'], payload['data'])
+    elif event == graph_events.NODE_DELETED:
+        snapshot.delete_node(payload['node_id'])
+    elif event == graph_events.RELATION_CREATED:
+        snapshot.add_edge(payload['source'], payload['target'], payload['type'])
+    elif event == graph_events.RELATION_DELETED:
+        snapshot.remove_edge(payload['source'], payload['target'], payload['type'])
+
+
+@graph_events.subscribe
+def _on_graph_event(event: str, **payload) -> None:
+    # Pendant un chargement (ou un rechargement), les écritures sont aussi gardées pour
+    # être rejouées sur le nouveau snapshot
+    with _events_lock:
+        if _loading:
+            _missed_events.extend(graph_events.unfold(event, payload))
+        snapshot = _snapshot
+    if snapshot is None:
+        return
+    for change, data in graph_events.unfold(event, payload):
+        _apply_event(snapshot, change, data)
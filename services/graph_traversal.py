@@ -0,0 +1,205 @@
+import itertools
+import os
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from config.db_connection import execute_read
+
+DIRECTIONS = ('out', 'in', 'both')
+
+# Limites d'un parcours de sous-graphe : valeurs par défaut, et plafond des valeurs demandées
+MAX_DEPTH = int(os.getenv("SUBGRAPH_MAX_DEPTH") or "3")
+MAX_NODES = int(os.getenv("SUBGRAPH_MAX_NODES") or "500")
+
+# Relations suivies par /graphs/path, longueur maximale et nombre de chemins :
+# valeurs par défaut, et plafond des valeurs demandées
+PATH_RELATIONS = ('INSPIRE', 'CREATED')
+PATH_MAX_DEPTH = int(os.getenv("PATH_MAX_DEPTH") or "6")
+PATH_MAX_RESULTS = int(os.getenv("PATH_MAX_RESULTS") or "10")
+
+NEIGHBOR_QUERIES = {
+    'out': """
+    UNWIND $frontier AS nodeId
+    MATCH (node)-->(neighbor)
+    WHERE id(node) = nodeId
+    RETURN DISTINCT id(neighbor) AS id
+    ORDER BY id
+    """,
+    'in': """
+    UNWIND $frontier AS nodeId
+    MATCH (neighbor)-->(node)
+    WHERE id(node) = nodeId
+    RETURN DISTINCT id(neighbor) AS id
+    ORDER BY id
+    """
+}
+
+
+def clamp_limits(depth: Optional[int], max_nodes: Optional[int]) -> Tuple[int, int]:
+    """
+    Profondeur et budget de nœuds d'un parcours : MAX_DEPTH et MAX_NODES si la
+    requête ne les précise pas, et jamais au-delà
+    """
+    depth = MAX_DEPTH if depth is None else min(depth, MAX_DEPTH)
+    max_nodes = MAX_NODES if max_nodes is None else min(max_nodes, MAX_NODES)
+    return depth, max_nodes
+
+
+def clamp_path_limits(max_depth: Optional[int], limit: Optional[int]) -> Tuple[int, int]:
+    """
+    Longueur maximale et nombre de chemins d'une recherche de chemins : PATH_MAX_DEPTH
+    et PATH_MAX_RESULTS si la requête ne les précise pas, et jamais au-delà
+    """
+    max_depth = PATH_MAX_DEPTH if max_depth is None else min(max_depth, PATH_MAX_DEPTH)
+    limit = PATH_MAX_RESULTS if limit is None else min(limit, PATH_MAX_RESULTS)
+    return max_depth, limit
+
+
+def bounded_expand(
+        start: Hashable,
+        neighbors: Callable[[List[Hashable], str], Iterable[Hashable]],
+        direction: str = 'both',
+        depth: Optional[int] = None,
+        max_nodes: Optional[int] = None
+) -> Tuple[Set[Hashable], bool]:
+    """
+    Parcours en largeur depuis start, une frontière (un niveau) à la fois.
+
+    Avec direction 'both', les nœuds atteignables en suivant les relations
+    sortantes et ceux qui atteignent start sont cherchés séparément, comme les
+    chemins (centralNode)-[*]->(node) et (node)-[*]->(centralNode).
+
+    Args:
+        start: Nœud de départ
+        neighbors: Fonction (frontière, 'out' | 'in') -> voisins de la frontière
+        direction: 'out', 'in' ou 'both'
+        depth: Nombre maximal de niveaux explorés
+        max_nodes: Nombre maximal de nœuds atteints
+
+    Returns:
+        Les nœuds atteints par un chemin de longueur > 0, et True si le parcours
+        a été tronqué (budget de nœuds épuisé, ou profondeur atteinte avec une
+        frontière encore non vide)
+    """
+    directions = ('out', 'in') if direction == 'both' else (direction,)
+    frontiers: Dict[str, List[Hashable]] = {d: [start] for d in directions}
+    seen: Dict[str, Set[Hashable]] = {d: {start} for d in directions}
+    reached: Set[Hashable] = set()
+    level = 0
+
+    while any(frontiers.values()):
+        if depth is not None and level >= depth:
+            return reached, True
+        level += 1
+
+        for d in directions:
+            next_frontier = []
+            for node in neighbors(frontiers[d], d):
+                if node in seen[d]:
+                    continue
+                if node not in reached:
+                    if max_nodes is not None and len(reached) >= max_nodes:
+                        return reached, True
+                    reached.add(node)
+                seen[d].add(node)
+                next_frontier.append(node)
+            frontiers[d] = next_frontier
+
+    return reached, False
+
+
+def neo4j_neighbors(frontier: List[int], direction: str) -> List[int]:
+    """
+    Voisins d'une frontière d'identifiants Neo4j, en une requête par niveau
+    """
+    if not frontier:
+        return []
+    results = execute_read(NEIGHBOR_QUERIES[direction], {'frontier': frontier})
+    if results is None:
+        raise RuntimeError("Erreur lors de l'expansion de la frontière du sous-graphe")
+    return [record['id'] for record in results]
+
+
+def _walk(node: Hashable, parents: Dict[Hashable, List[Hashable]]) -> Iterator[List[Hashable]]:
+    """
+    Chemins de la racine d'un parcours jusqu'à node, en remontant les parents
+    """
+    if not parents[node]:
+        yield [node]
+        return
+    for parent in parents[node]:
+        for path in _walk(parent, parents):
+            yield path + [node]
+
+
+def shortest_paths(
+        start: Hashable,
+        goal: Hashable,
+        neighbors: Callable[[Hashable, str], Iterable[Hashable]],
+        direction: str = 'both',
+        max_depth: Optional[int] = None,
+        accept: Optional[Callable[[Hashable], bool]] = None,
+        limit: Optional[int] = None
+) -> List[List[Hashable]]:
+    """
+    Plus courts chemins de start à goal, par un parcours en largeur lancé depuis
+    les deux extrémités. On étend à chaque fois la plus petite des deux frontières,
+    un niveau entier à la fois ; au premier niveau où elles se rencontrent, les
+    nœuds de rencontre de longueur totale minimale donnent tous les plus courts chemins.
+
+    Args:
+        start: Nœud de départ
+        goal: Nœud d'arrivée (différent de start)
+        neighbors: Fonction (nœud, 'out' | 'in') -> voisins du nœud
+        direction: 'out' (relations suivies dans leur sens), 'in' (sens inverse) ou 'both'
+        max_depth: Longueur maximale d'un chemin
+        accept: Prédicat sur les nœuds intermédiaires (les extrémités sont toujours acceptées)
+        limit: Nombre maximal de chemins renvoyés
+
+    Returns:
+        Les chemins (listes de nœuds de start à goal), vide s'il n'y en a pas
+    """
+    reverse = {'out': 'in', 'in': 'out', 'both': 'both'}
+    side_directions = (direction, reverse[direction])
+
+    def expand(node: Hashable, d: str) -> Iterable[Hashable]:
+        if d == 'both':
+            return itertools.chain(neighbors(node, 'out'), neighbors(node, 'in'))
+        return neighbors(node, d)
+
+    distances: Tuple[Dict[Hashable, int], ...] = ({start: 0}, {goal: 0})
+    parents: Tuple[Dict[Hashable, List[Hashable]], ...] = ({start: []}, {goal: []})
+    frontiers = [[start], [goal]]
+    depths = [0, 0]
+
+    while frontiers[0] and frontiers[1]:
+        if max_depth is not None and depths[0] + depths[1] >= max_depth:
+            return []
+
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        distance, parent = distances[side], parents[side]
+        next_frontier = []
+        for node in frontiers[side]:
+            for neighbor in expand(node, side_directions[side]):
+                if neighbor not in distance:
+                    if accept is not None and neighbor not in (start, goal) and not accept(neighbor):
+                        continue
+                    distance[neighbor] = distance[node] + 1
+                    parent[neighbor] = [node]
+                    next_frontier.append(neighbor)
+                elif distance[neighbor] == distance[node] + 1 and node not in parent[neighbor]:
+                    parent[neighbor].append(node)
+        frontiers[side] = next_frontier
+        depths[side] += 1
+
+        meeting = [node for node in next_frontier if node in distances[1 - side]]
+        if meeting:
+            length = min(distances[0][node] + distances[1][node] for node in meeting)
+            paths = (
+                head + tail[-2::-1]
+                for node in meeting if distances[0][node] + distances[1][node] == length
+                for head in _walk(node, parents[0])
+                for tail in _walk(node, parents[1])
+            )
+            return list(itertools.islice(paths, limit))
+
+    return []
@@ -0,0 +1,52 @@
+import codecs
+import csv
+import json
+from typing import Any, Iterable, Iterator, Tuple
+
+from flask import request
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/jsonlines')
+
+
+def _ndjson_rows(lines: Iterable[bytes]) -> Iterator[Tuple[int, Any]]:
+    row_number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line)
+        except ValueError:
+            # Ligne invalide : signalée comme erreur de cette ligne, sans arrêter l'import
+            yield row_number, None
+
+
+def _csv_rows(lines: Iterable[bytes]) -> Iterator[Tuple[int, Any]]:
+    reader = csv.DictReader(codecs.iterdecode(lines, 'utf-8-sig'))
+    for row_number, row in enumerate(reader, start=1):
+        # Colonnes vides : champ absent, comme une clé manquante en JSON
+        yield row_number, {key: value for key, value in row.items() if key and value not in (None, '')}
+
+
+def read_rows() -> Iterator[Tuple[int, Any]]:
+    """
+    Lignes du corps de la requête, numérotées à partir de 1, selon le Content-Type :
+    tableau JSON (application/json), un objet JSON par ligne (application/x-ndjson)
+    ou CSV avec une ligne d'en-tête (text/csv). Le NDJSON et le CSV sont lus au fur
+    et à mesure de la réception, sans charger tout le corps.
+    Une ligne illisible est renvoyée avec la valeur None.
+
+    Raises:
+        ValueError: Si le Content-Type n'est pas supporté ou si le JSON n'est pas un tableau
+    """
+    mimetype = request.mimetype
+    if mimetype == 'application/json':
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            raise ValueError("Body must be a JSON array")
+        return enumerate(rows, start=1)
+    if mimetype in NDJSON_MIMETYPES:
+        return _ndjson_rows(request.stream)
+    if mimetype == 'text/csv':
+        return _csv_rows(request.stream)
+    raise ValueError("Content-Type must be application/json, application/x-ndjson or text/csv")
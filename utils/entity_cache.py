@@ -0,0 +1,336 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from utils.ttl_cache import TTLCache
+
+# Cache des lectures par identifiant (artiste, œuvre et leurs voisins) :
+# 'memory' (dans le processus), 'redis' (partagé entre processus) ou 'none'
+BACKEND = os.getenv("ENTITY_CACHE_BACKEND", "memory").lower()
+# Durée (secondes) de vie d'une entrée : borne la durée d'une donnée périmée si la
+# version partagée des données ne peut pas être lue (backend memory)
+TTL = float(os.getenv("ENTITY_CACHE_TTL", "300"))
+# Intervalle (secondes) entre deux lectures de la version partagée des données par le
+# backend memory : borne la durée d'une donnée périmée après une écriture d'un autre processus
+VERSION_CHECK_INTERVAL = float(os.getenv("ENTITY_CACHE_VERSION_CHECK", "1"))
+# Nombre maximal d'entrées du backend memory
+MAX_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", "10000"))
+REDIS_URL = os.getenv("ENTITY_CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Préfixe des clés Redis, pour partager un serveur avec d'autres applications
+REDIS_PREFIX = os.getenv("ENTITY_CACHE_REDIS_PREFIX", "erua:entity:")
+# Serveur Redis par lequel les processus du backend memory s'envoient les clés invalidées
+# (pub/sub) ; vide = cache vidé en entier après chaque écriture d'un autre processus
+INVALIDATION_URL = os.getenv("ENTITY_CACHE_INVALIDATION_URL", "")
+INVALIDATION_CHANNEL = REDIS_PREFIX + "invalidations"
+
+# Une entrée est identifiée par (type, identifiant), par exemple ('artist', 12)
+Key = Tuple[str, Any]
+
+
+class MemoryBackend(TTLCache):
+    """
+    Backend dans le processus : LRU borné à max_size entrées, chacune expirant après ttl secondes
+    """
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.delete(key)
+
+
+class RedisBackend:
+    """
+    Backend partagé sur un serveur parlant le protocole Redis (Redis, Valkey, KeyDB...).
+    Les valeurs sont stockées en JSON avec une expiration ; les évictions sont
+    celles du serveur (politique maxmemory). En cas d'erreur du serveur, les
+    lectures sont des absences et les écritures sont ignorées.
+    """
+
+    def __init__(self, url: str = REDIS_URL, ttl: float = TTL, prefix: str = REDIS_PREFIX):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=1)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        try:
+            value = self._client.get(self.prefix + key)
+        except Exception as e:
+            print(f"Erreur de lecture du cache Redis : {e}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self._client.set(self.prefix + key, json.dumps(value, default=str), px=int(self.ttl * 1000))
+        except Exception as e:
+            print(f"Erreur d'écriture du cache Redis : {e}")
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = [self.prefix + key for key in keys]
+        if not keys:
+            return
+        try:
+            self._client.delete(*keys)
+        except Exception as e:
+            # Entrées non invalidées : elles expireront après ttl secondes
+            print(f"Erreur d'invalidation du cache Redis : {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            info = self._client.info('stats')
+        except Exception as e:
+            return {'error': str(e)}
+        # Compteurs du serveur entier, pas seulement des clés de ce cache
+        return {'evictions': info.get('evicted_keys'), 'expirations': info.get('expired_keys')}
+
+
+class RedisInvalidationBus:
+    """
+    Canal pub/sub Redis par lequel les processus s'envoient les clés qu'ils invalident.
+    Un thread écoute le canal et se réabonne après une coupure. Les messages envoyés
+    pendant une coupure sont perdus : connected vaut False jusqu'au réabonnement.
+    """
+
+    def __init__(self, url: str = INVALIDATION_URL, channel: str = INVALIDATION_CHANNEL):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=1, health_check_interval=30)
+        self.channel = channel
+        # Un processus ignore ses propres messages : il a déjà retiré ces clés
+        self.sender = uuid.uuid4().hex
+        self.connected = False
+
+    def start(self, on_keys: Callable[[list], None], on_connect: Callable[[], None]) -> None:
+        """
+        Lance l'écoute : on_keys reçoit les clés invalidées par les autres processus,
+        on_connect est appelé à chaque abonnement, avant que connected passe à True
+        """
+        threading.Thread(target=self._listen, args=(on_keys, on_connect), name="entity-cache-bus", daemon=True).start()
+
+    def publish(self, keys: list) -> None:
+        try:
+            self._client.publish(self.channel, json.dumps({'sender': self.sender, 'keys': keys}))
+        except Exception as e:
+            # Les autres processus gardent ces entrées jusqu'à leur expiration
+            print(f"Erreur de publication des invalidations du cache : {e}")
+
+    def _listen(self, on_keys: Callable[[list], None], on_connect: Callable[[], None]) -> None:
+        while True:
+            try:
+                pubsub = self._client.pubsub()
+                pubsub.subscribe(self.channel)
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    if message['type'] == 'subscribe':
+                        on_connect()
+                        self.connected = True
+                    elif message['type'] == 'message':
+                        payload = json.loads(message['data'])
+                        if payload['sender'] != self.sender:
+                            on_keys(payload['keys'])
+            except Exception as e:
+                self.connected = False
+                print(f"Erreur de l'abonnement aux invalidations du cache : {e}")
+                time.sleep(1)
+
+
+class EntityCache:
+    """
+    Cache en lecture (read-through) devant les fonctions de lecture par identifiant.
+    Les fonctions d'écriture invalident les entrées exactes qu'elles rendent périmées.
+
+    Une valeur lue pendant une invalidation n'est pas gardée : une lecture commencée
+    avant une écriture ne peut pas remettre en cache l'ancienne valeur.
+
+    Avec le backend memory, les invalidations sont envoyées aux autres processus par
+    bus (voir RedisInvalidationBus) s'il y en a un : tant qu'il est déconnecté, des
+    invalidations ont pu être perdues, le cache est contourné puis vidé au réabonnement.
+    Sans bus, les écritures des autres processus sont suivies par follow_version.
+    """
+
+    def __init__(self, backend: Any, bus: Any = None):
+        self.backend = backend
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = defaultdict(int)
+        self._misses: Dict[str, int] = defaultdict(int)
+        self._invalidations = 0
+        # Version partagée des données (follow_version) : source, dernière valeur lue et date de lecture
+        self._version_source: Optional[Callable[[], Optional[int]]] = None
+        self._version_interval = VERSION_CHECK_INTERVAL
+        self._version: Optional[int] = None
+        self._version_checked_at = float('-inf')
+        self._version_lock = threading.Lock()
+        self._version_clears = 0
+        self._remote_invalidations = 0
+        self._bus_clears = 0
+        self._bypasses = 0
+        self._bus = bus if isinstance(backend, MemoryBackend) else None
+        if self._bus is not None:
+            self._bus.start(self._on_remote_invalidation, self._on_bus_connected)
+
+    def follow_version(self, version: Callable[[], Optional[int]], interval: float = VERSION_CHECK_INTERVAL) -> None:
+        """
+        Vide le cache quand version() change : version doit renvoyer une valeur partagée
+        par tous les processus et modifiée par chaque écriture (None si elle est illisible).
+        Elle est relue au plus toutes les interval secondes, lors d'une lecture du cache.
+        Seulement pour le backend memory sans bus : les invalidations du backend redis,
+        ou envoyées par le bus, sont déjà vues par tous les processus.
+        """
+        if isinstance(self.backend, MemoryBackend) and self._bus is None:
+            self._version_source = version
+            self._version_interval = interval
+
+    def _check_version(self) -> None:
+        if self._version_source is None or time.monotonic() < self._version_checked_at + self._version_interval:
+            return
+        # Un seul thread relit la version ; les autres utilisent le cache en attendant
+        if not self._version_lock.acquire(blocking=False):
+            return
+        try:
+            version = self._version_source()
+            self._version_checked_at = time.monotonic()
+            if version is None:
+                return
+            if self._version is not None and version != self._version:
+                # Une écriture a eu lieu, peut-être dans un autre processus : on ne sait pas
+                # quelles entrées elle rend périmées
+                with self._lock:
+                    self._generation += 1
+                    self._version_clears += 1
+                    self.backend.clear()
+            self._version = version
+        finally:
+            self._version_lock.release()
+
+    def _on_remote_invalidation(self, keys: list) -> None:
+        with self._lock:
+            self._generation += 1
+            self._remote_invalidations += 1
+            self.backend.delete_many(keys)
+
+    def _on_bus_connected(self) -> None:
+        # Des invalidations ont pu être envoyées avant l'abonnement : tout est vidé
+        with self._lock:
+            self._generation += 1
+            self._bus_clears += 1
+            self.backend.clear()
+
+    @staticmethod
+    def _key(kind: str, entity_id: Any) -> str:
+        return f"{kind}:{entity_id}"
+
+    def get_or_load(self, kind: str, entity_id: Any, load: Callable[[], Any]) -> Any:
+        """
+        Valeur en cache de (kind, entity_id), ou valeur de load() gardée en cache
+        (les absences, None, ne sont pas gardées)
+        """
+        if self.backend is None:
+            return load()
+        if self._bus is not None and not self._bus.connected:
+            self._bypasses += 1
+            return load()
+
+        self._check_version()
+        key = self._key(kind, entity_id)
+        value = self.backend.get(key)
+        if value is not None:
+            self._hits[kind] += 1
+            return value
+
+        self._misses[kind] += 1
+        generation = self._generation
+        value = load()
+        if value is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self.backend.set(key, value)
+        return value
+
+    def cached(self, kind: str):
+        """
+        Décorateur d'une fonction de lecture dont le premier argument est l'identifiant
+        """
+        def decorator(load):
+            @wraps(load)
+            def wrapper(entity_id, *args, **kwargs):
+                return self.get_or_load(kind, entity_id, lambda: load(entity_id, *args, **kwargs))
+            return wrapper
+        return decorator
+
+    def invalidate(self, *keys: Key) -> None:
+        """
+        Retire les entrées (type, identifiant) données, par exemple ('artist', 12)
+        """
+        if self.backend is None:
+            return
+        cache_keys = [self._key(kind, entity_id) for kind, entity_id in keys if entity_id is not None]
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            self.backend.delete_many(cache_keys)
+        if self._bus is not None:
+            self._bus.publish(cache_keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Succès, absences et taux de succès par type d'entrée, invalidations (locales et
+        reçues par le bus), vidages (changement de la version partagée, abonnement au bus),
+        lectures sans cache (bus déconnecté), et compteurs du backend (taille, évictions, expirations)
+        """
+        kinds = sorted(set(self._hits) | set(self._misses))
+        hits = sum(self._hits.values())
+        calls = hits + sum(self._misses.values())
+        return {
+            'backend': BACKEND if self.backend is not None else 'none',
+            'hits': hits,
+            'misses': calls - hits,
+            'hit_ratio': hits / calls if calls else None,
+            'invalidations': self._invalidations,
+            'version_clears': self._version_clears,
+            'remote_invalidations': self._remote_invalidations,
+            'bus_clears': self._bus_clears,
+            'bypasses': self._bypasses,
+            'kinds': {
+                kind: {
+                    'hits': self._hits[kind],
+                    'misses': self._misses[kind],
+                    'hit_ratio': self._hits[kind] / (self._hits[kind] + self._misses[kind])
+                }
+                for kind in kinds
+            },
+            'backend_stats': self.backend.stats() if self.backend is not None else None
+        }
+
+
+def _create_backend() -> Any:
+    if BACKEND == 'none':
+        return None
+    if BACKEND == 'redis':
+        try:
+            return RedisBackend()
+        except ImportError:
+            print("Le paquet redis n'est pas installé : cache des entités en mémoire")
+    return MemoryBackend(max_size=MAX_SIZE, ttl=TTL)
+
+
+def _create_bus(backend: Any) -> Optional[RedisInvalidationBus]:
+    if not INVALIDATION_URL or not isinstance(backend, MemoryBackend):
+        return None
+    try:
+        return RedisInvalidationBus()
+    except ImportError:
+        print("Le paquet redis n'est pas installé : cache des entités vidé après chaque écriture d'un autre processus")
+        return None
+
+
+_backend = _create_backend()
+entity_cache = EntityCache(_backend, _create_bus(_backend))
@@ -1,6 +1,15 @@
-from flask import jsonify, Response
+import base64
+import hashlib
+import json
+import os
+from functools import wraps
+from flask import jsonify, Response, current_app, request, stream_with_context
+from typing import Any, Callable, Dict, Iterable, Optional
 from datetime import datetime
 
+# Durée (secondes) pendant laquelle un navigateur ou un proxy peut resservir une réponse sans la revalider
+CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+
 
 def send_response(status: int = 200, messages: str = "", data="null") -> tuple[Response, int]:
     response = {
@@ -10,7 +19,6 @@ def send_response(status: int = 200, messages: str = "", data="null") -> tuple[R
         "messages": messages,
         "data": data
     }
-    print(response)
     return jsonify(response), status
 
 def send_error(status: int = 400, message: str = "") -> tuple[Response, int]:
@@ -23,6 +31,79 @@ def send_error(status: int = 400, message: str = "") -> tuple[Response, int]:
     }
     return jsonify(response), status
 
+def send_stream(items: Iterable[Any], status: int = 200) -> tuple[Response, int]:
+    """
+    Envoie les éléments en NDJSON (un objet JSON par ligne) au fur et à mesure de leur production.
+    Une erreur pendant l'envoi est signalée par une dernière ligne {"type": "Error"}.
+    """
+    def generate():
+        try:
+            for item in items:
+                yield current_app.json.dumps(item) + "\n"
+        except Exception as e:
+            print(f"Erreur lors de l'envoi du flux : {e}")
+            yield current_app.json.dumps({"type": "Error", "message": "Stream interrupted"}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson"), status
+
+def conditional_get(version: Callable[[], Optional[str]]):
+    """
+    Décorateur d'un endpoint GET : ajoute un ETag fort calculé à partir de la version
+    des données, de l'URL et de l'en-tête Accept, et répond 304 sans appeler l'endpoint
+    si le client envoie ce même ETag dans If-None-Match.
+
+    Seules les réponses 200 complètes sont marquées : ni les erreurs, ni les flux
+    (leur contenu peut échouer en cours d'envoi). Si la version est inconnue (None),
+    la réponse est envoyée sans ETag.
+
+    Args:
+        version: Fonction renvoyant la version actuelle des données, partagée par tous
+            les workers ; elle doit changer à chaque écriture
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Version lue avant la requête : une écriture concurrente donnera au pire un ETag déjà périmé
+            current = version()
+            if current is None:
+                return view(*args, **kwargs)
+
+            key = f"{current}|{request.full_path}|{request.headers.get('Accept', '')}"
+            etag = hashlib.sha1(key.encode()).hexdigest()
+            cache_control = f"public, max-age={CACHE_MAX_AGE}, must-revalidate"
+
+            if etag in request.if_none_match:
+                response, status = Response(status=304), 304
+            else:
+                response, status = view(*args, **kwargs)
+                if status != 200 or response.is_streamed:
+                    return response, status
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            response.vary.add('Accept')
+            return response, status
+        return wrapper
+    return decorator
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """
+    Curseur de pagination opaque pour le client (JSON en base64 URL)
+    """
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Optional[Dict[str, Any]]:
+    """
+    Position encodée par encode_cursor, ou None si le curseur est invalide
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(position, dict) or not isinstance(position.get('id'), int):
+        return None
+    return position
+
 def check_date(date_str: str) -> bool:
     try:
         datetime.strptime(date_str, "%Y-%m-%d")
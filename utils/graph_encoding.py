@@ -0,0 +1,108 @@
+import sys
+from array import array
+from typing import Any, Dict, List
+
+import msgpack
+
+COLUMNAR_MIMETYPE = "application/x-msgpack"
+COLUMNAR_VERSION = 1
+
+NODE_TYPES = ('Artist', 'Artwork')
+
+# Propriétés dont les valeurs se répètent beaucoup : codées par le dictionnaire de chaînes
+DICTIONARY_COLUMNS = {'Ar_Nationality', 'Ar_CountryBirth', 'Ar_CountryDeath', 'Ar_Movement', 'Art_Medium'}
+
+
+def _is_string_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _pack(typecode: str, values: List[int]) -> bytes:
+    """
+    Entiers empaquetés en petit-boutiste (int64 pour 'q', int32 pour 'i', uint8 pour 'B')
+    """
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def encode_columnar(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Encode la réponse de get_graph / get_subgraph en colonnes.
+
+    Format (version 1) :
+    - strings: dictionnaire des valeurs répétées (nationalités, médiums, mouvements...)
+    - nodes.id: identifiants Neo4j (int64), nodes.type: indice dans node_types (uint8)
+    - nodes.columns: une colonne par propriété, soit {'values': [...]}, soit pour les
+      colonnes de DICTIONARY_COLUMNS {'codes': int32} (-1 = absent), ou pour les listes
+      {'offsets': int32, 'codes': int32} (valeurs de la ligne i = codes[offsets[i]:offsets[i + 1]],
+      liste vide si absent). Une colonne de DICTIONARY_COLUMNS dont une valeur n'est ni
+      une chaîne (ou une liste de chaînes) ni absente est envoyée telle quelle ({'values': [...]})
+    - edges.source / edges.target: indices de ligne des nœuds (int32), pas leurs identifiants
+    """
+    record = records[0] if records else {'artists': [], 'artworks': [], 'relations': []}
+    nodes = record['artists'] + record['artworks']
+
+    strings: List[str] = []
+    codes: Dict[str, int] = {}
+
+    def encode(value: Any) -> int:
+        if value is None:
+            return -1
+        if value not in codes:
+            codes[value] = len(strings)
+            strings.append(value)
+        return codes[value]
+
+    keys = sorted({key for node in nodes for key in node['data']})
+    columns: Dict[str, Dict[str, Any]] = {}
+    for key in keys:
+        values = [node['data'].get(key) for node in nodes]
+        present = [value for value in values if value is not None]
+        if key in DICTIONARY_COLUMNS and present and all(_is_string_list(value) for value in present):
+            offsets = [0]
+            flat: List[int] = []
+            for value in values:
+                flat.extend(encode(item) for item in value or [])
+                offsets.append(len(flat))
+            columns[key] = {'offsets': _pack('i', offsets), 'codes': _pack('i', flat)}
+        elif key in DICTIONARY_COLUMNS and all(isinstance(value, str) for value in present):
+            columns[key] = {'codes': _pack('i', [encode(value) for value in values])}
+        else:
+            # Types mélangés : le dictionnaire perdrait des valeurs
+            columns[key] = {'values': values}
+
+    rows = {node['id']: row for row, node in enumerate(nodes)}
+    edges = [
+        (rows[relation['source']], rows[relation['target']])
+        for relation in record['relations']
+        if relation['source'] in rows and relation['target'] in rows
+    ]
+
+    payload = {
+        'version': COLUMNAR_VERSION,
+        'strings': strings,
+        'node_types': list(NODE_TYPES),
+        'nodes': {
+            'count': len(nodes),
+            'id': _pack('q', [node['id'] for node in nodes]),
+            'type': _pack('B', [NODE_TYPES.index(node['type']) for node in nodes]),
+            'columns': columns
+        },
+        'edges': {
+            'count': len(edges),
+            'source': _pack('i', [source for source, _ in edges]),
+            'target': _pack('i', [target for _, target in edges])
+        }
+    }
+    if 'truncated' in record:
+        payload['truncated'] = record['truncated']
+    return payload
+
+
+def to_msgpack(records: List[Dict[str, Any]]) -> bytes:
+    """
+    Encode le graphe en colonnes puis en MessagePack
+    """
+    return msgpack.packb(encode_columnar(records), use_bin_type=True, default=str)
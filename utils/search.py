@@ -0,0 +1,79 @@
+import os
+import re
+import unicodedata
+from typing import Optional, Tuple
+
+from config.db_connection import execute_read
+from utils.ttl_cache import TTLCache
+
+# Durée (secondes) pendant laquelle l'état d'un index full-text est gardé
+INDEX_STATE_TTL = float(os.getenv("SEARCH_INDEX_STATE_TTL", "60"))
+
+# Façons d'exécuter une recherche (voir search_mode)
+FULLTEXT = 'fulltext'
+CONTAINS = 'contains'
+
+INDEX_STATE_QUERY = """
+SHOW FULLTEXT INDEXES YIELD name, state
+WHERE name = $name
+RETURN state
+"""
+
+_index_states = TTLCache(max_size=16, ttl=INDEX_STATE_TTL)
+
+# Découpage en mots proche de celui de l'analyseur standard de l'index full-text ;
+# il écarte aussi tous les caractères réservés de la syntaxe Lucene (+ - " * ...)
+_WORD = re.compile(r'\w+')
+
+
+def fold(text: str) -> str:
+    """
+    Minuscules sans accents (« Éloïse » -> « eloise »), comme l'analyseur standard-folding
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def fulltext_query(recherche: str) -> Optional[str]:
+    """
+    Traduit une recherche libre en requête d'index full-text Neo4j : chaque mot doit
+    apparaître, en entier (pertinence plus forte) ou comme début de mot, pour que
+    la recherche fonctionne pendant la saisie.
+
+    Returns:
+        La requête Lucene, ou None si la recherche ne contient aucun mot
+    """
+    terms = _WORD.findall(fold(recherche))
+    if not terms:
+        return None
+    return " AND ".join(f"({term}^2 OR {term}*)" for term in terms)
+
+
+def fulltext_index_online(name: str) -> Optional[bool]:
+    """
+    True si l'index full-text name existe et est utilisable (créé par la migration 3,
+    SCHEMA_AUTO_MIGRATE étant désactivé par défaut), None si la base ne répond pas
+    """
+    online = _index_states.get(name)
+    if online is None:
+        results = execute_read(INDEX_STATE_QUERY, {'name': name})
+        if results is None:
+            return None
+        online = bool(results) and results[0]['state'] == 'ONLINE'
+        _index_states.set(name, online)
+    return online
+
+
+def search_mode(recherche: str, index: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Façon d'exécuter une recherche libre :
+    - (None, None) sans recherche
+    - (FULLTEXT, requête Lucene) si l'index full-text index est en ligne ; la requête
+      vaut None si la recherche ne contient aucun mot (rien ne peut correspondre)
+    - (CONTAINS, None) sinon : prédicats CONTAINS sur $recherche, sans pertinence
+    """
+    if not recherche:
+        return None, None
+    if fulltext_index_online(index):
+        return FULLTEXT, fulltext_query(recherche)
+    return CONTAINS, None
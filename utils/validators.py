@@ -0,0 +1,58 @@
+from typing import Any, Optional
+
+from utils.function import check_date
+
+# Règles de validation partagées par les endpoints de création et d'import en masse :
+# chaque fonction renvoie le message d'erreur, ou None si les données sont valides
+
+ARTIST_REQUIRED_FIELDS = ['Ar_FirstName', 'Ar_LastName', 'Ar_BirthDay', 'Ar_Nationality', 'Ar_Biography', 'Ar_ImageURL']
+ARTWORK_REQUIRED_FIELDS = ['Art_Title', 'Art_Year', 'Art_Description', 'Art_ImageURL', 'Art_Medium', 'Art_Dimensions']
+RELATION_TYPES = ('CREATED', 'INSPIRE')
+
+
+def _is_date(value: Any) -> bool:
+    return isinstance(value, str) and check_date(value)
+
+
+def validate_artist(data: Optional[dict]) -> Optional[str]:
+    for field in ARTIST_REQUIRED_FIELDS:
+        if not data or field not in data:
+            return f"{field} is required"
+
+    if not _is_date(data['Ar_BirthDay']):
+        return "Ar_BirthDay must be a valid date"
+
+    if data.get('Ar_DeathDay') and not _is_date(data['Ar_DeathDay']):
+        return "Ar_DeathDay must be a valid date"
+
+    return None
+
+
+def validate_artwork(data: Optional[dict]) -> Optional[str]:
+    for field in ARTWORK_REQUIRED_FIELDS:
+        if not data or field not in data:
+            return f"{field} is required"
+
+    if not _is_date(data['Art_Year']):
+        return "Art_Year must be a valid date"
+
+    return None
+
+
+def validate_relation(data: Optional[dict]) -> Optional[str]:
+    """
+    Relation {type, source, target} : CREATED va d'un Ar_ArtistID vers un Art_ArtworkID,
+    INSPIRE de l'Art_ArtworkID qui inspire vers l'Art_ArtworkID inspiré
+    """
+    for field in ('type', 'source', 'target'):
+        if not data or field not in data:
+            return f"{field} is required"
+
+    if data['type'] not in RELATION_TYPES:
+        return f"type must be one of {', '.join(RELATION_TYPES)}"
+
+    for field in ('source', 'target'):
+        if not isinstance(data[field], int) or isinstance(data[field], bool):
+            return f"{field} must be an integer"
+
+    return None